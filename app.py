@@ -1,15 +1,20 @@
 # app.py
+import importlib
+import sys
+import threading
+import time
+
+# true only on the first run in this server process (later runs find the modules imported)
+_COLD = "pages.login_page" not in sys.modules
+_START = time.perf_counter()
+
 import streamlit as st
 from pages.login_page import show_login
-from pages.home_page import show_home
-from pages.tasks_page import show_tasks
-from pages.files_page import show_files
-from pages.audit_page import show_audit
-from pages.analytics_page import show_analytics
-from pages.comm_page import show_comm
-from pages.settings_page import show_settings
-from pages.reports_page import show_reports
+from lib.user_settings import get_user_settings
+from lib import perf
 
+if _COLD:
+    perf.record("app.import", time.perf_counter() - _START)
 
 
 st.set_page_config(
@@ -30,19 +35,46 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# page name -> "module:function"; a page's module is imported the first time someone
+# opens it, so a cold start and the login screen only pay for the login page
 PAGES = {
-    "Home": show_home,
-    "Tasks": show_tasks,
-    "Files": show_files,
-    "Reports": show_reports,
-    "Analytics": show_analytics,
-    "Settings": show_settings,
-    
+    "Home": "pages.home_page:show_home",
+    "Tasks": "pages.tasks_page:show_tasks",
+    "Files": "pages.files_page:show_files",
+    "Reports": "pages.reports_page:show_reports",
+    "Analytics": "pages.analytics_page:show_analytics",
+    "Communication": "pages.comm_page:show_comm",
+    "Settings": "pages.settings_page:show_settings",
+    "Audit": "pages.audit_page:show_audit",
+    "Performance": "pages.perf_page:show_perf",
 }
 
+# pages listed in the sidebar for admins only
+ADMIN_PAGES = {"Audit", "Performance"}
+
+def load_page(name):
+    """The page's render function, timed as span page.<name>; the first import is timed as page.import."""
+    module, _, func = PAGES[name].partition(":")
+    first = module not in sys.modules
+    start = time.perf_counter()
+    fn = getattr(importlib.import_module(module), func)
+    if first:
+        perf.record("page.import", time.perf_counter() - start, page=name)
+    return perf.timed(f"page.{name}")(fn)
+
+def start_background():
+    """
+    Without holding up this run: do the data layer's one-off start-up work (id sequences,
+    audit partitions), then start the scheduler (dashboard snapshots, deadline notifications).
+    """
+    def start():
+        importlib.import_module("lib.data_manager").prepare()
+        importlib.import_module("lib.scheduler").get_scheduler()
+    threading.Thread(target=start, name="taskpilot-startup", daemon=True).start()
+
 def logout():
     """Clear login-related session state. Streamlit will rerun after the button click."""
-    for k in ("logged_in", "username", "role"):
+    for k in ("logged_in", "username", "role", "display_name", "app_settings"):
         if k in st.session_state:
             del st.session_state[k]
     # No explicit rerun call — Streamlit re-runs automatically after button click.
@@ -60,19 +92,28 @@ def main():
         return
 
     # When logged in, render the sidebar and pages
-    display_name = st.session_state.get("display_name") or st.session_state.get("username", "user")
+    username = st.session_state.get("username", "user")
+    display_name = st.session_state.get("display_name") or get_user_settings().get(username)["display_name"] or username
     st.sidebar.title(f"TaskPilot — {display_name}")
 
     if st.sidebar.button("Logout"):
         logout()
         return
 
-    choice = st.sidebar.radio("Navigate", list(PAGES.keys()), index=0)
-    page_fn = PAGES.get(choice)
-    if page_fn:
-        page_fn()
+    role = st.session_state.get("role", "Employee")
+    visible = [name for name in PAGES if name not in ADMIN_PAGES or role == "Admin"]
+    choice = st.sidebar.radio("Navigate", visible, index=0)
+    if choice in PAGES:
+        try:
+            load_page(choice)()
+        finally:
+            perf.export_if_due()
     else:
         st.error("Selected page not found.")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        if _COLD:
+            start_background()
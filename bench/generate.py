@@ -0,0 +1,195 @@
+# bench/generate.py
+"""
+Synthetic TaskPilot datasets for benchmarking.
+
+Writes users/tasks/audit/comm/files CSVs in the app's own format into a data
+directory, at any scale from a few thousand to tens of millions of rows.
+Assignees, teams and audit/message authors follow a Zipf-like distribution,
+so a few users and teams own most of the work, as in real deployments.
+Rows are generated and written in chunks, so memory stays flat at any size.
+
+    python bench/generate.py --tasks 1000000 --out /tmp/taskpilot-1m
+    TASKPILOT_DATA_DIR=/tmp/taskpilot-1m streamlit run app.py
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+CHUNK = 500_000
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+STATUSES = np.array(["Pending", "In Progress", "Complete", "Blocked"])
+STATUS_WEIGHTS = [0.30, 0.20, 0.42, 0.08]
+PRIORITIES = np.array(["High", "Medium", "Low"])
+PRIORITY_WEIGHTS = [0.2, 0.5, 0.3]
+AUDIT_ACTIONS = np.array([
+    "Task Created", "Status Updated", "Reassigned", "Bulk Complete", "Task Deleted", "Login", "Settings Saved",
+])
+AUDIT_WEIGHTS = [0.25, 0.40, 0.10, 0.05, 0.02, 0.15, 0.03]
+AUDIT_CATEGORIES = {"Login": "Auth", "Settings Saved": "Settings"}
+WORDS = np.array("""
+    api review deploy fix update report design test docs migrate refactor customer
+    invoice backlog sprint release audit dashboard cleanup onboarding budget plan
+""".split())
+
+
+def zipf_weights(n, skew):
+    """Probabilities proportional to 1 / rank**skew for ranks 1..n (skew 0 = uniform)."""
+    ranks = np.arange(1, n + 1, dtype=float)
+    weights = ranks ** -skew
+    return weights / weights.sum()
+
+
+def _skewed(rng, n, skew):
+    """Zipf weights over n items in random order (so the busiest user isn't always user 0)."""
+    return rng.permutation(zipf_weights(n, skew))
+
+
+def make_users(rng, n_users, n_teams, skew):
+    """Users with Zipf-sized teams: one admin, ~5% managers (at least one per team)."""
+    teams = np.array([f"team{t:03d}" for t in range(n_teams)])
+    user_team = rng.choice(teams, size=n_users, p=zipf_weights(n_teams, skew))
+    user_team[:n_teams] = teams[: min(n_teams, n_users)]  # every team has someone
+    names = np.array([f"user{i:06d}" for i in range(n_users)])
+    roles = np.where(rng.random(n_users) < 0.05, "Manager", "Employee").astype(object)
+    roles[:n_teams] = "Manager"
+    names[0], roles[0] = "admin", "Admin"
+    return pd.DataFrame({"username": names, "password": names, "role": roles, "team": user_team})
+
+
+def _text(rng, n, words=3):
+    picks = rng.choice(WORDS, size=(n, words))
+    return pd.Series([" ".join(row) for row in picks])
+
+
+def _timestamps(rng, n, start, span_days):
+    offsets = rng.random(n) * span_days * 86_400
+    return pd.to_datetime(start) + pd.to_timedelta(offsets, unit="s")
+
+
+def _write(df, path, first):
+    df.to_csv(path, index=False, mode="w" if first else "a", header=first, date_format=DATE_FORMAT)
+
+
+def make_tasks(rng, users, n, skew, path, start, span_days):
+    """Write n tasks; assignees are Zipf-skewed, team/assigned_by follow the assignee."""
+    p = _skewed(rng, len(users), skew)
+    managers = users[users["role"] == "Manager"].drop_duplicates("team").set_index("team")["username"]
+    for first_id in range(0, n, CHUNK):
+        size = min(CHUNK, n - first_id)
+        who = rng.choice(len(users), size=size, p=p)
+        team = users["team"].to_numpy()[who]
+        created = _timestamps(rng, size, start, span_days)
+        status = rng.choice(STATUSES, size=size, p=STATUS_WEIGHTS)
+        done = pd.Series(created + pd.to_timedelta(rng.exponential(5, size) * 86_400, unit="s"))
+        chunk = pd.DataFrame({
+            "task_id": np.arange(first_id + 1, first_id + size + 1),
+            "title": _text(rng, size, 2).str.capitalize(),
+            "description": _text(rng, size, 6),
+            "assigned_to": users["username"].to_numpy()[who],
+            "assigned_by": managers.reindex(team).fillna("admin").to_numpy(),
+            "due_date": (created + pd.to_timedelta(rng.integers(1, 60, size), unit="D")).normalize(),
+            "status": status,
+            "priority": rng.choice(PRIORITIES, size=size, p=PRIORITY_WEIGHTS),
+            "team": team,
+            "created_date": created,
+            "completion_date": done.where(status == "Complete"),
+        })
+        _write(chunk, path, first_id == 0)
+
+
+def make_audit(rng, users, n, skew, path, start, span_days):
+    """Write n audit rows in timestamp order (as the app appends them)."""
+    p = _skewed(rng, len(users), skew)
+    bounds = np.linspace(0, span_days, max(1, -(-n // CHUNK)) + 1)
+    for i, first_id in enumerate(range(0, n, CHUNK)):
+        size = min(CHUNK, n - first_id)
+        begin = pd.to_datetime(start) + pd.to_timedelta(bounds[i], unit="D")
+        stamps = _timestamps(rng, size, begin, bounds[i + 1] - bounds[i]).sort_values()
+        actions = rng.choice(AUDIT_ACTIONS, size=size, p=AUDIT_WEIGHTS)
+        chunk = pd.DataFrame({
+            "log_id": np.arange(first_id + 1, first_id + size + 1),
+            "timestamp": stamps,
+            "user": users["username"].to_numpy()[rng.choice(len(users), size=size, p=p)],
+            "action": actions,
+            "details": [f"Task {t}" for t in rng.integers(1, max(2, n), size)],
+            "category": pd.Series(actions).map(AUDIT_CATEGORIES).fillna("Task Management").to_numpy(),
+        })
+        _write(chunk, path, first_id == 0)
+
+
+def make_comm(rng, users, n, skew, path, start, span_days):
+    """Write n messages; a fifth go to "All", the rest to a single user."""
+    p = _skewed(rng, len(users), skew)
+    names = users["username"].to_numpy()
+    for first_id in range(0, n, CHUNK):
+        size = min(CHUNK, n - first_id)
+        to = names[rng.choice(len(users), size=size)].astype(object)
+        to[rng.random(size) < 0.2] = "All"
+        chunk = pd.DataFrame({
+            "msg_id": np.arange(first_id + 1, first_id + size + 1),
+            "timestamp": _timestamps(rng, size, start, span_days).sort_values(),
+            "user": names[rng.choice(len(users), size=size, p=p)],
+            "to": to,
+            "message": _text(rng, size, 8),
+        })
+        _write(chunk, path, first_id == 0)
+
+
+def make_files(rng, users, n, skew, path, start, span_days):
+    """Write n file records with log-normal sizes."""
+    p = _skewed(rng, len(users), skew)
+    exts = np.array([".txt", ".pdf", ".csv", ".png", ".py", ".docx"])
+    for first_id in range(0, n, CHUNK):
+        size = min(CHUNK, n - first_id)
+        chunk = pd.DataFrame({
+            "filename": _text(rng, size, 1) + "_" + pd.Series(np.arange(first_id, first_id + size)).astype(str)
+                        + rng.choice(exts, size=size),
+            "size": rng.lognormal(10, 2, size).astype("int64"),
+            "uploaded_by": users["username"].to_numpy()[rng.choice(len(users), size=size, p=p)],
+            "timestamp": _timestamps(rng, size, start, span_days).sort_values(),
+        })
+        _write(chunk, path, first_id == 0)
+
+
+def generate(out, tasks, users=None, teams=None, audit=None, comm=None, files=None,
+             skew=1.1, seed=0, start="2024-01-01", span_days=365):
+    """Write a full dataset into directory `out`; returns the row count per table."""
+    rng = np.random.default_rng(seed)
+    users = users or max(20, tasks // 200)
+    teams = teams or max(2, min(users // 10, int(users ** 0.5)))
+    counts = {
+        "users": users,
+        "tasks": tasks,
+        "audit": tasks * 2 if audit is None else audit,
+        "comm": tasks // 10 if comm is None else comm,
+        "files": tasks // 20 if files is None else files,
+    }
+    os.makedirs(out, exist_ok=True)
+    user_df = make_users(rng, users, teams, skew)
+    user_df.to_csv(os.path.join(out, "users.csv"), index=False)
+    for name, make in (("tasks", make_tasks), ("audit", make_audit), ("comm", make_comm), ("files", make_files)):
+        make(rng, user_df, counts[name], skew, os.path.join(out, f"{name}.csv"), start, span_days)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic TaskPilot data directory.")
+    parser.add_argument("--out", required=True, help="data directory to (over)write")
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--users", type=int, help="default: tasks / 200 (at least 20)")
+    parser.add_argument("--teams", type=int, help="default: about sqrt(users)")
+    parser.add_argument("--audit", type=int, help="default: 2 x tasks")
+    parser.add_argument("--comm", type=int, help="default: tasks / 10")
+    parser.add_argument("--files", type=int, help="default: tasks / 20")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for assignee/team sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    opts = parser.parse_args(argv)
+    counts = generate(opts.out, opts.tasks, opts.users, opts.teams, opts.audit, opts.comm, opts.files,
+                      skew=opts.skew, seed=opts.seed)
+    print(", ".join(f"{name}={rows:,}" for name, rows in counts.items()), "->", opts.out)
+
+
+if __name__ == "__main__":
+    main()
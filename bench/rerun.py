@@ -0,0 +1,311 @@
+# bench/rerun.py
+"""
+End-to-end rerun latency per role, driven headlessly with Streamlit's AppTest.
+
+Logs in as an Admin, a Manager and an Employee, visits every page the role
+sees in the sidebar and performs the common actions (status update, bulk
+complete, report filter, message send), timing the full script rerun of each
+interaction and the peak Python memory it allocates. Each dataset runs in its
+own process (the app keeps process-wide stores), against a scratch copy.
+
+Interactions whose p95 exceeds their budget (or whose peak exceeds
+--memory-mb) are flagged and the run exits 1, so it can gate a CI job.
+
+    python bench/rerun.py                                   # the repo's data/
+    python bench/rerun.py --sizes 1000 10000 100000 --budget-ms 1000 --budget Reports=2000
+    python bench/rerun.py --data /tmp/tp-1m --repeat 3 --json rerun.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# default p95 budget of one rerun, in milliseconds
+BUDGET_MS = 2000.0
+BULK_SIZE = 20
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def pick_users(data):
+    """Admin, the manager of the busiest team and the busiest employee: role -> (username, password)."""
+    import pandas as pd
+    users = pd.read_csv(os.path.join(data, "users.csv"), dtype=str).fillna("")
+    tasks = pd.read_csv(os.path.join(data, "tasks.csv"), usecols=["assigned_to", "team"], dtype=str)
+    key = lambda value: str(value).strip().casefold()
+    by_role = {}
+    for row in users.itertuples(index=False):
+        by_role.setdefault(key(row.role), []).append(row)
+    picked = {}
+    if by_role.get("admin"):
+        picked["Admin"] = by_role["admin"][0]
+    managers = {}
+    for row in by_role.get("manager", ()):
+        managers.setdefault(key(row.team), row)
+    busiest = [managers[key(team)] for team in tasks["team"].value_counts().index if key(team) in managers]
+    if busiest or managers:
+        picked["Manager"] = (busiest or list(managers.values()))[0]
+    employees = {row.username: row for row in by_role.get("employee", ())}
+    busiest = [employees[name] for name in tasks["assigned_to"].value_counts().index if name in employees]
+    if busiest or employees:
+        picked["Employee"] = (busiest or list(employees.values()))[0]
+    return {role: (row.username, row.password) for role, row in picked.items()}
+
+
+class Session:
+    """One logged-in AppTest session; every interaction is a timed rerun."""
+
+    def __init__(self, app, timeout):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(app, default_timeout=timeout)
+        self.at.run()
+
+    def run(self):
+        start = time.perf_counter()
+        self.at.run()
+        elapsed = time.perf_counter() - start
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+        return elapsed
+
+    def widget(self, kind, label):
+        return next(w for w in getattr(self.at, kind) if w.label == label)
+
+    def has(self, kind, label):
+        return any(w.label == label for w in getattr(self.at, kind))
+
+    def login(self, username, password):
+        self.at.text_input[0].input(username)
+        self.at.text_input[1].input(password)
+        self.at.button[0].click()
+        elapsed = self.run()
+        if not self.at.sidebar.radio:
+            raise RuntimeError(f"login as {username} failed")
+        return elapsed
+
+    @property
+    def pages(self):
+        return list(self.at.sidebar.radio[0].options)
+
+    def goto(self, page):
+        self.at.sidebar.radio[0].set_value(page)
+        return self.run()
+
+
+def interactions(session, role):
+    """name -> callable doing one interaction and returning its rerun seconds."""
+    pages = session.pages
+    other = {page: pages[1] if page == pages[0] else pages[0] for page in pages}
+
+    def visit(page):
+        session.goto(other[page])  # untimed: arrive from another page
+        return session.goto(page)
+
+    def status_update():
+        session.goto("Tasks")
+        status = session.widget("selectbox", "Status")
+        status.set_value("In Progress" if status.value == "Complete" else "Complete")
+        session.widget("button", "Save status").click()
+        return session.run()
+
+    def bulk_complete():
+        session.goto("Tasks")
+        checked = session.widget("multiselect", "Select Task IDs")
+        checked.set_value(checked.options[:BULK_SIZE])
+        session.widget("button", "Mark selected Complete").click()
+        return session.run()
+
+    filters = [["Pending", "Blocked"], []]
+
+    def report_filter():
+        session.goto("Reports")
+        filters.reverse()
+        session.at.multiselect(key="report_status").set_value(filters[0])
+        return session.run()
+
+    def send_message():
+        session.goto("Communication")
+        session.widget("text_area", "Message").input(f"rerun benchmark {time.time()}")
+        session.widget("button", "Send").click()
+        return session.run()
+
+    cases = {f"page: {page}": (lambda page=page: visit(page)) for page in pages}
+    if "Tasks" in pages:
+        # the task actions only exist for users who have tasks
+        session.goto("Tasks")
+        if role == "Employee" and session.has("selectbox", "Status"):
+            cases["tasks: status update"] = status_update
+        elif role == "Manager" and session.has("multiselect", "Select Task IDs") \
+                and session.widget("multiselect", "Select Task IDs").options:
+            cases["tasks: bulk complete"] = bulk_complete
+    if "Reports" in pages:
+        cases["reports: filter"] = report_filter
+    if "Communication" in pages:
+        cases["comm: send message"] = send_message
+    return cases
+
+
+def measure(fn, repeat, warmup=1):
+    """Per-rerun seconds of `repeat` calls after `warmup`, and the peak bytes of one traced call."""
+    for _ in range(warmup):
+        fn()
+    samples = [fn() for _ in range(repeat)]
+    # peak memory from a separate call: tracing slows the timed calls down
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return samples, peak
+
+
+def _row(samples, peak):
+    return {
+        "p50_ms": percentile(samples, 50) * 1e3,
+        "p95_ms": percentile(samples, 95) * 1e3,
+        "max_ms": max(samples) * 1e3,
+        "peak_mb": peak / 2**20 if peak is not None else None,
+    }
+
+
+def run_worker(data, repeat, timeout):
+    """Time every role's interactions against a scratch copy of `data` (call in a fresh process)."""
+    scratch = tempfile.mkdtemp(prefix="taskpilot-rerun-")
+    shutil.copytree(data, scratch, dirs_exist_ok=True)
+    os.environ["TASKPILOT_DATA_DIR"] = scratch
+    sys.path.insert(0, ROOT)
+    try:
+        results = {}
+        for role, (username, password) in pick_users(data).items():
+            session = Session(os.path.join(ROOT, "app.py"), timeout)
+            # one sample, untraced (the first login also pays for imports and building the stores)
+            rows = {"login": _row([session.login(username, password)], None)}
+            for name, fn in interactions(session, role).items():
+                try:
+                    rows[name] = _row(*measure(fn, repeat))
+                except (RuntimeError, StopIteration, IndexError) as exc:
+                    # a widget the interaction needs is missing, or the page raised
+                    rows[name] = {"error": str(exc) or type(exc).__name__}
+            results[f"{role} ({username})"] = rows
+        from lib import data_manager as dm
+        dm.flush()
+        return results
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def budget_for(name, budgets, default):
+    """The budget of the last NAME=MS override whose NAME occurs in the interaction's name."""
+    ms = default
+    for pattern, value in budgets:
+        if pattern.casefold() in name.casefold():
+            ms = value
+    return ms
+
+
+def report(results, budgets, default_ms, memory_mb=None):
+    """Print a table per dataset; returns (dataset, role, interaction) of everything over budget."""
+    over = []
+    for dataset, roles in results.items():
+        print(f"\n== {dataset}")
+        print(f"{'role':28} {'interaction':26} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'peak MB':>8} {'budget':>8}")
+        for role, rows in roles.items():
+            for name, row in rows.items():
+                if "error" in row:
+                    print(f"{role:28} {name:26} ERROR {row['error']}")
+                    over.append((dataset, role, name))
+                    continue
+                budget = budget_for(name, budgets, default_ms)
+                peak = row["peak_mb"]
+                line = (f"{role:28} {name:26} {row['p50_ms']:9.1f} {row['p95_ms']:9.1f} {row['max_ms']:9.1f}"
+                        f" {'-' if peak is None else f'{peak:.1f}':>8} {budget:8.0f}")
+                if row["p95_ms"] > budget or (memory_mb is not None and peak is not None and peak > memory_mb):
+                    line += "  OVER"
+                    over.append((dataset, role, name))
+                print(line)
+    return over
+
+
+def _budget(text):
+    name, _, ms = text.rpartition("=")
+    if not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=MS, got {text!r}")
+    return name, float(ms)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time TaskPilot's full-script reruns per role.")
+    parser.add_argument("--data", nargs="*", help="data directories (copied, never modified); default: the repo's data/")
+    parser.add_argument("--sizes", nargs="*", type=int, help="generate datasets with this many tasks and run against each")
+    parser.add_argument("--repeat", type=int, default=5, help="timed reruns per interaction")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="p95 budget of a rerun")
+    parser.add_argument("--budget", type=_budget, action="append", default=[], metavar="NAME=MS",
+                        help="budget for interactions whose name contains NAME (repeatable; last match wins)")
+    parser.add_argument("--memory-mb", type=float, help="peak Python memory budget of one rerun")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds one rerun may take before failing")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)  # internal: results file of one dataset
+    opts = parser.parse_args(argv)
+
+    if opts.worker:
+        results = run_worker(opts.data[0], opts.repeat, opts.timeout)
+        with open(opts.worker, "w", encoding="utf-8") as fh:
+            json.dump(results, fh)
+        return
+
+    datasets = {path: path for path in opts.data or ()}
+    generated = []
+    if opts.sizes:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from generate import generate
+        for size in opts.sizes:
+            out = tempfile.mkdtemp(prefix=f"taskpilot-{size}-")
+            generate(out, size)
+            generated.append(out)
+            datasets[f"{size:,} tasks"] = out
+    if not datasets:
+        datasets = {"data/": os.path.join(ROOT, "data")}
+
+    results = {}
+    try:
+        for label, path in datasets.items():
+            fd, out = tempfile.mkstemp(suffix=".json")
+            os.close(fd)
+            try:
+                subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--data", path, "--repeat", str(opts.repeat),
+                     "--timeout", str(opts.timeout), "--worker", out],
+                    check=True,
+                )
+                with open(out, encoding="utf-8") as fh:
+                    results[label] = json.load(fh)
+            finally:
+                os.unlink(out)
+    finally:
+        for path in generated:
+            shutil.rmtree(path, ignore_errors=True)
+
+    over = report(results, opts.budget, opts.budget_ms, opts.memory_mb)
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    if over:
+        print(f"\n{len(over)} interaction(s) over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
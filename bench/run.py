@@ -0,0 +1,207 @@
+# bench/run.py
+"""
+Data-path benchmarks for TaskPilot.
+
+Times the work behind each page against a data directory (see generate.py)
+and reports latency percentiles, throughput and peak Python memory per case.
+The data directory is copied to a scratch directory first, since some cases
+save. Pass --json to keep the results and --baseline to compare against an
+earlier run, which flags cases that got slower than --threshold.
+
+    python bench/generate.py --tasks 100000 --out /tmp/tp-100k
+    python bench/run.py --data /tmp/tp-100k --json after.json --baseline before.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def measure(fn, repeat, warmup=1):
+    """Run fn warmup+repeat times; returns per-call seconds, the last result and peak bytes of one call."""
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    # peak memory from a separate call: tracing slows the timed calls down
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return samples, result, peak
+
+
+def cases(dm, store):
+    """name -> (callable, rows-processed callable). Each mirrors what a page does on a rerun."""
+    import pandas as pd
+    from lib.audit_log import get_audit_log
+    from lib.messages import get_message_store
+    from lib.report_query import get_report_query
+    from pages.audit_page import PAGE_SIZE as AUDIT_PAGE_SIZE
+    users = dm.read_table("users")
+    tasks = store.df
+    busiest = tasks["assigned_to"].value_counts().index[0]
+    team = tasks["team"].value_counts().index[0]
+    audit = get_audit_log()
+    audit_rows = len(audit)
+    comm_rows = len(dm.read_table("comm"))
+    messages = get_message_store()
+    reports = get_report_query()
+
+    def cold_load():
+        dm.invalidate_cache()
+        return dm.get_dataframes()
+
+    def export():
+        return dm.query_tasks(assigned_to=busiest, status="Complete").to_csv(index=False)
+
+    def audit_page():
+        # the audit page's default view: the first page of the last 30 days
+        oldest, newest = audit.time_bounds()
+        start = max(oldest, newest - pd.Timedelta(days=30)).date() if oldest is not None else None
+        return audit.page(0, AUDIT_PAGE_SIZE, start=start, end=newest.date() if newest is not None else None)
+
+    def quick_save():
+        return dm.quick_save(users=dm.load_table("users"))
+
+    def complete_one():
+        task_id = int(store.df["task_id"].iloc[-1])
+        return store.update_status([task_id], "Complete", "admin", action="Benchmark")
+
+    return {
+        "get_dataframes (cold)": (cold_load, lambda r: sum(len(df) for df in r)),
+        "get_dataframes (warm)": (dm.get_dataframes, lambda r: sum(len(df) for df in r)),
+        "tasks: employee filter": (lambda: dm.query_tasks(assigned_to=busiest), len),
+        "tasks: manager team filter": (lambda: dm.query_tasks(team=team), len),
+        "tasks: admin view": (lambda: dm.query_tasks(), len),
+        "home: admin KPIs": (lambda: dm.task_counts("status"), lambda r: len(tasks)),
+        "home: manager KPIs": (
+            lambda: (dm.task_counts("status", team=team), dm.task_counts("assigned_to", team=team)),
+            lambda r: len(tasks),
+        ),
+        "analytics: KPIs + rates": (
+            lambda: (
+                dm.task_counts("priority"),
+                dm.task_counts("assigned_to", status="Complete") / dm.task_counts("assigned_to"),
+            ),
+            lambda r: len(tasks),
+        ),
+        "reports: filter + CSV export": (export, lambda r: r.count("\n") - 1),
+        "reports: query + summary": (
+            lambda: (
+                reports.select(team=team, status=["Pending", "Blocked"], due=("2024-01-01", None), overdue=True),
+                reports.summary("assigned_to", team=team),
+            ),
+            lambda r: len(tasks),
+        ),
+        "audit: newest page": (audit_page, lambda r: audit_rows),
+        "comm: user feed": (lambda: messages.feed(busiest), lambda r: comm_rows),
+        "settings: quick_save users": (quick_save, lambda r: len(users)),
+        "tasks: status update": (complete_one, lambda r: len(tasks)),
+    }
+
+
+def run(data, repeat, only=None):
+    scratch = tempfile.mkdtemp(prefix="taskpilot-bench-")
+    shutil.copytree(data, scratch, dirs_exist_ok=True)
+    os.environ["TASKPILOT_DATA_DIR"] = scratch
+    os.environ.setdefault("TASKPILOT_COMMIT_INTERVAL", "0")  # time the writes, not the queueing
+    sys.path.insert(0, ROOT)
+    from lib import data_manager as dm
+    from lib.task_store import get_task_store
+
+    try:
+        start = time.perf_counter()
+        store = get_task_store()
+        setup = time.perf_counter() - start
+        results = {"_setup": {"seconds": setup, "tasks": len(store.df)}}
+        for name, (fn, rows) in cases(dm, store).items():
+            if only and not any(word in name for word in only):
+                continue
+            samples, result, peak = measure(fn, repeat)
+            mean = sum(samples) / len(samples)
+            results[name] = {
+                "p50_ms": percentile(samples, 50) * 1e3,
+                "p95_ms": percentile(samples, 95) * 1e3,
+                "p99_ms": percentile(samples, 99) * 1e3,
+                "ops_per_s": 1 / mean if mean else float("inf"),
+                "rows_per_s": rows(result) / mean if mean else float("inf"),
+                "peak_mb": peak / 2**20,
+            }
+        dm.flush()
+        return results
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def report(results, baseline=None, threshold=0.2):
+    """Print a table; returns the names of cases more than `threshold` slower (p50) than baseline."""
+    setup = results["_setup"]
+    print(f"{setup['tasks']:,} tasks, store built in {setup['seconds']:.2f}s")
+    header = f"{'case':32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'rows/s':>12} {'peak MB':>8}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    slower = []
+    for name, row in results.items():
+        if name.startswith("_"):
+            continue
+        line = (f"{name:32} {row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['p99_ms']:9.2f}"
+                f" {row['ops_per_s']:9.1f} {row['rows_per_s']:12,.0f} {row['peak_mb']:8.1f}")
+        base = (baseline or {}).get(name)
+        if base:
+            change = row["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+            line += f" {change:+8.0%}"
+            if change > threshold:
+                line += "  SLOWER"
+                slower.append(name)
+        print(line)
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TaskPilot's data paths.")
+    parser.add_argument("--data", default=os.path.join(ROOT, "data"), help="data directory (copied, never modified)")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per case")
+    parser.add_argument("--only", nargs="*", help="run only cases whose name contains one of these words")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown that counts as a regression")
+    opts = parser.parse_args(argv)
+
+    results = run(opts.data, opts.repeat, opts.only)
+    baseline = None
+    if opts.baseline:
+        with open(opts.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    slower = report(results, baseline, opts.threshold)
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    if slower:
+        print(f"{len(slower)} case(s) slower than baseline by more than {opts.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
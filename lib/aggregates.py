@@ -0,0 +1,105 @@
+# lib/aggregates.py
+"""
+Materialized task counts for the dashboards.
+
+Counts are kept per (team, assigned_to, status, priority) group and updated
+from the rows each TaskStore write changed, so KPIs cost O(groups) instead of
+a scan of the tasks table. Whenever the store reloads the table wholesale
+(first use, or a save made outside the store) the counts are rebuilt from
+scratch, which keeps them consistent with the store's current version.
+"""
+import threading
+from collections import Counter
+import pandas as pd
+from lib.backends import team_key
+from lib.task_store import get_task_store
+
+GROUP_KEYS = ("team", "assigned_to", "status", "priority")
+_TEAM = GROUP_KEYS.index("team")
+
+
+def _group_keys(rows):
+    """Return the (team, assigned_to, status, priority) tuple of every row (missing -> None)."""
+    if rows is None or rows.empty:
+        return []
+    sub = rows.reindex(columns=list(GROUP_KEYS)).astype(object)
+    sub = sub.where(sub.notna(), None)
+    return list(sub.itertuples(index=False, name=None))
+
+
+class TaskAggregates:
+    """Task counts per group, kept in step with a TaskStore."""
+
+    def __init__(self, store=None):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self.version = None
+        self.store = store if store is not None else get_task_store()
+        self.store.subscribe(self._on_change)
+
+    def _on_change(self, version, df, before, after):
+        with self._lock:
+            if before is None:
+                self._rebuild(df)
+            else:
+                self._counts.subtract(_group_keys(before))
+                self._counts.update(_group_keys(after))
+                self._counts = +self._counts  # drop groups that reached zero
+            self.version = version
+
+    def _rebuild(self, df):
+        self._counts = Counter()
+        if df is not None and not df.empty:
+            self._counts.update(_group_keys(df))
+
+    def rebuild(self):
+        """Recompute every group from the store's current table."""
+        version, df = self.store.view()
+        with self._lock:
+            self._rebuild(df)
+            self.version = version
+
+    def groups(self):
+        """Return the current counts as a DataFrame with one row per group."""
+        self.store.view()  # picks up saves made outside the store
+        with self._lock:
+            items = list(self._counts.items())
+        return pd.DataFrame(
+            [key + (count,) for key, count in items],
+            columns=list(GROUP_KEYS) + ["count"],
+        )
+
+    def counts(self, by="status", assigned_to=None, team=None, status=None, priority=None):
+        """Task counts per value of `by` for the given filters, largest first, as a Series named "count"."""
+        if by not in GROUP_KEYS:
+            raise KeyError(f"Cannot group tasks by {by!r}")
+        # the team matches any spelling of it, as the user directory does
+        filters = {"assigned_to": assigned_to, "status": status, "priority": priority}
+        wanted = [(GROUP_KEYS.index(col), value) for col, value in filters.items() if value is not None]
+        if team is not None:
+            wanted.append((_TEAM, team_key(team)))
+        at = GROUP_KEYS.index(by)
+        self.store.view()
+        totals = Counter()
+        with self._lock:
+            for key, count in self._counts.items():
+                if key[at] is not None and all(
+                    (team_key(key[i]) if i == _TEAM else key[i]) == value for i, value in wanted
+                ):
+                    totals[key[at]] += count
+        if not totals:
+            return pd.Series(dtype="int64", name="count")
+        return pd.Series(totals, dtype="int64", name="count").sort_values(ascending=False)
+
+
+_AGGREGATES = None
+_AGGREGATES_LOCK = threading.Lock()
+
+
+def get_aggregates():
+    """Return the process-wide TaskAggregates, creating it on first use."""
+    global _AGGREGATES
+    with _AGGREGATES_LOCK:
+        if _AGGREGATES is None:
+            _AGGREGATES = TaskAggregates()
+        return _AGGREGATES
@@ -0,0 +1,214 @@
+# lib/audit_log.py
+"""
+Time-ordered view of the audit log for the audit viewer and dashboards.
+
+The audit table is stored in monthly partitions (see lib.partitions), and
+this view loads partitions lazily: the newest rows come from the newest
+partition, and a time-range query opens only the partitions overlapping the
+range. Partitions lying wholly inside an unfiltered range are counted from
+the manifest without being read at all.
+
+Each loaded partition keeps its timestamps as a sorted int64 array (plus a
+permutation only if its rows are ever out of order), so the newest N rows
+are a slice and a time range is two binary searches. Rows appended to the
+current month are parsed from the partition's previous end offset instead of
+re-reading it.
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from lib.data_manager import read_partition, table_partitions
+
+FILTER_COLUMNS = ("user", "action", "category")
+# partitions kept parsed in memory (the newest ones are the ones in use)
+MAX_LOADED = 24
+_NAT = np.iinfo("int64").min
+
+
+def _stamps(column):
+    # int64 nanoseconds; NaT becomes the smallest value and so sorts first (oldest)
+    return pd.to_datetime(column, errors="coerce", format="mixed").to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def _bound(value, end=False):
+    """Timestamp bound as int64 ns; a date `end` includes that whole day."""
+    if value is None:
+        return None
+    stamp = pd.Timestamp(value)
+    if end and stamp == stamp.normalize():
+        stamp += pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+    return stamp.value
+
+
+class _Partition:
+    """One parsed partition: rows plus their timestamps in sorted order."""
+
+    def __init__(self, part, df, offset):
+        self.signature = part["signature"]
+        self.generation = part["generation"]
+        self.offset = offset if part.get("incremental") else None
+        self.df = df.reset_index(drop=True)
+        ts = _stamps(self.df["timestamp"]) if "timestamp" in self.df.columns else np.full(len(self.df), _NAT)
+        if np.all(ts[1:] >= ts[:-1]):
+            self.ts, self.order = ts, None
+        else:
+            self.order = np.argsort(ts, kind="stable")
+            self.ts = ts[self.order]
+
+    def extend(self, part, rows, offset):
+        """Add rows appended since the last read; False if they don't keep the order (reload instead)."""
+        ts = _stamps(rows["timestamp"]) if "timestamp" in rows.columns else np.full(len(rows), _NAT)
+        if self.order is not None or not np.all(ts[1:] >= ts[:-1]) or (len(self.ts) and len(ts) and ts[0] < self.ts[-1]):
+            return False
+        self.df = pd.concat([self.df, rows], ignore_index=True) if len(self.df) else rows.reset_index(drop=True)
+        self.ts = np.concatenate([self.ts, ts])
+        self.signature, self.offset = part["signature"], offset
+        return True
+
+    def rows(self, positions):
+        if self.order is not None:
+            positions = self.order[positions]
+        return self.df.iloc[positions]
+
+    def span(self, start, end):
+        """[lo, hi) positions of the rows within [start, end]."""
+        lo = 0 if start is None else int(np.searchsorted(self.ts, _bound(start), "left"))
+        hi = len(self.ts) if end is None else int(np.searchsorted(self.ts, _bound(end, True), "right"))
+        return lo, max(lo, hi)
+
+    def matches(self, lo, hi, filters):
+        """Positions in [lo, hi) whose row matches every {column: value} filter."""
+        rows = self.rows(np.arange(lo, hi))
+        mask = np.ones(len(rows), dtype=bool)
+        for col, value in filters.items():
+            if col not in rows.columns:
+                return np.empty(0, dtype="int64")
+            mask &= (rows[col] == value).to_numpy(dtype=bool, na_value=False)
+        return np.arange(lo, hi)[mask]
+
+
+class AuditLog:
+    """Audit rows in timestamp order, loaded per partition on demand."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()  # partition key -> _Partition
+
+    def _part(self, part):
+        """The parsed partition for a descriptor from table_partitions(), loading as needed."""
+        key = part["key"]
+        with self._lock:
+            cached = self._loaded.get(key)
+            if cached is not None:
+                self._loaded.move_to_end(key)
+                if cached.signature == part["signature"]:
+                    return cached
+                if cached.offset is not None and cached.generation == part["generation"]:
+                    rows, offset = read_partition("audit", key, cached.offset)
+                    if cached.extend(part, rows, offset):
+                        return cached
+            df, offset = read_partition("audit", key)
+            loaded = _Partition(part, df, offset)
+            self._loaded[key] = loaded
+            while len(self._loaded) > MAX_LOADED:
+                self._loaded.popitem(last=False)
+            return loaded
+
+    def __len__(self):
+        total = 0
+        for part in table_partitions("audit"):
+            total += part["rows"] if part["rows"] is not None else len(self._part(part).ts)
+        return total
+
+    def options(self, column, start=None, end=None):
+        """Sorted distinct values of a filter column (user, action, category) within [start, end]."""
+        values = set()
+        for part in table_partitions("audit", start, end):
+            df = self._part(part).df
+            if column in df.columns:
+                values.update(df[column].dropna().unique().tolist())
+        return sorted(values, key=str)
+
+    def time_bounds(self):
+        """(oldest, newest) timestamp in the log, or (None, None) if empty."""
+        parts = table_partitions("audit")
+        dated = [p for p in parts if p["start"] is not None]
+        if dated:
+            return pd.Timestamp(dated[0]["start"]), pd.Timestamp(dated[-1]["end"])
+        valid = []
+        for part in parts:
+            ts = self._part(part).ts
+            ts = ts[ts != _NAT]
+            if len(ts):
+                valid += [ts[0], ts[-1]]
+        if not valid:
+            return None, None
+        return pd.Timestamp(min(valid)), pd.Timestamp(max(valid))
+
+    def tail(self, n=10):
+        """The newest n rows, newest first (reads only the newest partitions)."""
+        frames = []
+        for part in reversed(table_partitions("audit")):
+            loaded = self._part(part)
+            take = min(n, len(loaded.ts))
+            if take:
+                frames.append(loaded.rows(np.arange(len(loaded.ts) - 1, len(loaded.ts) - take - 1, -1)))
+                n -= take
+            if n <= 0:
+                break
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def page(self, page=0, page_size=50, start=None, end=None, user=None, action=None, category=None):
+        """
+        One page of rows, newest first, within [start, end] (dates or timestamps) and matching
+        the given user/action/category. Returns (rows, total matching rows).
+        """
+        filters = {"user": user, "action": action, "category": category}
+        filters = {col: value for col, value in filters.items() if value is not None}
+        lo_ns, hi_ns = _bound(start), _bound(end, True)
+        skip, need = page * page_size, page_size
+        frames, total = [], 0
+        for part in reversed(table_partitions("audit", start, end)):
+            inside = (
+                not filters and part["rows"] is not None and part["start"] is not None
+                and (lo_ns is None or pd.Timestamp(part["start"]).value >= lo_ns)
+                and (hi_ns is None or pd.Timestamp(part["end"]).value <= hi_ns)
+            )
+            if inside and (need == 0 or skip >= part["rows"]):
+                # wholly in range and not on this page: counted from the manifest, never read
+                total += part["rows"]
+                skip -= min(skip, part["rows"])
+                continue
+            loaded = self._part(part)
+            lo, hi = loaded.span(start, end)
+            positions = loaded.matches(lo, hi, filters) if filters else np.arange(lo, hi)
+            total += len(positions)
+            if need == 0:
+                continue
+            if skip >= len(positions):
+                skip -= len(positions)
+                continue
+            taken = positions[::-1][skip:skip + need]
+            frames.append(loaded.rows(taken))
+            need -= len(taken)
+            skip = 0
+        if not frames:
+            return pd.DataFrame(), total
+        rows = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return rows, total
+
+
+_AUDIT = None
+_AUDIT_LOCK = threading.Lock()
+
+
+def get_audit_log():
+    """Return the process-wide AuditLog, creating it on first use."""
+    global _AUDIT
+    with _AUDIT_LOCK:
+        if _AUDIT is None:
+            _AUDIT = AuditLog()
+        return _AUDIT
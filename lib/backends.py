@@ -0,0 +1,453 @@
+# lib/backends.py
+"""
+Storage backends used by lib.data_manager.
+
+CsvBackend keeps one CSV file per table (the default, fine for small installs),
+or monthly partitions for time-ordered tables such as the audit log.
+SqliteBackend keeps all tables in a single SQLite database in WAL mode with
+indexes on the columns the pages filter by, so role-scoped task queries and
+status counts do not have to scan the whole table.
+"""
+import io
+import os
+import sqlite3
+import threading
+from typing import NamedTuple
+import pandas as pd
+from lib import perf
+
+# columns indexed by SqliteBackend, per table
+SQLITE_INDEXES = {
+    "tasks": ("task_id", "assigned_to", "team", "status", "due_date"),
+    "audit": ("timestamp",),
+    "comm": ("msg_id",),
+}
+
+# keys per statement in row-level SQLite writes (below SQLite's bound-parameter limit)
+SQLITE_CHUNK = 500
+
+
+class RowChanges(NamedTuple):
+    """
+    A table save described row by row: `frame` is the whole new table; `inserted` and
+    `updated` hold the new and changed rows, `deleted` the `key` values of removed rows.
+    SqliteBackend writes only those rows; CSV files are rewritten from `frame`.
+    """
+    frame: pd.DataFrame
+    key: str
+    inserted: pd.DataFrame
+    updated: pd.DataFrame
+    deleted: list
+
+    @classmethod
+    def between(cls, frame, key, before, after):
+        """The changes that turned rows `before` into rows `after` of a table now equal to `frame`."""
+        old, new = set(before[key].tolist()), set(after[key].tolist())
+        is_new = ~after[key].isin(old)
+        return cls(frame, key, after[is_new], after[~is_new], [k for k in old if k not in new])
+
+# columns whose values are matched case- and whitespace-insensitively ("Core" == "core ")
+CASELESS = ("team",)
+
+def team_key(team):
+    """Case- and whitespace-insensitive key of a team name ("" for no team)."""
+    if team is None or team != team:
+        return ""
+    return str(team).strip().casefold()
+
+def display_spelling(counts):
+    """
+    The most common spelling in a Counter of spellings (None if it is empty). Ties go to
+    the alphabetically first, so the name doesn't depend on the order rows were counted in.
+    """
+    present = [spelling for spelling, n in counts.items() if n > 0]
+    return min(present, key=lambda spelling: (-counts[spelling], spelling), default=None)
+
+def spellings(values, value):
+    """The distinct stored values that match `value` under team_key()."""
+    key = team_key(value)
+    return [v for v in values if v is not None and v == v and team_key(v) == key]
+
+def filter_frame(df, filters):
+    """
+    Apply equality filters {column: value} to a DataFrame (None values are ignored).
+    CASELESS columns match every spelling of the value.
+    """
+    mask = None
+    for col, value in filters.items():
+        if value is None:
+            continue
+        if col not in df.columns:
+            return df.iloc[0:0]
+        if col in CASELESS:
+            cond = df[col].isin(spellings(df[col].unique(), value))
+        else:
+            cond = df[col] == value
+        mask = cond if mask is None else (mask & cond)
+    return df if mask is None else df[mask]
+
+def count_frame(df, by, filters):
+    """Count rows of a DataFrame per value of column `by`, after equality filters."""
+    sub = filter_frame(df, filters)
+    if by not in sub.columns:
+        return pd.Series(dtype="int64")
+    counts = sub[by].value_counts()
+    if isinstance(counts.index, pd.CategoricalIndex):
+        # a categorical counts every category: keep the values present, as plain labels
+        counts = counts[counts > 0]
+        counts.index = counts.index.astype(counts.index.categories.dtype)
+    return counts
+
+
+class CsvBackend:
+    """One CSV file per table; tables listed in `partitioned` are PartitionedCsv instead."""
+
+    name = "csv"
+    # queries filter the cached in-memory table rather than the storage
+    indexed = False
+
+    def __init__(self, paths, partitioned=None):
+        self.paths = dict(paths)
+        self.partitioned = dict(partitioned or {})
+
+    def signature(self, name):
+        if name in self.partitioned:
+            return self.partitioned[name].signature()
+        try:
+            info = self.paths[name].stat()
+            return (info.st_mtime_ns, info.st_size)
+        except FileNotFoundError:
+            return None
+
+    def read(self, name):
+        if name in self.partitioned:
+            return self.partitioned[name].read()
+        try:
+            # parse_dates=False (we parse explicitly later where needed)
+            return pd.read_csv(self.paths[name])
+        except FileNotFoundError:
+            return pd.DataFrame()
+
+    def write(self, name, df):
+        """Replace the table atomically: write a temp file next to it, then rename over it."""
+        if name in self.partitioned:
+            return self.partitioned[name].write(df)
+        path = self.paths[name]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8", newline="") as fh:
+                df.to_csv(fh, index=False)
+                perf.count("bytes_written", fh.tell(), table=name)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    def _read_header(self, path):
+        """Return (columns, ends_with_newline) for a CSV file, or (None, True) if it is empty."""
+        try:
+            with open(path, "rb") as fh:
+                first = fh.readline().decode("utf-8").strip()
+                if not first:
+                    return None, True
+                fh.seek(-1, os.SEEK_END)
+                return first.split(","), fh.read(1) == b"\n"
+        except FileNotFoundError:
+            return None, True
+
+    def append(self, name, new, fsync=False):
+        """
+        Append rows to the table's CSV, writing only the new rows.
+        Returns the rows as a re-read of the file would parse them, or None if the
+        whole file had to be (re)written and cached copies must be dropped.
+        """
+        if name in self.partitioned:
+            return self.partitioned[name].append(new, fsync)
+        path = self.paths[name]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        columns, ends_with_newline = self._read_header(path)
+        if columns is not None and not set(new.columns) <= set(columns):
+            # schema grew: fall back to a full rewrite (rare)
+            self.write(name, pd.concat([self.read(name), new], ignore_index=True))
+            return None
+
+        header = columns is None
+        if not header:
+            new = new.reindex(columns=columns)
+        text = new.to_csv(index=False, header=header)
+        with open(path, "a", encoding="utf-8", newline="") as fh:
+            start = fh.tell()
+            if not ends_with_newline:
+                fh.write("\n")
+            fh.write(text)
+            perf.count("bytes_written", fh.tell() - start, table=name)
+            fh.flush()
+            if fsync:
+                os.fsync(fh.fileno())
+        if header:
+            return None
+        return pd.read_csv(io.StringIO(",".join(columns) + "\n" + text))
+
+    def partitions(self, name, start=None, end=None):
+        """
+        Time partitions of a table overlapping [start, end], oldest first, as dicts with
+        key, start, end, rows and signature. An unpartitioned table is one partition.
+        """
+        if name not in self.partitioned:
+            return [{"key": "all", "start": None, "end": None, "rows": None,
+                     "signature": self.signature(name), "generation": None, "incremental": False}]
+        table = self.partitioned[name]
+        out = []
+        for key, info in table.partitions(start, end):
+            try:
+                stat = (table.directory / info["file"]).stat()
+                sig = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                sig = None
+            out.append(dict(info, key=key, signature=sig, incremental=not info["compressed"]))
+        return out
+
+    def read_partition(self, name, key, offset=0):
+        """Rows of one partition as (DataFrame, offset to resume from or None); see PartitionedCsv."""
+        if name not in self.partitioned:
+            return self.read(name), None
+        return self.partitioned[name].read_partition(key, offset)
+
+    def query(self, name, df, filters):
+        """Filter an already-loaded table; CSV has no indexes to push filters into."""
+        return filter_frame(df, filters)
+
+    def count(self, name, df, by, filters):
+        return count_frame(df, by, filters)
+
+
+class SqliteBackend:
+    """All tables in one SQLite database (WAL mode, indexed filter columns)."""
+
+    name = "sqlite"
+    indexed = True
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS _meta (name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def _exists(self, conn, name):
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+        ).fetchone()
+        return row is not None
+
+    def _columns(self, conn, name):
+        return [r[1] for r in conn.execute(f'PRAGMA table_info("{name}")')]
+
+    def _bump(self, conn, name):
+        conn.execute(
+            "INSERT INTO _meta (name, version) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            (name,),
+        )
+
+    def _create_indexes(self, conn, name):
+        cols = self._columns(conn, name)
+        for col in SQLITE_INDEXES.get(name, ()):
+            if col in cols:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{name}_{col}" ON "{name}" ("{col}")')
+
+    @staticmethod
+    def _to_sql_frame(df):
+        """Store timestamps as ISO text so they sort and compare correctly in SQL."""
+        out = df.copy()
+        for col in out.columns:
+            if pd.api.types.is_datetime64_any_dtype(out[col]):
+                out[col] = out[col].dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+            elif out[col].dtype == object:
+                out[col] = out[col].map(
+                    lambda v: v.strftime("%Y-%m-%d %H:%M:%S.%f") if hasattr(v, "strftime") else v
+                )
+        return out
+
+    def signature(self, name):
+        row = self._conn().execute("SELECT version FROM _meta WHERE name=?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def read(self, name):
+        conn = self._conn()
+        if not self._exists(conn, name):
+            return pd.DataFrame()
+        return pd.read_sql_query(f'SELECT * FROM "{name}"', conn)
+
+    def write(self, name, df):
+        conn = self._conn()
+        frame = self._to_sql_frame(df)
+        # version bump first: to_sql commits, so everything lands in one transaction
+        with conn:
+            self._bump(conn, name)
+            if self._exists(conn, name) and self._columns(conn, name) == list(frame.columns):
+                conn.execute(f'DELETE FROM "{name}"')
+                frame.to_sql(name, conn, if_exists="append", index=False)
+            else:
+                conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+                frame.to_sql(name, conn, if_exists="replace", index=False)
+                self._create_indexes(conn, name)
+
+    def write_rows(self, name, changes):
+        """
+        Apply row-level changes in one transaction: DELETE the removed keys, UPDATE the
+        changed rows, INSERT the new ones. Falls back to write() if the table is missing
+        or its columns differ from the frame's.
+        """
+        conn = self._conn()
+        if not self._exists(conn, name) or self._columns(conn, name) != list(changes.frame.columns):
+            return self.write(name, changes.frame)
+        key = changes.key
+        updated = self._to_sql_frame(changes.updated)
+        columns = [col for col in updated.columns if col != key]
+        with conn:
+            self._bump(conn, name)
+            deleted = [k.item() if hasattr(k, "item") else k for k in changes.deleted]
+            for start in range(0, len(deleted), SQLITE_CHUNK):
+                chunk = deleted[start:start + SQLITE_CHUNK]
+                conn.execute(f'DELETE FROM "{name}" WHERE "{key}" IN ({", ".join("?" * len(chunk))})', chunk)
+            if len(updated) and columns:
+                values = updated[columns + [key]].astype(object)
+                values = values.where(values.notna(), None)
+                assignments = ", ".join(f'"{col}" = ?' for col in columns)
+                conn.executemany(
+                    f'UPDATE "{name}" SET {assignments} WHERE "{key}" = ?',
+                    values.itertuples(index=False, name=None),
+                )
+            if len(changes.inserted):
+                self._to_sql_frame(changes.inserted).to_sql(name, conn, if_exists="append", index=False)
+
+    def append(self, name, new, fsync=False):
+        """Insert rows; returns them as read back from the database."""
+        conn = self._conn()
+        frame = self._to_sql_frame(new)
+        with conn:
+            self._bump(conn, name)
+            if not self._exists(conn, name):
+                frame.to_sql(name, conn, if_exists="replace", index=False)
+                self._create_indexes(conn, name)
+                return None
+            cols = self._columns(conn, name)
+            for col in frame.columns:
+                if col not in cols:
+                    conn.execute(f'ALTER TABLE "{name}" ADD COLUMN "{col}"')
+                    cols.append(col)
+            last = conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM "{name}"').fetchone()[0]
+            frame.to_sql(name, conn, if_exists="append", index=False)
+            added = pd.read_sql_query(f'SELECT * FROM "{name}" WHERE rowid > ?', conn, params=(last,))
+        if fsync:
+            conn.execute("PRAGMA wal_checkpoint(FULL)")
+        return added
+
+    def partitions(self, name, start=None, end=None):
+        """Monthly partitions of a timestamped table, answered from the timestamp index."""
+        conn = self._conn()
+        if not self._exists(conn, name):
+            return []
+        version = self.signature(name)
+        if "timestamp" not in self._columns(conn, name):
+            return [{"key": "all", "start": None, "end": None, "rows": None,
+                     "signature": version, "generation": version, "incremental": False}]
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m"))
+        if end is not None:
+            # whole months: up to the start of the month after `end`
+            clauses.append("timestamp < ?")
+            params.append((pd.Timestamp(end) + pd.offsets.MonthBegin(1)).strftime("%Y-%m"))
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        rows = conn.execute(
+            f'SELECT COALESCE(substr(timestamp, 1, 7), ?), MIN(timestamp), MAX(timestamp), COUNT(*) '
+            f'FROM "{name}"{where} GROUP BY 1 ORDER BY 1',
+            ["undated"] + params,
+        ).fetchall()
+        # every write bumps the table version, so partitions are re-read after any change
+        return [
+            {"key": key, "start": lo, "end": hi, "rows": n, "signature": (version, key),
+             "generation": version, "incremental": False}
+            for key, lo, hi, n in rows
+        ]
+
+    def read_partition(self, name, key, offset=0):
+        """Rows of one monthly partition (offset is ignored: partitions are re-read whole)."""
+        conn = self._conn()
+        if not self._exists(conn, name):
+            return pd.DataFrame(), None
+        if key == "all":
+            return self.read(name), None
+        if key == "undated":
+            return pd.read_sql_query(f'SELECT * FROM "{name}" WHERE timestamp IS NULL', conn), None
+        return pd.read_sql_query(
+            f'SELECT * FROM "{name}" WHERE timestamp >= ? AND timestamp < ?',
+            conn, params=(key, key + "-32"),
+        ), None
+
+    def _where(self, conn, name, filters):
+        clauses, params = [], []
+        for col, value in filters.items():
+            if value is None:
+                continue
+            if col in CASELESS:
+                # every stored spelling of the value (a scan of the column's index), then IN (...)
+                stored = [r[0] for r in conn.execute(f'SELECT DISTINCT "{col}" FROM "{name}"')]
+                matches = spellings(stored, value)
+                clauses.append(f'"{col}" IN ({", ".join("?" * len(matches))})' if matches else "0")
+                params.extend(matches)
+                continue
+            clauses.append(f'"{col}" = ?')
+            params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, name, df, filters):
+        """Run filters through the indexes; df is ignored (may be None)."""
+        conn = self._conn()
+        if not self._exists(conn, name):
+            return pd.DataFrame()
+        where, params = self._where(conn, name, filters)
+        return pd.read_sql_query(f'SELECT * FROM "{name}"{where}', conn, params=params)
+
+    def count(self, name, df, by, filters):
+        """GROUP BY `by` over the rows matching filters; df is ignored (may be None)."""
+        conn = self._conn()
+        if not self._exists(conn, name) or by not in self._columns(conn, name):
+            return pd.Series(dtype="int64")
+        where, params = self._where(conn, name, filters)
+        rows = conn.execute(
+            f'SELECT "{by}", COUNT(*) FROM "{name}"{where} GROUP BY "{by}"', params
+        ).fetchall()
+        counts = pd.Series({k: v for k, v in rows if k is not None}, dtype="int64", name="count")
+        return counts.sort_values(ascending=False)
+
+
+def migrate_csv_to_sqlite(paths, db_path, partitioned=None):
+    """One-shot copy of every CSV table into a SQLite database. Returns rows copied per table."""
+    src = CsvBackend(paths, partitioned)
+    dst = SqliteBackend(db_path)
+    copied = {}
+    for name in paths:
+        df = src.read(name)
+        if df.empty and not len(df.columns):
+            continue
+        dst.write(name, df)
+        copied[name] = len(df)
+    return copied
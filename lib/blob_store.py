@@ -0,0 +1,134 @@
+# lib/blob_store.py
+"""
+Content-addressed storage for uploaded files.
+
+A blob is stored once under the SHA-256 of its content
+(blobs/ab/abcdef....bin, or .gz when compressed). Uploads are read in
+fixed-size chunks and hashed incrementally; when the content is already
+stored, nothing is copied, so uploading the same file again costs one hash
+pass and a lookup. New content is written to a temporary file and renamed
+into place, so a blob is either complete or absent, and two sessions storing
+the same content at once simply write the same file twice.
+
+With compression enabled a blob is gzipped only if its first chunk shrinks
+noticeably; already-compressed formats (images, archives) are stored as is.
+"""
+import gzip
+import hashlib
+import itertools
+import os
+import tempfile
+import threading
+import zlib
+from lib.data_manager import BLOB_DIR, BLOB_COMPRESS
+
+CHUNK_SIZE = 1 << 20
+# store gzipped only if the first chunk compresses to less than this fraction
+COMPRESS_RATIO = 0.9
+
+
+class BlobStore:
+    """Blobs keyed by the hex SHA-256 of their content."""
+
+    def __init__(self, directory, compress=False, chunk_size=CHUNK_SIZE):
+        self.directory = directory
+        self.compress = compress
+        self.chunk_size = chunk_size
+
+    def _path(self, digest, compressed):
+        return self.directory / digest[:2] / (digest + (".gz" if compressed else ".bin"))
+
+    def locate(self, digest):
+        """Path of a stored blob, or None."""
+        for compressed in (False, True):
+            path = self._path(digest, compressed)
+            if path.exists():
+                return path
+        return None
+
+    def exists(self, digest):
+        return self.locate(digest) is not None
+
+    def _chunks(self, stream):
+        while True:
+            chunk = stream.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def _worth_compressing(self, chunk):
+        return self.compress and len(zlib.compress(chunk, 1)) < COMPRESS_RATIO * len(chunk)
+
+    def put(self, stream):
+        """
+        Store the content read from a binary stream. Returns (digest, size, stored_size, new):
+        new is False when identical content was already stored (nothing is written then).
+        """
+        if stream.seekable():
+            # hash first: known content is never copied
+            start = stream.tell()
+            hasher, size = hashlib.sha256(), 0
+            for chunk in self._chunks(stream):
+                hasher.update(chunk)
+                size += len(chunk)
+            digest = hasher.hexdigest()
+            existing = self.locate(digest)
+            if existing is not None:
+                return digest, size, existing.stat().st_size, False
+            stream.seek(start)
+        return self._write(stream)
+
+    def _write(self, stream):
+        """Copy the stream into a temp file while hashing it, then move it to its address."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        hasher, size = hashlib.sha256(), 0
+        chunks = self._chunks(stream)
+        first = next(chunks, b"")
+        compressed = self._worth_compressing(first)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as raw:
+                out = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) if compressed else raw
+                for chunk in itertools.chain([first], chunks):
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+                if compressed:
+                    out.close()
+                raw.flush()
+                os.fsync(raw.fileno())
+            digest = hasher.hexdigest()
+            existing = self.locate(digest)
+            if existing is not None:
+                return digest, size, existing.stat().st_size, False
+            path = self._path(digest, compressed)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, path)
+            return digest, size, path.stat().st_size, True
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def open(self, digest):
+        """A binary file object with the blob's original content."""
+        path = self.locate(digest)
+        if path is None:
+            raise FileNotFoundError(f"No blob {digest}")
+        return gzip.open(path, "rb") if path.suffix == ".gz" else open(path, "rb")
+
+    def read(self, digest):
+        with self.open(digest) as fh:
+            return fh.read()
+
+
+_BLOBS = None
+_BLOBS_LOCK = threading.Lock()
+
+
+def get_blob_store():
+    """Return the process-wide BlobStore for data/blobs, creating it on first use."""
+    global _BLOBS
+    with _BLOBS_LOCK:
+        if _BLOBS is None:
+            _BLOBS = BlobStore(BLOB_DIR, compress=BLOB_COMPRESS)
+        return _BLOBS
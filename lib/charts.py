@@ -0,0 +1,158 @@
+# lib/charts.py
+"""
+Rendered-chart cache for the dashboards.
+
+Charts are drawn on standalone matplotlib Figures (no pyplot global state),
+saved as PNG and closed right away, and the PNG bytes are cached per
+(chart, data version, parameters). Revisiting a page whose data has not
+changed serves the cached image without rendering. Render time is tracked
+against a per-page budget so slow charts show up.
+"""
+import io
+import threading
+import time
+from collections import OrderedDict
+from lib import perf
+
+# most recent rendered charts kept (PNG bytes, a few tens of KB each)
+MAX_ENTRIES = 64
+# render time a page may spend on charts before it is reported as over budget
+RENDER_BUDGET = 0.25
+DPI = 100
+
+_CACHE = OrderedDict()
+_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0, "render_seconds": 0.0, "over_budget": 0}
+
+
+def _figure(size):
+    # imported on first render so pages that never draw don't pay for matplotlib
+    from matplotlib.figure import Figure
+    return Figure(figsize=size, dpi=DPI)
+
+
+def _draw_bar(fig, labels, values, title, ylabel):
+    ax = fig.subplots()
+    bars = ax.bar(labels, values)
+    ax.set_title(title, fontsize=12, weight="bold")
+    ax.set_ylabel(ylabel)
+    ax.bar_label(bars, fmt="%d", label_type="edge", padding=3)
+
+
+def _draw_pie(fig, labels, values, title):
+    ax = fig.subplots()
+    ax.pie(
+        values,
+        labels=labels,
+        autopct=lambda p: f"{p:.1f}%" if p > 0 else "",
+        startangle=90,
+        pctdistance=0.8,
+        labeldistance=1.1,
+        wedgeprops={"edgecolor": "white"},
+        textprops={"fontsize": 10},
+    )
+    ax.set_title(title, fontsize=12, weight="bold")
+    ax.axis("equal")  # Equal aspect ratio ensures a perfect circle
+
+
+def _draw_barh(fig, labels, values, title, xlabel):
+    ax = fig.subplots()
+    bars = ax.barh(labels, values, color="skyblue")
+    ax.bar_label(bars, fmt="%.1f%%", padding=3)
+    ax.set_xlabel(xlabel)
+    ax.set_title(title, fontsize=12, weight="bold")
+    ax.invert_yaxis()
+
+
+def _draw_line(fig, labels, series, title, ylabel):
+    """series: ((name, values), ...), one line each over the shared x labels; None is a gap."""
+    ax = fig.subplots()
+    for name, values in series:
+        values = [float("nan") if v is None else v for v in values]
+        ax.plot(labels, values, label=name, marker="o" if len(labels) < 30 else None)
+    ax.set_title(title, fontsize=12, weight="bold")
+    ax.set_ylabel(ylabel)
+    ax.legend(loc="upper left", fontsize=9)
+    # at most ~12 tick labels however long the series
+    step = max(1, len(labels) // 12)
+    ax.set_xticks(range(0, len(labels), step), labels[::step], rotation=45, ha="right", fontsize=8)
+
+
+CHARTS = {"bar": _draw_bar, "pie": _draw_pie, "barh": _draw_barh, "line": _draw_line}
+
+
+def render(kind, version, size=(6, 4), budget=None, **params):
+    """
+    Return PNG bytes for a chart of `kind` ("bar", "pie", "barh", "line") drawn from params.
+    `version` is the version of the data the chart shows; params must be hashable
+    (tuples for labels/values). Cached per (kind, version, size, params).
+    Render time is added to `budget` (a RenderBudget) when given.
+    """
+    key = (kind, version, size, tuple(sorted(params.items())))
+    with _LOCK:
+        png = _CACHE.get(key)
+        if png is not None:
+            _CACHE.move_to_end(key)
+            _STATS["hits"] += 1
+    if png is not None:
+        if budget is not None:
+            budget.cached += 1
+        return png
+
+    start = time.perf_counter()
+    fig = _figure(size)
+    try:
+        CHARTS[kind](fig, **params)
+        fig.tight_layout()
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        png = buf.getvalue()
+    finally:
+        fig.clear()  # standalone Figure: nothing else references it once cleared
+    elapsed = time.perf_counter() - start
+    perf.record("charts.render", elapsed, kind=kind)
+
+    with _LOCK:
+        _STATS["misses"] += 1
+        _STATS["render_seconds"] += elapsed
+        _CACHE[key] = png
+        while len(_CACHE) > MAX_ENTRIES:
+            _CACHE.popitem(last=False)
+    if budget is not None:
+        budget.rendered += 1
+        budget.seconds += elapsed
+    return png
+
+
+class RenderBudget:
+    """Chart render time of one page run; pass it to render(..., budget=...)."""
+
+    def __init__(self, budget=RENDER_BUDGET):
+        self.budget = budget
+        self.seconds = 0.0
+        self.rendered = 0
+        self.cached = 0
+
+    @property
+    def over(self):
+        return self.seconds > self.budget
+
+    def report(self):
+        """Record the page run in the process-wide stats; returns a one-line summary."""
+        text = f"Charts: {self.rendered} rendered in {self.seconds * 1000:.0f} ms, {self.cached} from cache"
+        if self.over:
+            with _LOCK:
+                _STATS["over_budget"] += 1
+            text += f" (over the {self.budget * 1000:.0f} ms render budget)"
+        return text
+
+
+def stats():
+    """Process-wide cache counters: hits, misses, render_seconds, over_budget, entries."""
+    with _LOCK:
+        return dict(_STATS, entries=len(_CACHE))
+
+
+def clear():
+    with _LOCK:
+        _CACHE.clear()
@@ -0,0 +1,120 @@
+# lib/columnar.py
+"""
+Optional columnar snapshots of the CSV tables (Arrow IPC files).
+
+A snapshot holds the already-parsed table: timestamps as typed timestamp
+columns and low-cardinality text columns (status, priority, team, ...) as
+dictionary-encoded columns. Snapshots are read through a memory map, so
+loading a projection of a few columns only touches those columns' bytes.
+Dictionary-encoded columns come back as pandas categoricals; categorize() and
+concat() keep frames from the other load paths and appended rows in the same
+shape, so they stay categorical.
+
+Each snapshot records the signature of the CSV it was built from; a snapshot
+whose CSV changed since (edited, appended to) is ignored and rebuilt.
+Requires pyarrow; without it every function here is a no-op.
+"""
+import json
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pyarrow is optional
+    pa = None
+
+# low-cardinality columns stored dictionary-encoded, per table
+DICTIONARY_COLUMNS = {
+    "tasks": ("status", "priority", "team"),
+    "audit": ("action", "category"),
+    "comm": ("to",),
+}
+
+_SIG_KEY = b"taskpilot.source_signature"
+
+def available():
+    return pa is not None
+
+def _encode_sig(sig):
+    return json.dumps(sig).encode("utf-8")
+
+def categorize(name, df):
+    """Turn the table's DICTIONARY_COLUMNS into categoricals (with sorted categories), in place."""
+    for col in DICTIONARY_COLUMNS.get(name, ()):
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+def with_categories(column, values):
+    """A categorical column whose categories also hold `values` (the column itself if they do)."""
+    values = pd.Series(values).dropna()
+    missing = values[~values.isin(column.cat.categories)].unique()
+    if not len(missing):
+        return column
+    return column.cat.set_categories(sorted(set(column.cat.categories).union(missing), key=str))
+
+def concat(frames):
+    """
+    pd.concat(frames, ignore_index=True), keeping a column categorical when it is in the
+    first frame (pandas falls back to object unless every frame has the same categories).
+    """
+    first = frames[0]
+    cats = [col for col in first.columns if isinstance(first[col].dtype, pd.CategoricalDtype)]
+    if cats:
+        frames = [frame.copy(deep=False) for frame in frames]
+        for col in cats:
+            column = first[col]
+            for frame in frames[1:]:
+                if col in frame.columns:
+                    column = with_categories(column, frame[col])
+            for frame in frames:
+                if col in frame.columns:
+                    frame[col] = frame[col].astype(column.dtype)
+    return pd.concat(frames, ignore_index=True)
+
+def write_snapshot(path, name, df, source_sig):
+    """Write df as an Arrow IPC snapshot tagged with the source CSV signature. Returns True on success."""
+    if pa is None:
+        return False
+    try:
+        frame = categorize(name, df.copy(deep=False))
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        meta = dict(table.schema.metadata or {})
+        meta[_SIG_KEY] = _encode_sig(source_sig)
+        table = table.replace_schema_metadata(meta)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        # uncompressed so the file can be memory-mapped without decoding
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa_ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+        return True
+    except Exception as exc:
+        print("columnar snapshot error:", exc)
+        return False
+
+def read_snapshot(path, source_sig, columns=None):
+    """
+    Memory-map a snapshot and return it (or just `columns`) as a DataFrame.
+    Returns None if there is no snapshot, it is stale, or a column is missing.
+    """
+    if pa is None or not path.exists():
+        return None
+    try:
+        source = pa.memory_map(str(path), "r")
+        reader = pa_ipc.open_file(source)
+        meta = reader.schema.metadata or {}
+        if meta.get(_SIG_KEY) != _encode_sig(source_sig):
+            return None
+        table = reader.read_all()
+        if columns is not None:
+            if any(col not in table.column_names for col in columns):
+                return None
+            table = table.select(list(columns))
+        return table.to_pandas()
+    except Exception as exc:
+        print("columnar read error:", exc)
+        return None
@@ -1,9 +1,21 @@
 # lib/data_manager.py
+import atexit
+import io
+import os
+import threading
 import pandas as pd
 from pathlib import Path
-from datetime import datetime
+from lib import columnar, perf
+from lib.backends import (
+    CsvBackend, RowChanges, SqliteBackend, count_frame, filter_frame, migrate_csv_to_sqlite,
+)
+from lib.locking import file_lock
+from lib.partitions import PartitionedCsv
+from lib.sequences import SequenceAllocator
+from lib.writer import GroupCommitWriter
 
-DATA_DIR = Path(__file__).parents[1] / "data"
+# TASKPILOT_DATA_DIR points the app (or bench/) at another data directory
+DATA_DIR = Path(os.environ.get("TASKPILOT_DATA_DIR") or Path(__file__).parents[1] / "data")
 
 # CSV filenames
 USERS_CSV = DATA_DIR / "users.csv"
@@ -12,42 +24,427 @@ FILES_CSV = DATA_DIR / "files.csv"
 AUDIT_CSV = DATA_DIR / "audit.csv"
 COMM_CSV = DATA_DIR / "comm.csv"
 
-def _read_csv(path):
-    try:
-        # parse_dates=False (we parse explicitly later where needed)
-        return pd.read_csv(path)
-    except FileNotFoundError:
-        return pd.DataFrame()
+# SQLite database used when TASKPILOT_BACKEND=sqlite
+SQLITE_DB = DATA_DIR / "taskpilot.db"
 
-def get_dataframes():
-    """
-    Return users, tasks, files, audit, comm in that order.
-    Ensures the tasks DataFrame has required columns so pages can rely on their presence.
-    """
-    users = _read_csv(USERS_CSV)
-    tasks = _read_csv(TASKS_CSV)
-    files = _read_csv(FILES_CSV)
-    audit = _read_csv(AUDIT_CSV)
-    comm = _read_csv(COMM_CSV)
+# per-table lock files serializing writers across server processes
+LOCK_DIR = DATA_DIR / ".locks"
+
+# last id handed out per "<table>.<id column>" sequence
+SEQUENCES_FILE = DATA_DIR / "sequences.json"
+
+# Arrow snapshots of the CSV tables, used when TASKPILOT_COLUMNAR=1 and pyarrow is installed
+SNAPSHOT_DIR = DATA_DIR / ".columnar"
+COLUMNAR = os.environ.get("TASKPILOT_COLUMNAR", "") == "1"
+
+# The audit log is kept in monthly partitions (data/audit/audit-YYYY-MM.csv plus
+# manifest.json); an existing audit.csv is split into them on first use.
+# TASKPILOT_AUDIT_COMPRESS=1 gzips partitions once their month is over.
+AUDIT_DIR = DATA_DIR / "audit"
+AUDIT_COMPRESS = os.environ.get("TASKPILOT_AUDIT_COMPRESS", "") == "1"
+
+# Per-user settings, one JSON record per line (see lib.user_settings); the old
+# settings.json holds the app-wide settings they default to.
+USER_SETTINGS_FILE = DATA_DIR / "user_settings.jsonl"
+SETTINGS_FILE = DATA_DIR / "settings.json"
+
+# Uploaded file contents, stored once per distinct content (see lib.blob_store).
+# TASKPILOT_BLOB_COMPRESS=1 gzips blobs that compress well.
+BLOB_DIR = DATA_DIR / "blobs"
+BLOB_COMPRESS = os.environ.get("TASKPILOT_BLOB_COMPRESS", "") == "1"
+
+# Deadline notifications (see lib.deadlines): the events already handled, and the
+# digests delivered by the file outbox. TASKPILOT_OUTBOX=smtp://host:port mails them instead.
+DEADLINE_LEDGER = DATA_DIR / "deadline_events.jsonl"
+OUTBOX_FILE = DATA_DIR / "outbox.jsonl"
+OUTBOX = os.environ.get("TASKPILOT_OUTBOX", "file")
+
+# table name -> backing CSV file (a partition directory for audit), in the order
+# get_dataframes() returns them
+TABLES = {
+    "users": USERS_CSV,
+    "tasks": TASKS_CSV,
+    "files": FILES_CSV,
+    "audit": AUDIT_DIR,
+    "comm": COMM_CSV,
+}
+
+TASK_COLUMNS = [
+    "task_id", "title", "description", "assigned_to", "assigned_by",
+    "due_date", "status", "priority", "team", "created_date", "completion_date"
+]
+TASK_DATE_COLUMNS = ("due_date", "created_date", "completion_date")
+
+# Storage backend: "csv" (default, one file per table) or "sqlite"
+BACKEND = os.environ.get("TASKPILOT_BACKEND", "csv").lower()
+_BACKEND = None
+
+# Process-wide table cache shared by every session:
+#   name -> (version, DataFrame)
+# Versions are logical: bumped on every save/append accepted by this process and
+# whenever the storage is seen to change underneath us (another process or a
+# manual edit). The cache always holds the newest data, including saves the
+# background writer has not committed yet.
+_CACHE = {}
+_VERSIONS = {}
+_CACHE_LOCK = threading.RLock()
+
+# backend change stamp (file mtime/size for CSV, table version for SQLite) as of
+# our last read or commit; a different stamp means someone else wrote the table
+_SEEN = {}
+
+# tables whose cached frame must be dropped on next access: a commit of them failed (readers
+# go back to storage while the writer retries) or a retry finally landed (re-read it)
+_DIRTY = set()
+
+# Rows appended via append_rows() since the cached frame was built:
+#   name -> [DataFrame, ...], folded into the cache on the next read
+_PENDING = {}
+
+# Column projections read from snapshots: (name, columns) -> (version, DataFrame)
+_PROJECTIONS = {}
+
+# fsync after every append_rows() call unless the caller says otherwise
+FSYNC_APPENDS = False
+
+# Seconds the background writer waits to group saves into one commit per table;
+# 0 commits synchronously inside the caller (handy for scripts).
+COMMIT_INTERVAL = float(os.environ.get("TASKPILOT_COMMIT_INTERVAL", "0.2"))
+
+def get_backend():
+    """Return the storage backend selected by BACKEND (created on first use)."""
+    global _BACKEND
+    if _BACKEND is None:
+        if BACKEND == "sqlite":
+            _BACKEND = SqliteBackend(SQLITE_DB)
+        else:
+            _BACKEND = CsvBackend(TABLES, _partitioned())
+    return _BACKEND
+
+def _partitioned():
+    """Time-partitioned CSV tables, for CsvBackend."""
+    return {
+        "audit": PartitionedCsv(
+            AUDIT_DIR, "timestamp", compress=AUDIT_COMPRESS, legacy=AUDIT_CSV, lock_dir=LOCK_DIR,
+        ),
+    }
 
+def set_backend(backend):
+    """Swap the storage backend ("csv", "sqlite" or a backend instance) and drop cached tables."""
+    global _BACKEND, BACKEND
+    if isinstance(backend, str):
+        BACKEND = backend.lower()
+        _BACKEND = None
+    else:
+        BACKEND = backend.name
+        _BACKEND = backend
+    invalidate_cache()
+    return get_backend()
+
+def migrate_to_sqlite(db_path=None):
+    """One-shot migration of the CSV files in data/ into SQLite. Returns rows copied per table."""
+    return migrate_csv_to_sqlite(TABLES, Path(db_path) if db_path else SQLITE_DB, _partitioned())
+
+def _normalize_tasks(tasks):
+    """Ensure the tasks DataFrame has required columns and parsed date columns."""
     # Normalize tasks columns (add missing columns with sensible defaults)
-    expected = [
-        "task_id", "title", "description", "assigned_to", "assigned_by",
-        "due_date", "status", "priority", "team", "created_date", "completion_date"
-    ]
-    for col in expected:
+    for col in TASK_COLUMNS:
         if col not in tasks.columns:
             tasks[col] = pd.NA
 
     # Convert common date columns to datetime if present and not already
-    for date_col in ("due_date", "created_date", "completion_date"):
+    for date_col in TASK_DATE_COLUMNS:
         if date_col in tasks.columns:
             try:
-                tasks[date_col] = pd.to_datetime(tasks[date_col], errors="coerce")
+                # fixed unit: pandas may infer seconds for mostly-empty columns
+                tasks[date_col] = pd.to_datetime(tasks[date_col], errors="coerce").astype("datetime64[ns]")
             except Exception:
                 tasks[date_col] = pd.NaT
+    return tasks
+
+def _normalize(name, df):
+    """Bring a freshly read table into the shape pages expect (parsed timestamps etc.)."""
+    with perf.span("data.parse_dates", table=name):
+        if name == "tasks":
+            return _normalize_tasks(df)
+        if "timestamp" in df.columns:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", format="mixed")
+        return df
+
+def _use_snapshots():
+    return COLUMNAR and columnar.available() and not get_backend().indexed
+
+def _snapshot_path(name):
+    return SNAPSHOT_DIR / f"{name}.arrow"
+
+def _commit(name, ops):
+    """Writer callback: apply coalesced ops for one table to storage, under the table's file lock."""
+    backend = get_backend()
+    try:
+        _commit_ops(backend, name, ops)
+    except Exception:
+        # the cache holds data storage doesn't: stop serving it (no lock here, see _version)
+        _DIRTY.add(name)
+        raise
+    if _WRITER.failed(name) is not None:
+        _DIRTY.add(name)  # a retry landed: storage now has what readers were missing
+
+def _commit_ops(backend, name, ops):
+    if not backend.indexed:
+        # a file is rewritten whole anyway: only the last save (and appends after it) matter
+        ops = [("write", frame.frame, fsync) if kind == "rows" else (kind, frame, fsync) for kind, frame, fsync in ops]
+        last = max((i for i, op in enumerate(ops) if op[0] == "write"), default=0)
+        ops = ops[last:]
+    with perf.span("data.commit", table=name), file_lock(LOCK_DIR / f"{name}.lock"):
+        for kind, frame, fsync in ops:
+            if kind == "rows":
+                perf.count("rows_written", len(frame.inserted) + len(frame.updated) + len(frame.deleted),
+                           table=name)
+                backend.write_rows(name, frame)
+                continue
+            perf.count("rows_written", len(frame), table=name)
+            if kind == "write":
+                backend.write(name, frame)
+                if _use_snapshots():
+                    columnar.write_snapshot(
+                        _snapshot_path(name), name, _normalize(name, frame.copy()), backend.signature(name)
+                    )
+            else:
+                backend.append(name, frame, fsync=fsync)
+        # the writer still reports this table busy, so readers won't mistake our
+        # own write for an external one before this is recorded
+        _SEEN[name] = backend.signature(name)
+
+_WRITER = GroupCommitWriter(_commit, interval=COMMIT_INTERVAL)
+
+def flush(timeout=None):
+    """
+    Block until every queued save/append has been committed to storage. Returns False on
+    timeout or when a commit failed (the writer keeps retrying it).
+    """
+    return _WRITER.flush(timeout)
 
-    return users, tasks, files, audit, comm
+atexit.register(flush)
+
+def _version(name):
+    """Current logical version of a table (caller holds _CACHE_LOCK)."""
+    if name in _DIRTY:
+        _DIRTY.discard(name)
+        _VERSIONS[name] = _VERSIONS.get(name, 0) + 1
+        _CACHE.pop(name, None)
+        _PENDING.pop(name, None)
+    if not _WRITER.busy(name):
+        stamp = get_backend().signature(name)
+        if name in _SEEN and _SEEN[name] != stamp:
+            # changed underneath us: new version, cached copies are stale
+            _VERSIONS[name] = _VERSIONS.get(name, 0) + 1
+            _CACHE.pop(name, None)
+            _PENDING.pop(name, None)
+        _SEEN[name] = stamp
+    return _VERSIONS.get(name, 0)
+
+def _load(name):
+    """Return the cached DataFrame for a table, re-reading only if the storage changed."""
+    while True:
+        with _CACHE_LOCK:
+            ver = _version(name)
+            entry = _CACHE.get(name)
+            if entry is not None and entry[0] == ver:
+                pending = _PENDING.pop(name, None)
+                if pending:
+                    df = columnar.concat([entry[1]] + pending)
+                    _CACHE[name] = (ver, df)
+                    return df
+                return entry[1]
+            # while a failed commit is retried, storage is all there is to read
+            if not _WRITER.busy(name) or _WRITER.failed(name) is not None:
+                _PENDING.pop(name, None)
+                stamp = _SEEN.get(name)
+                df = None
+                if _use_snapshots():
+                    df = columnar.read_snapshot(_snapshot_path(name), stamp)
+                if df is None:
+                    with perf.span("data.read", table=name):
+                        df = _normalize(name, get_backend().read(name))
+                    if _use_snapshots():
+                        # the same dtypes a snapshot load gives
+                        columnar.write_snapshot(_snapshot_path(name), name, columnar.categorize(name, df), stamp)
+                perf.count("rows_read", len(df), table=name)
+                _CACHE[name] = (ver, df)
+                return df
+        # storage is behind memory and nothing is cached: let the writer catch up first
+        flush()
+
+def _project(name, columns):
+    """
+    Return a frame holding only `columns` of a table (those that exist), without copying
+    when possible: from the cached full table if it is current, otherwise from a
+    memory-mapped snapshot projection, falling back to loading the full table.
+    """
+    columns = list(dict.fromkeys(columns))
+    if _use_snapshots():
+        with _CACHE_LOCK:
+            ver = _version(name)
+            entry = _CACHE.get(name)
+            if (entry is None or entry[0] != ver) and not _WRITER.busy(name):
+                key = (name, tuple(columns))
+                proj = _PROJECTIONS.get(key)
+                if proj is not None and proj[0] == ver:
+                    return proj[1]
+                df = columnar.read_snapshot(_snapshot_path(name), _SEEN.get(name), columns)
+                if df is not None:
+                    for stale in [k for k in _PROJECTIONS if k[0] == name and _PROJECTIONS[k][0] != ver]:
+                        del _PROJECTIONS[stale]
+                    _PROJECTIONS[key] = (ver, df)
+                    return df
+    full = _load(name)
+    return full[[col for col in columns if col in full.columns]]
+
+@perf.timed("data.load_columns")
+def load_columns(name, columns):
+    """Return a copy of just the given columns of a table (reads only those bytes from a snapshot)."""
+    if name not in TABLES:
+        raise KeyError(f"Unknown table: {name}")
+    return _project(name, columns).copy()
+
+def table_version(name):
+    """
+    Return the table's current version. Keep it alongside a loaded copy and pass it
+    back to save_table()/quick_save() to detect that someone else saved in between.
+    """
+    with _CACHE_LOCK:
+        return _version(name)
+
+@perf.timed("data.load_table")
+def load_table(name):
+    """
+    Return a single table by name ("users", "tasks", "files", "audit", "comm").
+    The parse is shared process-wide; callers get their own copy to modify.
+    """
+    if name not in TABLES:
+        raise KeyError(f"Unknown table: {name}")
+    return _load(name).copy()
+
+@perf.timed("data.read_table")
+def read_table(name):
+    """
+    Return the shared, process-wide frame for a table without copying it.
+    Treat it as read-only: every session sees the same object. Use load_table()
+    for a private copy to modify.
+    """
+    if name not in TABLES:
+        raise KeyError(f"Unknown table: {name}")
+    return _load(name)
+
+def snapshot(name):
+    """Return (version, shared read-only frame) for a table, taken atomically."""
+    with _CACHE_LOCK:
+        df = read_table(name)
+        return _version(name), df
+
+def _settled(name):
+    # partition reads go to storage: let queued writes for the table land first
+    if _WRITER.busy(name):
+        flush()
+
+def _range_end(end):
+    """Inclusive upper bound for a range query: a plain date includes that whole day."""
+    if end is None:
+        return None
+    stop = pd.Timestamp(end)
+    if stop == stop.normalize():
+        stop += pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+    return stop
+
+def table_partitions(name, start=None, end=None):
+    """
+    Time partitions of a table overlapping [start, end], oldest first: dicts with key,
+    start, end, rows, signature (changes whenever the partition does), generation
+    (changes on rewrites, not appends) and incremental (rows can be read from an offset).
+    """
+    if name not in TABLES:
+        raise KeyError(f"Unknown table: {name}")
+    _settled(name)
+    return get_backend().partitions(name, start, _range_end(end))
+
+@perf.timed("data.read_partition")
+def read_partition(name, key, offset=0):
+    """
+    Rows of one partition, parsed like load_table(), as (DataFrame, resume offset).
+    Pass the offset back (for an incremental partition) to read only rows appended since.
+    """
+    _settled(name)
+    df, end = get_backend().read_partition(name, key, offset)
+    perf.count("rows_read", len(df), table=name)
+    return _normalize(name, df), end
+
+@perf.timed("data.read_range")
+def read_range(name, start=None, end=None):
+    """Rows of a partitioned table within [start, end], reading only the overlapping partitions."""
+    frames = [read_partition(name, part["key"])[0] for part in table_partitions(name, start, end)]
+    frames = [f for f in frames if len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if "timestamp" in df.columns and (start is not None or end is not None):
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df["timestamp"] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= df["timestamp"] <= _range_end(end)
+        df = df[mask].reset_index(drop=True)
+    return df
+
+def load_tables(*names):
+    """Return the requested tables as a tuple, in the order given."""
+    return tuple(load_table(name) for name in names)
+
+def invalidate_cache(*names):
+    """Drop cached tables (all of them if no names are given). Queued writes are flushed first."""
+    flush()
+    with _CACHE_LOCK:
+        for name in names or list(_CACHE):
+            _CACHE.pop(name, None)
+            _PENDING.pop(name, None)
+        for key in list(_PROJECTIONS):
+            if not names or key[0] in names:
+                _PROJECTIONS.pop(key, None)
+
+@perf.timed("data.get_dataframes")
+def get_dataframes():
+    """
+    Return users, tasks, files, audit, comm in that order.
+    Ensures the tasks DataFrame has required columns so pages can rely on their presence.
+    Prefer load_table()/load_tables() in pages that only need some of them.
+    """
+    return load_tables(*TABLES)
+
+@perf.timed("data.query_tasks")
+def query_tasks(assigned_to=None, team=None, status=None):
+    """
+    Return the tasks matching every given equality filter (None = don't filter).
+    With the SQLite backend the filters run against indexes and only matching rows
+    are read; with CSV they filter the cached table.
+    """
+    backend = get_backend()
+    filters = {"assigned_to": assigned_to, "team": team, "status": status}
+    if backend.indexed and not _WRITER.busy("tasks"):
+        return _normalize("tasks", backend.query("tasks", None, filters))
+    return filter_frame(_load("tasks"), filters).copy()
+
+@perf.timed("data.task_counts")
+def task_counts(by="status", assigned_to=None, team=None, status=None):
+    """
+    Return a Series of task counts grouped by column `by`, for the given filters, largest
+    first. Reads only the columns involved: an indexed GROUP BY with SQLite, otherwise a
+    projection of the cached table or of its columnar snapshot.
+    """
+    backend = get_backend()
+    filters = {"assigned_to": assigned_to, "team": team, "status": status}
+    if backend.indexed and not _WRITER.busy("tasks"):
+        return backend.count("tasks", None, by, filters)
+    needed = [by] + [col for col, value in filters.items() if value is not None]
+    return count_frame(_project("tasks", needed), by, filters)
 
 def get_next_id(df, id_col):
     """Return next integer id for the specified column (1 if missing)."""
@@ -59,23 +456,128 @@ def get_next_id(df, id_col):
     except Exception:
         return 1
 
-def quick_save(users=None, tasks=None, files=None, audit=None, comm=None):
+def _seed_sequence(key):
+    """Highest id currently in use for a "<table>.<column>" sequence (one-off scan)."""
+    name, id_col = key.split(".", 1)
+    return get_next_id(_load(name), id_col) - 1
+
+_SEQUENCES = SequenceAllocator(SEQUENCES_FILE, LOCK_DIR / "sequences.lock", _seed_sequence)
+
+# "<table>.<id column>" sequences the app allocates from (seeded by prepare())
+SEQUENCES = ("tasks.task_id", "audit.log_id", "comm.msg_id")
+
+@perf.timed("data.prepare")
+def prepare():
+    """
+    One-off start-up work that would otherwise land on the first user action: split a
+    legacy audit.csv into partitions and seed every id sequence not seeded yet (each a
+    scan of its table). Safe to run in several processes at once.
+    """
+    backend = get_backend()
+    for name in TABLES:
+        backend.signature(name)  # a partitioned table migrates on first use
+    for key in SEQUENCES:
+        _SEQUENCES.ensure(key)
+
+def next_id(name, id_col):
+    """Allocate the next integer id for a table's id column (constant time, unique across sessions)."""
+    return _SEQUENCES.next(f"{name}.{id_col}")
+
+def reserve_ids(name, id_col, count):
+    """Allocate `count` consecutive ids for a bulk insert; returns them as a range."""
+    return _SEQUENCES.reserve(f"{name}.{id_col}", count)
+
+def _as_stored(name, new):
+    """Return rows typed the way a re-read of the table would type them."""
+    return _normalize(name, pd.read_csv(io.StringIO(new.to_csv(index=False))))
+
+@perf.timed("data.append_rows")
+def append_rows(name, rows, fsync=None):
+    """
+    Append one row (dict) or many rows (list of dicts / DataFrame) to a table.
+    Only the new rows are serialized and written; the header is written once when
+    the file is new. Columns follow the existing header; unknown columns trigger a
+    one-off full rewrite so the file stays rectangular.
+    The rows are visible to readers immediately and committed by the background writer.
+    Returns True on success, False on failure.
+    """
+    if isinstance(rows, dict):
+        rows = [rows]
+    new = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    if new.empty:
+        return True
+    fsync = FSYNC_APPENDS if fsync is None else fsync
+    try:
+        with _CACHE_LOCK:
+            ver = _version(name)
+            entry = _CACHE.get(name)
+            _VERSIONS[name] = ver + 1
+            # keep the cached table current without re-reading it
+            if entry is not None and entry[0] == ver:
+                _PENDING.setdefault(name, []).append(_as_stored(name, new))
+                _CACHE[name] = (ver + 1, entry[1])
+            else:
+                _CACHE.pop(name, None)
+                _PENDING.pop(name, None)
+            _WRITER.submit(name, "append", new, fsync)
+        return True
+    except Exception as exc:
+        print("append_rows error:", exc)
+        return False
+
+@perf.timed("data.save_table")
+def save_table(name, df, expected_version=None, adopt=False, changes=None):
+    """
+    Replace a table with df. If expected_version is given and the table has moved on
+    since (another session saved first), nothing is written and None is returned.
+    Returns the table's new version. The write itself is queued for the background
+    writer, which commits it atomically (temp file + rename).
+    adopt=True publishes df itself as the shared frame instead of a normalized copy;
+    the caller must already hold it in normalized form and never modify it again.
+    changes=(key column, rows before, rows after) says df differs from the current table
+    only in those rows; the SQLite backend then writes just them instead of every row.
+    """
+    with _CACHE_LOCK:
+        ver = _version(name)
+        if expected_version is not None and expected_version != ver:
+            print(f"save conflict: {name} is at version {ver}, caller had {expected_version}")
+            return None
+        ver += 1
+        _VERSIONS[name] = ver
+        shared = df if adopt else _normalize(name, df.copy())
+        if _use_snapshots() and not adopt:
+            columnar.categorize(name, shared)
+        _CACHE[name] = (ver, shared)
+        _PENDING.pop(name, None)
+        if changes is not None:
+            _WRITER.submit(name, "rows", RowChanges.between(shared, *changes))
+        else:
+            _WRITER.submit(name, "write", shared)
+        return ver
+
+@perf.timed("data.quick_save")
+def quick_save(users=None, tasks=None, files=None, audit=None, comm=None, expected=None):
     """
-    Save provided DataFrames back to CSV. Only writes the DataFrames passed (None = skip).
+    Save provided DataFrames to the storage backend. Only writes the DataFrames passed (None = skip).
+    expected: optional {table: version} from table_version(); if any of those tables changed
+    since, nothing is saved.
     Returns True on success, False on failure.
     """
+    frames = {"users": users, "tasks": tasks, "files": files, "audit": audit, "comm": comm}
+    frames = {name: df for name, df in frames.items() if df is not None}
+    expected = expected or {}
     try:
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        if users is not None:
-            users.to_csv(USERS_CSV, index=False)
-        if tasks is not None:
-            tasks.to_csv(TASKS_CSV, index=False)
-        if files is not None:
-            files.to_csv(FILES_CSV, index=False)
-        if audit is not None:
-            audit.to_csv(AUDIT_CSV, index=False)
-        if comm is not None:
-            comm.to_csv(COMM_CSV, index=False)
+        with _CACHE_LOCK:
+            stale = [name for name in frames if name in expected and expected[name] != _version(name)]
+            if stale:
+                print("quick_save conflict:", ", ".join(stale), "changed since loaded")
+                return False
+            failing = [name for name in frames if _WRITER.failed(name) is not None]
+            if failing:
+                print("quick_save error: storage is failing for", ", ".join(failing))
+                return False
+            for name, df in frames.items():
+                save_table(name, df)
         return True
     except Exception as exc:
         print("quick_save error:", exc)
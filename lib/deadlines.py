@@ -0,0 +1,321 @@
+# lib/deadlines.py
+"""
+Due-date tracking and deadline notifications.
+
+Open tasks with a due date are kept in a heap of upcoming events ordered by
+when they fire: "due_soon" SOON_DAYS before the due day and "overdue" the day
+after it (the same day-level rule the reports use). The heap follows the
+TaskStore: each write re-enters only the changed tasks, and a completed,
+deleted or reassigned task's old entries are skipped when they surface (lazy
+deletion) instead of being searched for. Finding what fired is a pop per
+event, however many tasks there are.
+
+Fired events wait in a per-user queue and are delivered as one digest per
+user every DIGEST_SECONDS, through the outbox: a JSON lines file by default,
+or an SMTP server (TASKPILOT_OUTBOX=smtp://localhost:1025, e.g. a local
+debugging server). Users without email_notifications in their settings get
+nothing, but their events are still marked handled. Handled events are
+appended to a ledger so a restart (or a second server process) never sends
+them again. The background scheduler runs the engine.
+"""
+import heapq
+import json
+import logging
+import os
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from urllib.parse import urlsplit
+import pandas as pd
+from lib import perf
+from lib.data_manager import DEADLINE_LEDGER, LOCK_DIR, OUTBOX, OUTBOX_FILE
+from lib.locking import file_lock
+from lib.task_store import get_task_store
+from lib.user_directory import get_user_directory
+from lib.user_settings import get_user_settings
+
+DUE_SOON = "due_soon"
+OVERDUE = "overdue"
+# days before the due day that the due-soon event fires
+SOON_DAYS = 1
+# seconds between digests (events are collected in between)
+DIGEST_SECONDS = 300
+# granularity of the time check done by the scheduler
+POLL_SECONDS = 60
+# tasks listed per section of a digest; the rest are counted
+DIGEST_LINES = 50
+MAIL_FROM = os.environ.get("TASKPILOT_MAIL_FROM", "taskpilot@localhost")
+# addresses for users without an email column: <username>@MAIL_DOMAIN
+MAIL_DOMAIN = os.environ.get("TASKPILOT_MAIL_DOMAIN", "localhost")
+DAY = pd.Timedelta(days=1).value
+# what a failed delivery can raise: I/O and network errors, SMTP errors (a refused
+# recipient, ...) and ValueError for a message that cannot be built (a malformed address)
+SEND_ERRORS = (OSError, smtplib.SMTPException, ValueError)
+
+log = logging.getLogger(__name__)
+
+
+def _open_tasks(rows):
+    """(task_id, due day in ns, assignee, title) of the open tasks with a due date among rows."""
+    if rows is None or rows.empty or "due_date" not in rows.columns:
+        return []
+    due = pd.to_datetime(rows["due_date"], errors="coerce")
+    keep = due.notna() & (rows["status"] != "Complete") & rows["assigned_to"].notna()
+    days = due[keep].dt.normalize().astype("datetime64[ns]").astype("int64")
+    sub = rows[keep]
+    return list(zip(sub["task_id"].astype("int64").tolist(), days.tolist(),
+                    sub["assigned_to"].tolist(), sub["title"].tolist()))
+
+
+def _events(task_id, due, assignee):
+    """Heap entries (fire time, task_id, kind, due, assignee) of one task."""
+    return [(due - SOON_DAYS * DAY, task_id, DUE_SOON, due, assignee),
+            (due + DAY, task_id, OVERDUE, due, assignee)]
+
+
+class FileOutbox:
+    """Digests appended to a JSON lines file, one message per line."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, message):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(message) + "\n")
+
+
+class SmtpOutbox:
+    """Digests mailed through an SMTP server (no auth or TLS: meant for a local relay)."""
+
+    def __init__(self, host, port=25, sender=MAIL_FROM, timeout=10):
+        self.host, self.port, self.sender, self.timeout = host, port, sender, timeout
+
+    def send(self, message):
+        mail = EmailMessage()
+        mail["From"] = self.sender
+        mail["To"] = message["to"]
+        mail["Subject"] = message["subject"]
+        mail.set_content(message["body"])
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(mail)
+
+
+def make_outbox(spec=OUTBOX):
+    """The outbox for a TASKPILOT_OUTBOX value: "file" or "smtp://host[:port]"."""
+    if spec == "file":
+        return FileOutbox(OUTBOX_FILE)
+    url = urlsplit(spec)
+    if url.scheme == "smtp" and url.hostname:
+        return SmtpOutbox(url.hostname, url.port or 25)
+    raise ValueError(f"Unknown outbox {spec!r}: use 'file' or 'smtp://host:port'")
+
+
+def digest(username, address, events):
+    """The message for one user's batch of events."""
+    overdue = [e for e in events if e["kind"] == OVERDUE]
+    soon = [e for e in events if e["kind"] == DUE_SOON]
+    parts = []
+    for title, group in (("Overdue", overdue), ("Due soon", soon)):
+        if group:
+            parts.append(f"{title}:")
+            parts += [f"  - [{e['task_id']}] {e['title']} (due {e['due']})" for e in group[:DIGEST_LINES]]
+            if len(group) > DIGEST_LINES:
+                parts.append(f"  ... and {len(group) - DIGEST_LINES} more")
+    counts = ", ".join(f"{len(g)} {label}" for label, g in (("overdue", overdue), ("due soon", soon)) if g)
+    return {
+        "to": address,
+        "username": username,
+        "subject": f"TaskPilot: {counts}",
+        "body": f"Hi {username},\n\n" + "\n".join(parts) + "\n",
+        "events": events,
+        "sent_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+    }
+
+
+class DeadlineEngine:
+    """Upcoming due-soon/overdue events of the open tasks, kept in step with a TaskStore."""
+
+    def __init__(self, store=None, outbox=None, ledger=DEADLINE_LEDGER, digest_every=DIGEST_SECONDS):
+        self._lock = threading.Lock()
+        self._heap = []       # (fire time ns, task_id, kind, due ns, assignee)
+        self._tasks = {}      # task_id -> (due ns, assignee, title) of open tasks with a due date
+        self._pending = {}    # username -> [event dicts] waiting for the next digest
+        self._queued = set()  # (task_id, kind, due) in _pending
+        self._done = set()    # (task_id, kind, due) handled, from the ledger
+        self._offset = 0      # bytes of the ledger read so far
+        self.ledger = ledger
+        self.lock_path = LOCK_DIR / f"{ledger.name}.lock"
+        self.outbox = outbox if outbox is not None else make_outbox()
+        self.digest_every = digest_every
+        self._last_digest = time.monotonic()
+        self.store = store if store is not None else get_task_store()
+        self._read_ledger()
+        self.store.subscribe(self._on_change)
+
+    # --- keeping the heap in step with the store ---
+
+    def _on_change(self, version, df, before, after):
+        with self._lock:
+            if before is None:
+                self._rebuild(_open_tasks(df))
+                return
+            for task_id in before["task_id"].astype("int64").tolist():
+                self._tasks.pop(task_id, None)  # its heap entries go stale
+            for task_id, due, assignee, title in _open_tasks(after):
+                self._tasks[task_id] = (due, assignee, title)
+                for entry in _events(task_id, due, assignee):
+                    heapq.heappush(self._heap, entry)
+            if len(self._heap) > 4 * len(self._tasks) + 1000:
+                self._rebuild([(tid, *task) for tid, task in self._tasks.items()])
+
+    def _rebuild(self, tasks):
+        self._tasks = {task_id: (due, assignee, title) for task_id, due, assignee, title in tasks}
+        self._heap = [
+            entry
+            for task_id, (due, assignee, _) in self._tasks.items()
+            for entry in _events(task_id, due, assignee)
+            if (task_id, entry[2], due) not in self._done
+        ]
+        heapq.heapify(self._heap)
+
+    def _current(self, task_id, due, assignee):
+        task = self._tasks.get(task_id)
+        return task is not None and task[0] == due and task[1] == assignee
+
+    # --- firing and delivering ---
+
+    def poll(self, now=None):
+        """Queue every event whose time has come; returns how many were queued."""
+        now = pd.Timestamp(now if now is not None else pd.Timestamp.now()).value
+        fired = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, task_id, kind, due, assignee = heapq.heappop(self._heap)
+                key = (task_id, kind, due)
+                if not self._current(task_id, due, assignee) or key in self._done or key in self._queued:
+                    continue  # completed, deleted, reassigned or re-dated since; or already handled
+                if kind == DUE_SOON and now >= due + DAY:
+                    continue  # already overdue: the overdue event says it all
+                self._pending.setdefault(assignee, []).append({
+                    "task_id": task_id,
+                    "kind": kind,
+                    "title": self._tasks[task_id][2],
+                    "due": pd.Timestamp(due).date().isoformat(),
+                    "due_ns": due,
+                })
+                self._queued.add(key)
+                fired += 1
+        return fired
+
+    def pending(self, username=None):
+        """Events waiting for the next digest (for one user, or all as {user: events})."""
+        with self._lock:
+            if username is not None:
+                return list(self._pending.get(username, ()))
+            return {user: list(events) for user, events in self._pending.items()}
+
+    def deliver(self, force=False):
+        """Send each user's digest if DIGEST_SECONDS have passed (or force); returns digests sent."""
+        if not force and time.monotonic() - self._last_digest < self.digest_every:
+            return 0
+        self._last_digest = time.monotonic()
+        settings, directory = get_user_settings(), get_user_directory()
+        sent = 0
+        with file_lock(self.lock_path):
+            self._read_ledger()  # events another process handled meanwhile
+            with self._lock:
+                batches = {}
+                for user, events in self._pending.items():
+                    events = [e for e in events
+                              if (e["task_id"], e["kind"], e["due_ns"]) not in self._done
+                              and self._current(e["task_id"], e["due_ns"], user)]
+                    if events:
+                        batches[user] = events
+                self._pending, self._queued = {}, set()
+            handled, unsent = [], dict(batches)
+            try:
+                for user, events in batches.items():
+                    wanted = bool(settings.get(user)["email_notifications"])
+                    if wanted:
+                        record = directory.get(user) or {}
+                        try:
+                            self.outbox.send(digest(user, record.get("email") or f"{user}@{MAIL_DOMAIN}", events))
+                        except SEND_ERRORS as exc:
+                            log.warning("deadline digest for %s not delivered: %s", user, exc)
+                            perf.count("digest_errors")
+                            continue  # stays unsent: queued again for the next digest
+                        sent += 1
+                    del unsent[user]
+                    handled += [{"user": user, "sent": wanted, **e} for e in events]
+            finally:
+                # whatever happened, nothing taken from the queue is lost
+                for user, events in unsent.items():
+                    self._requeue(user, events)
+                self._append_ledger(handled)
+        perf.count("digests_sent", sent)
+        return sent
+
+    def _requeue(self, user, events):
+        with self._lock:
+            self._pending.setdefault(user, []).extend(events)
+            self._queued.update((e["task_id"], e["kind"], e["due_ns"]) for e in events)
+
+    def run(self):
+        """One scheduler round: fire what is due, deliver digests when it is time."""
+        fired = self.poll()
+        return {"fired": fired, "digests": self.deliver()}
+
+    def version(self):
+        """Changes with the tasks and every POLL_SECONDS (the scheduler reruns the engine then)."""
+        return self.store.view()[0], int(time.time() // POLL_SECONDS)
+
+    # --- ledger ---
+
+    def _read_ledger(self):
+        """Pick up handled events appended since the last read (caller holds the file lock or is in __init__)."""
+        try:
+            size = self.ledger.stat().st_size
+        except FileNotFoundError:
+            return
+        if size < self._offset:  # replaced: read it again
+            self._offset, self._done = 0, set()
+        if size == self._offset:
+            return
+        with open(self.ledger, "rb") as fh:
+            fh.seek(self._offset)
+            data = fh.read()
+        data = data[:data.rfind(b"\n") + 1]  # whole lines only
+        with self._lock:
+            for line in data.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._done.add((record["task_id"], record["kind"], record["due_ns"]))
+        self._offset += len(data)
+
+    def _append_ledger(self, records):
+        if not records:
+            return
+        self.ledger.parent.mkdir(parents=True, exist_ok=True)
+        data = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+        with open(self.ledger, "ab") as fh:
+            fh.write(data)
+        with self._lock:
+            self._done.update((r["task_id"], r["kind"], r["due_ns"]) for r in records)
+        self._offset += len(data)
+
+
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_deadline_engine():
+    """Return the process-wide DeadlineEngine, creating it on first use."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = DeadlineEngine()
+        return _ENGINE
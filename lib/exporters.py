@@ -0,0 +1,186 @@
+# lib/exporters.py
+"""
+Chunked exporters for report downloads: CSV, gzip-compressed CSV, Parquet
+and Excel.
+
+Rows are serialized a batch at a time into a SpooledTemporaryFile, which
+stays in memory for small exports and moves to a temporary file on disk once
+it grows past SPOOL_MAX_BYTES, so writing an export never holds the whole
+text rendering of the table next to the table itself. download() hands the
+finished file to st.download_button's data callable as a file object (a
+reader over the temporary file once it spilled to disk). Streamlit reads it
+when the button is clicked and keeps the contents in its media storage while
+the file is served, so a download is still held in memory once. Parquet needs
+pyarrow and Excel needs openpyxl; formats whose library is missing are not
+offered.
+
+estimate() sizes an export by writing a sample of the rows in the target
+format and scaling by the row count, so pages can show the size up front and
+check it with download_limit() before offering the download.
+"""
+import gzip
+import io
+import os
+import tempfile
+from importlib.util import find_spec
+
+# optional libraries: looked up here, imported by the writer that needs them so
+# pages offering a download don't pay for them until something is exported
+HAS_PYARROW = find_spec("pyarrow") is not None
+HAS_OPENPYXL = find_spec("openpyxl") is not None
+
+# rows serialized per batch
+BATCH_ROWS = 50_000
+# exports larger than this spill from memory to a temporary file
+SPOOL_MAX_BYTES = 8 * 2**20
+# downloads estimated above this are refused (the file is held in memory to be sent)
+DOWNLOAD_MAX_BYTES = 256 * 2**20
+# rows written to measure bytes per row for estimate()
+SAMPLE_ROWS = 1_000
+# Excel's sheet limit, header included
+XLSX_MAX_ROWS = 1_048_576
+
+
+def batches(df, size=BATCH_ROWS):
+    """Consecutive row slices of df (views, not copies)."""
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+
+def _write_csv(df, fh):
+    text = io.TextIOWrapper(fh, encoding="utf-8", newline="", write_through=True)
+    for i, batch in enumerate(batches(df)):
+        batch.to_csv(text, index=False, header=i == 0)
+    if len(df) == 0:
+        df.head(0).to_csv(text, index=False)
+    text.detach()  # leave the underlying file open
+
+
+def _write_csv_gz(df, fh):
+    with gzip.GzipFile(fileobj=fh, mode="wb", compresslevel=6, mtime=0) as gz:
+        _write_csv(df, gz)
+
+
+def _arrow_batch(batch, schema):
+    import pyarrow as pa
+    table = pa.Table.from_pandas(batch, preserve_index=False)
+    if schema is not None and table.schema != schema:
+        table = table.cast(schema)  # e.g. an all-null column in one batch
+    return table
+
+
+def _write_parquet(df, fh):
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for batch in batches(df) if len(df) else [df]:
+            table = _arrow_batch(batch, writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(fh, table.schema, compression="snappy")
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _cell(value):
+    # openpyxl takes plain Python values; missing values become empty cells
+    if value is None or value != value:
+        return None
+    if hasattr(value, "to_pydatetime"):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, "item") else value
+
+
+def _write_xlsx(df, fh):
+    if len(df) >= XLSX_MAX_ROWS:
+        raise ValueError(f"{len(df):,} rows do not fit in one Excel sheet; export as CSV instead")
+    from openpyxl import Workbook
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet("Export")
+    sheet.append([str(col) for col in df.columns])
+    for batch in batches(df):
+        for row in batch.itertuples(index=False, name=None):
+            sheet.append([_cell(value) for value in row])
+    book.save(fh)
+
+
+# label -> (writer, file extension, MIME type, available)
+FORMATS = {
+    "CSV": (_write_csv, "csv", "text/csv", True),
+    "CSV (gzip)": (_write_csv_gz, "csv.gz", "application/gzip", True),
+    "Parquet": (_write_parquet, "parquet", "application/vnd.apache.parquet", HAS_PYARROW),
+    "Excel": (
+        _write_xlsx, "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        HAS_OPENPYXL,
+    ),
+}
+
+
+def formats():
+    """Labels of the formats available in this install."""
+    return [label for label, spec in FORMATS.items() if spec[3]]
+
+
+def file_name(stem, fmt):
+    return f"{stem}.{FORMATS[fmt][1]}"
+
+
+def mime(fmt):
+    return FORMATS[fmt][2]
+
+
+def export(df, fmt="CSV"):
+    """Write df in `fmt` batch by batch; returns the spooled file, rewound to the start."""
+    writer, _, _, available = FORMATS[fmt]
+    if not available:
+        raise ValueError(f"{fmt} export needs an optional library that is not installed")
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        writer(df, spool)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def download(df, fmt="CSV"):
+    """
+    The export as a download button's data: the contents while the spool is still in
+    memory, otherwise a reader of its temporary file.
+    """
+    with export(df, fmt) as spool:
+        if spool.seek(0, io.SEEK_END) <= SPOOL_MAX_BYTES:
+            spool.seek(0)
+            return spool.read()
+        # a descriptor of our own: the temporary file lives until the reader is closed
+        return os.fdopen(os.dup(spool.fileno()), "rb")
+
+
+def estimate(df, fmt="CSV"):
+    """(rows, approximate bytes) of exporting df in `fmt`, measured on a sample of rows."""
+    rows = len(df)
+    if rows == 0:
+        return 0, 0
+    sample = df.iloc[:: max(1, rows // SAMPLE_ROWS)][:SAMPLE_ROWS]
+    with export(sample, fmt) as spool:
+        size = spool.seek(0, io.SEEK_END)
+    return rows, int(size * rows / len(sample))
+
+
+def download_limit(size):
+    """(allowed, message) for a download of about `size` bytes: a warning above SPOOL_MAX_BYTES."""
+    if size > DOWNLOAD_MAX_BYTES:
+        return False, (f"About {human_size(size)}: too large to download "
+                       f"(limit {human_size(DOWNLOAD_MAX_BYTES)}). Narrow the filters or pick a compressed format.")
+    if size > SPOOL_MAX_BYTES:
+        return True, f"About {human_size(size)}: the file is held in the server's memory while it is sent."
+    return True, None
+
+
+def human_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
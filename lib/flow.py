@@ -0,0 +1,257 @@
+# lib/flow.py
+"""
+Flow metrics over the task history: throughput, lead time and overdue rates.
+
+Tasks are bucketed per (day, team, assigned_to) with vectorized datetime
+flooring; the team is its team_key(), so every spelling of a team shares its
+buckets and results show the team under its most common spelling. Each bucket holds:
+    created       tasks created that day
+    completed     tasks completed that day (throughput)
+    late          of those, completed after their due date
+    lead_seconds  summed created -> completion time of those completions
+    open_due      tasks still open whose due date is that day
+Bucket counts are additive, so a TaskStore write only adds the changed rows'
+contributions (minus what they contributed before) to a small delta table,
+which is folded into the base table once it grows. Queries filter the
+buckets, never the tasks, so they stay fast on millions of tasks; the table
+is rebuilt whenever the store reloads the tasks wholesale.
+"""
+import threading
+from collections import Counter
+from datetime import date
+import numpy as np
+import pandas as pd
+from lib.backends import display_spelling, team_key
+from lib.task_store import get_task_store
+
+KEYS = ["day", "team", "assigned_to"]
+FIELDS = ["created", "completed", "late", "lead_seconds", "open_due"]
+# a bucket whose counts are all zero is empty (its lead_seconds is only rounding left over)
+COUNTS = ["created", "completed", "late", "open_due"]
+# delta buckets kept before they are folded into the base table
+COMPACT_AT = 5_000
+FREQUENCIES = {"Daily": "D", "Weekly": "W-MON", "Monthly": "MS"}
+
+
+def _empty():
+    frame = pd.DataFrame({col: pd.Series(dtype="float64") for col in FIELDS})
+    frame.index = pd.MultiIndex.from_arrays(
+        [pd.DatetimeIndex([], dtype="datetime64[ns]"), pd.Index([], dtype=object), pd.Index([], dtype=object)],
+        names=KEYS,
+    )
+    return frame
+
+
+def contributions(rows):
+    """Per-(day, team, assigned_to) bucket counts contributed by a set of task rows."""
+    if rows is None or rows.empty:
+        return _empty()
+    # plain numpy arrays: keeps the per-write path cheap for a handful of rows
+    created = _datetimes(rows["created_date"])
+    due = _datetimes(rows["due_date"]).astype("datetime64[D]")
+    done_at = _datetimes(rows["completion_date"])
+    team = _team_keys(rows["team"])
+    who = rows["assigned_to"].to_numpy(dtype=object, na_value="")
+    done = ~np.isnat(done_at)
+    is_open = (rows["status"].to_numpy(dtype=object, na_value="") != "Complete") & ~np.isnat(due)
+    has_created = ~np.isnat(created)
+    done_day = done_at.astype("datetime64[D]")
+    zeros = np.zeros(len(rows))
+
+    def part(mask, days, **values):
+        n = int(mask.sum())
+        cols = {"day": days[mask].astype("datetime64[ns]"), "team": team[mask], "assigned_to": who[mask]}
+        for field in FIELDS:
+            cols[field] = values[field][mask] if field in values else np.zeros(n)
+        return pd.DataFrame(cols)
+
+    lead = (done_at - created).astype("timedelta64[ns]").astype("int64") / 1e9
+    out = pd.concat([
+        part(has_created, created.astype("datetime64[D]"), created=zeros + 1),
+        part(done, done_day, completed=zeros + 1, late=(done_day > due).astype("float64"),
+             lead_seconds=np.where(has_created, lead, 0.0)),
+        part(is_open, due, open_due=zeros + 1),
+    ], ignore_index=True)
+    return out.groupby(KEYS, sort=False)[FIELDS].sum()
+
+
+def _team_keys(column):
+    """team_key() of every value, computed once per distinct value."""
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    keys = np.array([team_key(v) for v in uniques] + [""], dtype=object)
+    return keys[codes]
+
+
+def _spellings(rows):
+    """Counter of team spellings (stripped) among task rows."""
+    if rows is None or rows.empty:
+        return Counter()
+    teams = rows["team"].dropna().astype(str).str.strip()
+    return Counter(teams.value_counts().to_dict())
+
+
+def _datetimes(column):
+    return pd.to_datetime(column, errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+
+class FlowStats:
+    """Daily flow buckets kept in step with a TaskStore."""
+
+    def __init__(self, store=None):
+        self._lock = threading.Lock()
+        self._base = _empty()
+        self._delta = {}  # (day, team, assigned_to) -> FIELDS values, not yet in _base
+        self._spellings = Counter()  # team spelling -> tasks, for display names
+        self.version = None
+        self.store = store if store is not None else get_task_store()
+        self.store.subscribe(self._on_change)
+
+    def _on_change(self, version, df, before, after):
+        with self._lock:
+            if before is None:
+                self._base = contributions(df)
+                self._delta = {}
+                self._spellings = _spellings(df)
+            else:
+                self._spellings.subtract(_spellings(before))
+                self._spellings.update(_spellings(after))
+                for sign, rows in ((-1.0, before), (1.0, after)):
+                    changes = contributions(rows)
+                    for key, values in zip(changes.index, changes.to_numpy()):
+                        current = self._delta.get(key)
+                        self._delta[key] = sign * values if current is None else current + sign * values
+                if len(self._delta) > COMPACT_AT:
+                    self._compact()
+            self.version = version
+
+    def _delta_frame(self):
+        if not self._delta:
+            return _empty()
+        index = pd.MultiIndex.from_tuples(list(self._delta), names=KEYS)
+        return pd.DataFrame(np.vstack(list(self._delta.values())), index=index, columns=FIELDS)
+
+    def _compact(self):
+        merged = self._base.add(self._delta_frame(), fill_value=0.0)
+        self._base = merged[(merged[COUNTS] != 0).any(axis=1)]
+        self._delta = {}
+
+    def rebuild(self):
+        """Recompute every bucket from the store's current table."""
+        version, df = self.store.view()
+        with self._lock:
+            self._base = contributions(df)
+            self._delta = {}
+            self._spellings = _spellings(df)
+            self.version = version
+
+    def _names(self):
+        """team key -> its most common spelling (caller holds the lock)."""
+        spelled = {}
+        for spelling, count in self._spellings.items():
+            spelled.setdefault(team_key(spelling), Counter())[spelling] = count
+        names = {key: display_spelling(counts) for key, counts in spelled.items()}
+        return {key: name for key, name in names.items() if name is not None}
+
+    def buckets(self, team=None, assigned_to=None, start=None, end=None):
+        """Bucket rows (day, team, assigned_to + FIELDS) for the given filters; any spelling of a team matches."""
+        self.store.view()  # picks up saves made outside the store
+        with self._lock:
+            parts = [self._base, self._delta_frame()]
+            names = self._names()
+        if team is not None:
+            team = team_key(team)
+        out = []
+        for part in parts:
+            if part.empty:
+                continue
+            mask = np.ones(len(part), dtype=bool)
+            if team is not None:
+                mask &= part.index.get_level_values("team") == team
+            if assigned_to is not None:
+                mask &= part.index.get_level_values("assigned_to") == assigned_to
+            days = part.index.get_level_values("day")
+            if start is not None:
+                mask &= days >= pd.Timestamp(start)
+            if end is not None:
+                mask &= days <= pd.Timestamp(end)
+            out.append(part[mask])
+        if not out:
+            return _empty().reset_index()
+        out = pd.concat(out)
+        if not parts[1].empty:
+            # a delta bucket adds to its base bucket, and may cancel it out
+            out = out.groupby(level=KEYS, sort=False, dropna=False).sum()
+            out = out[(out[COUNTS] != 0).any(axis=1)]
+        out = out.reset_index()
+        out["team"] = out["team"].map(names).fillna(out["team"])
+        return out
+
+    def series(self, freq="D", team=None, assigned_to=None, start=None, end=None, window=7):
+        """
+        Flow metrics per period (freq: pandas offset alias, e.g. "D", "W-MON", "MS"):
+        created, throughput, lead_time_days (mean), late_rate, plus rolling means of
+        throughput and lead time over `window` periods.
+        """
+        rows = self.buckets(team, assigned_to, start, end)
+        columns = ["created", "throughput", "lead_time_days", "late_rate",
+                   "throughput_rolling", "lead_time_rolling"]
+        rows = rows[rows["day"].notna()]
+        if rows.empty:
+            return pd.DataFrame(columns=columns)
+        daily = rows.groupby("day")[FIELDS].sum()
+        daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq="D"), fill_value=0.0)
+        per = daily.resample(freq).sum() if freq != "D" else daily
+        out = pd.DataFrame(index=per.index)
+        out["created"] = per["created"]
+        out["throughput"] = per["completed"]
+        completed = per["completed"].where(per["completed"] > 0)
+        out["lead_time_days"] = per["lead_seconds"] / completed / 86_400
+        out["late_rate"] = per["late"] / completed
+        out["throughput_rolling"] = out["throughput"].rolling(window, min_periods=1).mean()
+        # completion-weighted rolling lead time
+        out["lead_time_rolling"] = (
+            per["lead_seconds"].rolling(window, min_periods=1).sum()
+            / per["completed"].rolling(window, min_periods=1).sum().where(lambda s: s > 0)
+            / 86_400
+        )
+        return out
+
+    def breakdown(self, by="team", start=None, end=None, today=None):
+        """Per team or assignee: throughput, mean lead time, late rate and open tasks overdue today."""
+        rows = self.buckets()
+        today = pd.Timestamp(today or date.today())
+        in_range = rows["day"].notna()
+        if start is not None:
+            in_range &= rows["day"] >= pd.Timestamp(start)
+        if end is not None:
+            in_range &= rows["day"] <= pd.Timestamp(end)
+        flow = rows[in_range].groupby(by)[["completed", "late", "lead_seconds"]].sum()
+        overdue = rows[rows["day"] < today].groupby(by)["open_due"].sum()
+        out = pd.DataFrame(index=flow.index.union(overdue.index))
+        out["throughput"] = flow["completed"].reindex(out.index).fillna(0).astype("int64")
+        completed = flow["completed"].reindex(out.index).where(lambda s: s > 0)
+        out["lead_time_days"] = (flow["lead_seconds"].reindex(out.index) / completed / 86_400).round(1)
+        out["late_rate"] = (flow["late"].reindex(out.index) / completed).round(3)
+        out["overdue_now"] = overdue.reindex(out.index).fillna(0).astype("int64")
+        return out.sort_values("throughput", ascending=False)
+
+    def overdue(self, team=None, assigned_to=None, today=None):
+        """(open tasks past due today, open tasks with a due date, overdue rate)."""
+        rows = self.buckets(team, assigned_to)
+        today = pd.Timestamp(today or date.today())
+        open_total = int(rows["open_due"].sum())
+        overdue = int(rows.loc[rows["day"] < today, "open_due"].sum())
+        return overdue, open_total, (overdue / open_total if open_total else 0.0)
+
+
+_FLOW = None
+_FLOW_LOCK = threading.Lock()
+
+
+def get_flow():
+    """Return the process-wide FlowStats, creating it on first use."""
+    global _FLOW
+    with _FLOW_LOCK:
+        if _FLOW is None:
+            _FLOW = FlowStats()
+        return _FLOW
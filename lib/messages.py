@@ -0,0 +1,156 @@
+# lib/messages.py
+"""
+Message feed over the comm table, indexed by recipient and msg_id.
+
+Each recipient ("to", compared case-insensitively; "All" is a recipient like
+any other) and each sender maps to the positions of their messages ordered by
+msg_id, so a user's feed — messages to them or to All, plus the ones they
+sent — is a merge of three small arrays instead of a sort of the whole table,
+and "new since the last msg_id I saw" is a binary search.
+
+The index follows the shared comm frame from lib.data_manager: when new
+messages were appended only those rows are indexed; any other change (a
+rewrite, or a save from another process) rebuilds it.
+"""
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from lib.data_manager import snapshot, table_version, append_rows, next_id
+
+EVERYONE = "all"
+COLUMNS = ["msg_id", "timestamp", "user", "to", "message"]
+
+
+def _key(name):
+    return str(name).strip().casefold()
+
+
+def _empty():
+    return np.empty(0, dtype="int64")
+
+
+class MessageStore:
+    """The comm table plus recipient/sender -> positions indexes, ordered by msg_id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self._df = pd.DataFrame(columns=COLUMNS)
+        self._ids = _empty()
+        self._to = {}    # recipient key -> positions sorted by msg_id
+        self._from = {}  # sender key -> positions sorted by msg_id
+        self.sync()
+
+    def sync(self):
+        """Catch up with the shared comm table (cheap when nothing changed)."""
+        if table_version("comm") == self.version:
+            return
+        with self._lock:
+            version, df = snapshot("comm")
+            if version == self.version:
+                return
+            if df is None or "msg_id" not in df.columns:
+                df = pd.DataFrame(columns=COLUMNS)
+            old = len(self._ids)
+            appended = (
+                0 < old < len(df)
+                and isinstance(df.index, pd.RangeIndex) and df.index.start == 0
+                and int(self._ids[-1]) == _msg_id(df["msg_id"].iloc[old - 1])
+            )
+            if appended:
+                self._index(df, old)
+            else:
+                self._ids = _empty()
+                self._to, self._from = {}, {}
+                self._index(df.reset_index(drop=True), 0)
+            self._df = df if appended else df.reset_index(drop=True)
+            self.version = version
+
+    def _index(self, df, first):
+        """Index rows first.. of df (earlier rows are already indexed)."""
+        rows = df.iloc[first:]
+        ids = pd.to_numeric(rows["msg_id"], errors="coerce").fillna(-1).to_numpy(dtype="int64")
+        self._ids = np.concatenate([self._ids, ids])
+        positions = np.arange(first, first + len(rows))
+        for index, column in ((self._to, "to"), (self._from, "user")):
+            keys = rows[column].fillna("").map(_key).to_numpy(dtype=object)
+            for key in pd.unique(keys):
+                added = positions[keys == key]
+                current = index.get(key, _empty())
+                ids = self._ids[added]
+                merged = np.concatenate([current, added])
+                # msg_ids are allocated in order but may be appended slightly out of it
+                if np.any(ids[1:] < ids[:-1]) or (len(current) and ids[0] < self._ids[current[-1]]):
+                    merged = merged[np.argsort(self._ids[merged], kind="stable")]
+                index[key] = merged
+
+    def _positions(self, username, include_sent):
+        """Positions of a user's feed, ordered by msg_id."""
+        parts = [self._to.get(_key(username), _empty()), self._to.get(EVERYONE, _empty())]
+        if include_sent:
+            parts.append(self._from.get(_key(username), _empty()))
+        positions = np.unique(np.concatenate(parts))
+        return positions[np.argsort(self._ids[positions], kind="stable")]
+
+    def feed(self, username, since_id=None, limit=50, include_sent=True):
+        """
+        Messages to `username` or to All (and, with include_sent, from them) with
+        msg_id > since_id, newest first, at most `limit` of them.
+        """
+        self.sync()
+        with self._lock:
+            positions = self._positions(username, include_sent)
+            if since_id is not None:
+                positions = positions[np.searchsorted(self._ids[positions], since_id, "right"):]
+            if limit is not None:
+                positions = positions[-limit:] if limit else positions[:0]
+            return self._df.iloc[positions[::-1]]
+
+    def latest_id(self, username, include_sent=True):
+        """Highest msg_id in the user's feed, or 0 if it is empty."""
+        self.sync()
+        with self._lock:
+            positions = self._positions(username, include_sent)
+            return int(self._ids[positions[-1]]) if len(positions) else 0
+
+    def unread(self, username, since_id):
+        """Number of messages to the user (or All) with msg_id > since_id, not counting their own."""
+        self.sync()
+        with self._lock:
+            positions = self._positions(username, False)
+            mine = self._from.get(_key(username), _empty())
+            fresh = positions[np.searchsorted(self._ids[positions], since_id or 0, "right"):]
+            return int(len(fresh) - np.isin(fresh, mine).sum())
+
+    def send(self, sender, to, message, timestamp=None):
+        """Append a message; returns its msg_id, or None if it could not be saved."""
+        msg_id = next_id("comm", "msg_id")
+        row = {
+            "msg_id": msg_id,
+            "timestamp": timestamp or datetime.now(),
+            "user": sender,
+            "to": to.strip() or "All",
+            "message": message,
+        }
+        return msg_id if append_rows("comm", row) else None
+
+
+def _msg_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+_MESSAGES = None
+_MESSAGES_LOCK = threading.Lock()
+
+
+def get_message_store():
+    """Return the process-wide MessageStore, creating it on first use."""
+    global _MESSAGES
+    with _MESSAGES_LOCK:
+        if _MESSAGES is None:
+            _MESSAGES = MessageStore()
+        return _MESSAGES
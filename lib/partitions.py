@@ -0,0 +1,273 @@
+# lib/partitions.py
+"""
+Time-partitioned CSV tables (used for the audit log).
+
+Rows are stored one file per calendar month of a timestamp column
+(audit-2025-11.csv, ...) next to a small manifest.json recording each
+partition's file, row count, first/last timestamp and whether it is
+gzip-compressed. Appends go to the month each row belongs to; when a new
+month starts the previous newest partition is closed and, if compression is
+enabled, gzipped. Range reads consult the manifest and open only the
+partitions overlapping the range.
+
+A table that still lives in a single legacy CSV is split into partitions the
+first time it is used; the legacy file is left in place but no longer read.
+"""
+import gzip
+import io
+import json
+import os
+import threading
+import pandas as pd
+from lib import perf
+from lib.locking import file_lock
+
+UNDATED = "undated"  # partition for rows whose timestamp does not parse
+MANIFEST_VERSION = 1
+
+
+def _month_keys(column):
+    stamps = pd.to_datetime(column, errors="coerce", format="mixed")
+    return stamps, stamps.dt.strftime("%Y-%m").fillna(UNDATED)
+
+
+def _iso(value):
+    return None if pd.isna(value) else pd.Timestamp(value).isoformat()
+
+
+def _overlaps(info, start, end):
+    if info["start"] is None:  # undated rows only show up in unbounded reads
+        return start is None and end is None
+    if start is not None and pd.Timestamp(info["end"]) < pd.Timestamp(start):
+        return False
+    if end is not None and pd.Timestamp(info["start"]) > pd.Timestamp(end):
+        return False
+    return True
+
+
+class PartitionedCsv:
+    """A table stored as monthly CSV partitions plus a JSON manifest."""
+
+    def __init__(self, directory, column="timestamp", prefix=None, compress=False, legacy=None, lock_dir=None):
+        self.directory = directory
+        self.lock_dir = lock_dir or directory.parent / ".locks"
+        self.column = column
+        self.prefix = prefix or directory.name
+        self.compress = compress
+        self.legacy = legacy
+        self.manifest_path = directory / "manifest.json"
+        self._lock = threading.Lock()
+        self._cached = (None, None)  # (manifest signature, parsed manifest)
+
+    # --- manifest ---
+
+    def signature(self):
+        """Change stamp of the whole table: every write or append rewrites the manifest."""
+        self._ensure()
+        try:
+            info = self.manifest_path.stat()
+            return (info.st_mtime_ns, info.st_size)
+        except FileNotFoundError:
+            return None
+
+    def manifest(self):
+        """The parsed manifest: {"columns": [...], "partitions": {key: info}}."""
+        self._ensure()
+        sig = None
+        try:
+            info = self.manifest_path.stat()
+            sig = (info.st_mtime_ns, info.st_size)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            if sig is not None and self._cached[0] == sig:
+                return self._cached[1]
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            manifest = {"version": MANIFEST_VERSION, "columns": None, "partitions": {}}
+        with self._lock:
+            self._cached = (sig, manifest)
+        return manifest
+
+    def _write_manifest(self, manifest):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_name(f".{self.manifest_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    def _ensure(self):
+        """One-off migration of the legacy single-file table into partitions."""
+        if self.manifest_path.exists() or self.legacy is None or not self.legacy.exists():
+            return
+        with file_lock(self.lock_dir / f"{self.prefix}.migrate.lock"):
+            if not self.manifest_path.exists():
+                self.write(pd.read_csv(self.legacy), migrated_from=self.legacy.name)
+
+    def _path(self, info):
+        return self.directory / info["file"]
+
+    def _file_name(self, key, compressed):
+        return f"{self.prefix}-{key}.csv" + (".gz" if compressed else "")
+
+    # --- reads ---
+
+    def partitions(self, start=None, end=None):
+        """[(key, info), ...] oldest first, limited to partitions overlapping [start, end]."""
+        parts = self.manifest()["partitions"]
+        keys = sorted(parts, key=lambda k: (k != UNDATED, k))
+        return [(k, parts[k]) for k in keys if _overlaps(parts[k], start, end)]
+
+    def read_partition(self, key, offset=0):
+        """
+        Rows of one partition as (DataFrame, end offset). The offset is the byte position
+        after the last complete row read (None for compressed partitions); pass it back to
+        parse only the rows appended to an uncompressed partition since.
+        """
+        manifest = self.manifest()
+        info = manifest["partitions"].get(key)
+        empty = pd.DataFrame(columns=manifest["columns"] or [])
+        if info is None:
+            return empty, None
+        path = self._path(info)
+        try:
+            if info["compressed"]:
+                return pd.read_csv(path), None
+            with open(path, "rb") as fh:
+                fh.seek(offset)
+                data = fh.read()
+        except FileNotFoundError:
+            return empty, None
+        # stop after the last complete line: an append may be in progress
+        data = data[: data.rfind(b"\n") + 1]
+        end = offset + len(data)
+        if offset:
+            data = (",".join(manifest["columns"]) + "\n").encode("utf-8") + data
+        if not data.strip():
+            return empty, end
+        return pd.read_csv(io.BytesIO(data)), end
+
+    def read(self, start=None, end=None):
+        """All rows of the partitions overlapping [start, end] (whole partitions, not trimmed)."""
+        frames = [self.read_partition(key)[0] for key, _ in self.partitions(start, end)]
+        frames = [f for f in frames if len(f.columns)]
+        if not frames:
+            columns = self.manifest()["columns"]
+            return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    # --- writes ---
+
+    def _write_file(self, path, text, compressed):
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            opener = gzip.open if compressed else open
+            with opener(tmp, "wt", encoding="utf-8", newline="") as fh:
+                fh.write(text)
+            perf.count("bytes_written", tmp.stat().st_size, table=self.prefix)
+            with open(tmp, "rb+") as fh:
+                os.fsync(fh.fileno())
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    def _info(self, key, stamps, rows, compressed, generation):
+        return {
+            "file": self._file_name(key, compressed),
+            "rows": int(rows),
+            "start": _iso(stamps.min()),
+            "end": _iso(stamps.max()),
+            "compressed": compressed,
+            "generation": generation,
+        }
+
+    def write(self, df, migrated_from=None):
+        """Replace the whole table: repartition df, rewrite every partition and the manifest."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        df = df.reset_index(drop=True)
+        old = self.manifest()["partitions"] if self.manifest_path.exists() else {}
+        manifest = {"version": MANIFEST_VERSION, "columns": list(df.columns), "partitions": {}}
+        if migrated_from:
+            manifest["migrated_from"] = migrated_from
+        if self.column in df.columns and len(df):
+            stamps, keys = _month_keys(df[self.column])
+            dated = sorted(k for k in keys.unique() if k != UNDATED)
+            newest = dated[-1] if dated else None
+            for key, rows in df.groupby(keys.to_numpy(), sort=False):
+                compressed = self.compress and key not in (newest, UNDATED)
+                generation = old.get(key, {}).get("generation", 0) + 1
+                info = self._info(key, stamps[rows.index], len(rows), compressed, generation)
+                self._write_file(self._path(info), rows.to_csv(index=False), compressed)
+                manifest["partitions"][key] = info
+        kept = {info["file"] for info in manifest["partitions"].values()}
+        self._write_manifest(manifest)
+        for info in old.values():
+            if info["file"] not in kept:
+                self._path(info).unlink(missing_ok=True)
+
+    def _close(self, manifest, key):
+        """Compress a partition that will receive no more appends in the normal course."""
+        info = manifest["partitions"][key]
+        if info["compressed"] or key == UNDATED:
+            return
+        path = self._path(info)
+        text = path.read_text(encoding="utf-8")
+        info.update(compressed=True, file=self._file_name(key, True), generation=info["generation"] + 1)
+        self._write_file(self._path(info), text, True)
+        path.unlink(missing_ok=True)
+
+    def append(self, new, fsync=False):
+        """
+        Append rows to the partitions of their months, rotating to a new partition when a
+        new month starts. Returns the rows as a re-read would parse them, or None when the
+        whole table had to be rewritten (new columns).
+        """
+        manifest = self.manifest()
+        columns = manifest["columns"]
+        if columns is not None and not set(new.columns) <= set(columns):
+            self.write(pd.concat([self.read(), new], ignore_index=True))
+            return None
+        if columns is None:
+            columns = list(new.columns)
+        new = new.reindex(columns=columns).reset_index(drop=True)
+        manifest = json.loads(json.dumps(manifest))  # private copy: the parsed one is cached
+        manifest["columns"] = columns
+        parts = manifest["partitions"]
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        stamps, keys = _month_keys(new[self.column]) if self.column in new.columns else (
+            pd.Series(pd.NaT, index=new.index), pd.Series(UNDATED, index=new.index))
+        newest = max((k for k in parts if k != UNDATED), default=None)
+        texts = []
+        for key in sorted(keys.unique(), key=lambda k: (k != UNDATED, k)):
+            rows = new[(keys == key).to_numpy()]
+            if key not in parts and key != UNDATED and newest is not None and key > newest:
+                # rotation: a new month started, the previous newest partition is closed
+                if self.compress:
+                    self._close(manifest, newest)
+                newest = key
+            info = parts.get(key)
+            text = rows.to_csv(index=False, header=False)
+            if info is None:
+                info = self._info(key, stamps[rows.index], 0, False, 1)
+                parts[key] = info
+                text = rows.to_csv(index=False)
+            path = self._path(info)
+            opener = gzip.open if info["compressed"] else open
+            # a compressed partition takes late rows as an extra gzip member
+            size = path.stat().st_size if path.exists() else 0
+            with opener(path, "at", encoding="utf-8", newline="") as fh:
+                fh.write(text)
+                fh.flush()
+                if fsync:
+                    os.fsync(fh.fileno())
+            perf.count("bytes_written", path.stat().st_size - size, table=self.prefix)
+            span = pd.Series([pd.Timestamp(info["start"]) if info["start"] else pd.NaT,
+                              pd.Timestamp(info["end"]) if info["end"] else pd.NaT])
+            span = pd.concat([span, stamps[rows.index]])
+            info.update(rows=info["rows"] + len(rows),
+                        start=_iso(span.min()), end=_iso(span.max()))
+            texts.append(rows.to_csv(index=False, header=False))
+        self._write_manifest(manifest)
+        return pd.read_csv(io.StringIO(",".join(columns) + "\n" + "".join(texts)))
@@ -0,0 +1,217 @@
+# lib/perf.py
+"""
+Lightweight timing spans and counters for the hot paths.
+
+    with perf.span("data.read", table="tasks"):
+        ...
+    @perf.timed("page.Home")
+    def show_home(): ...
+    perf.count("rows_read", len(df), table="tasks")
+
+Spans are aggregated per (name, labels) into a latency histogram with fixed
+buckets (plus count, sum and max); counters are plain totals. Everything is
+process-wide and kept in memory; snapshot() returns it for the Performance
+page, and it can be exported as JSON lines or in the Prometheus text format.
+When TASKPILOT_PERF_PROM names a file, the Prometheus text is rewritten there
+every PROM_INTERVAL seconds (for a node-exporter textfile collector).
+
+TASKPILOT_PERF=0 disables collection: spans and counters then return right
+away without reading the clock.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+ENABLED = os.environ.get("TASKPILOT_PERF", "1") != "0"
+# histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+PROM_FILE = os.environ.get("TASKPILOT_PERF_PROM")
+PROM_INTERVAL = 15.0
+PREFIX = "taskpilot"
+
+_LOCK = threading.Lock()
+_SPANS = {}     # (name, labels) -> [count, sum, max, bucket counts...]
+_COUNTERS = {}  # (name, labels) -> total
+_LAST_EXPORT = [0.0]
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = bool(on)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def record(name, seconds, **labels):
+    """Add one observation of `seconds` to the span `name`."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    slot = next(i for i, bound in enumerate(BUCKETS) if seconds <= bound)
+    with _LOCK:
+        stats = _SPANS.get(key)
+        if stats is None:
+            stats = _SPANS[key] = [0, 0.0, 0.0] + [0] * len(BUCKETS)
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        stats[3 + slot] += 1
+
+
+def count(name, amount=1, **labels):
+    """Add `amount` to the counter `name`."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + amount
+
+
+@contextmanager
+def span(name, **labels):
+    """Time the enclosed block (also when it raises, e.g. Streamlit's rerun)."""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, **labels)
+
+
+def timed(name=None, **labels):
+    """Decorator: time every call of the function as span `name` (default: module.function)."""
+    def wrap(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def timed_call(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(span_name, time.perf_counter() - start, **labels)
+        return timed_call
+    return wrap
+
+
+def _quantile(buckets, total, q):
+    """Upper bound of the bucket holding the q-quantile (histogram estimate)."""
+    if not total:
+        return 0.0
+    rank, seen = q * total, 0
+    for bound, n in zip(BUCKETS, buckets):
+        seen += n
+        if seen >= rank:
+            return bound
+    return BUCKETS[-1]
+
+
+def snapshot():
+    """{"spans": [...], "counters": [...]}: one dict per (name, labels), spans slowest total first."""
+    with _LOCK:
+        spans = [(key, list(stats)) for key, stats in _SPANS.items()]
+        counters = list(_COUNTERS.items())
+    out_spans = []
+    for (name, labels), stats in spans:
+        n, total, peak, buckets = stats[0], stats[1], stats[2], stats[3:]
+        out_spans.append({
+            "name": name,
+            "labels": dict(labels),
+            "count": n,
+            "sum": total,
+            "mean": total / n if n else 0.0,
+            "p50": min(_quantile(buckets, n, 0.5), peak),
+            "p95": min(_quantile(buckets, n, 0.95), peak),
+            "max": peak,
+            "buckets": buckets,
+        })
+    out_spans.sort(key=lambda s: s["sum"], reverse=True)
+    out_counters = [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in counters]
+    out_counters.sort(key=lambda c: (c["name"], sorted(c["labels"].items())))
+    return {"spans": out_spans, "counters": out_counters}
+
+
+def reset():
+    with _LOCK:
+        _SPANS.clear()
+        _COUNTERS.clear()
+
+
+def to_jsonl(snap=None):
+    """The metrics as JSON lines, one per span or counter, stamped with the current time."""
+    snap = snap or snapshot()
+    now = time.time()
+    lines = [json.dumps({"ts": now, "type": "span", **{k: v for k, v in s.items() if k != "buckets"},
+                         "buckets": {_le(b): n for b, n in zip(BUCKETS, s["buckets"])}})
+             for s in snap["spans"]]
+    lines += [json.dumps({"ts": now, "type": "counter", **c}) for c in snap["counters"]]
+    return "".join(line + "\n" for line in lines)
+
+
+def _le(bound):
+    return "+Inf" if math.isinf(bound) else repr(bound)
+
+
+def _labels(labels, **extra):
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(snap=None):
+    """The metrics in the Prometheus text exposition format."""
+    snap = snap or snapshot()
+    metric = f"{PREFIX}_span_seconds"
+    lines = [f"# HELP {metric} Time spent in instrumented spans.", f"# TYPE {metric} histogram"]
+    for s in snap["spans"]:
+        labels = {"span": s["name"], **s["labels"]}
+        cumulative = 0
+        for bound, n in zip(BUCKETS, s["buckets"]):
+            cumulative += n
+            lines.append(f"{metric}_bucket{_labels(labels, le=_le(bound))} {cumulative}")
+        lines.append(f"{metric}_sum{_labels(labels)} {s['sum']:.6f}")
+        lines.append(f"{metric}_count{_labels(labels)} {s['count']}")
+    for name in dict.fromkeys(c["name"] for c in snap["counters"]):
+        counter = f"{PREFIX}_{name}_total"
+        lines.append(f"# TYPE {counter} counter")
+        lines += [f"{counter}{_labels(c['labels'])} {c['value']}" for c in snap["counters"] if c["name"] == name]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Write the Prometheus text atomically (textfile collectors must never see half a file)."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(to_prometheus(), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def export_if_due():
+    """Rewrite TASKPILOT_PERF_PROM when PROM_INTERVAL has passed since the last export."""
+    if not (ENABLED and PROM_FILE):
+        return
+    now = time.monotonic()
+    with _LOCK:
+        if now - _LAST_EXPORT[0] < PROM_INTERVAL:
+            return
+        _LAST_EXPORT[0] = now
+    try:
+        write_prometheus(PROM_FILE)
+    except OSError as exc:
+        print("perf export error:", exc)
@@ -0,0 +1,323 @@
+# lib/report_query.py
+"""
+Filter engine for the Reports page.
+
+The low-cardinality task columns (assigned_to, status, priority, team) are
+dictionary-encoded: each row holds an int32 code into a per-column list of
+values, and every value keeps the sorted row positions holding it (a row-id
+index). Date columns are kept as int64 nanoseconds. A query starts from the
+row ids of its most selective equality filter (or all rows when there is
+none) and narrows them with vectorized checks on the codes and dates, so it
+touches only candidate rows instead of comparing strings across the table.
+Teams are encoded by team_key(), so every spelling of a team is one value,
+listed under its most common spelling.
+
+The index follows the TaskStore: status changes and reassignments patch the
+codes and row-id lists of the changed rows, new tasks are appended, and any
+other change (deletes, reloads) rebuilds it.
+"""
+import threading
+from collections import Counter
+from datetime import date
+import numpy as np
+import pandas as pd
+from lib.backends import display_spelling, team_key
+from lib.task_store import get_task_store
+
+CATEGORICAL = ("assigned_to", "status", "priority", "team")
+# columns matched by a key rather than the exact value: every spelling of a team is one team
+KEYS = {"team": team_key}
+DATES = ("due_date", "created_date", "completion_date")
+DONE = "Complete"
+_NAT = np.iinfo("int64").min
+_NONE = np.empty(0, dtype="int64")
+
+
+def _stamps(column):
+    return pd.to_datetime(column, errors="coerce").to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def _values(value):
+    """A filter value as a list of wanted values (None = no filter)."""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set, frozenset, pd.Index, np.ndarray)):
+        return list(value)
+    return [value]
+
+
+def _bounds(span):
+    """(lo, hi) int64 bounds of a (start, end) pair; a date end includes that whole day."""
+    start, end = span if span is not None else (None, None)
+    lo = None if start is None else pd.Timestamp(start).value
+    hi = None
+    if end is not None:
+        stop = pd.Timestamp(end)
+        if stop == stop.normalize():
+            stop += pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+        hi = stop.value
+    return lo, hi
+
+
+class _Column:
+    """
+    One dictionary-encoded column: codes per row, values per code, row ids per code.
+    With `key`, values with the same key(value) share a code and are shown under their
+    most common (stripped) spelling, as the user directory does: "Core" and "core" are one team.
+    """
+
+    def __init__(self, series, key=None):
+        self.key = key
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        uniques = [str(v) for v in uniques]
+        self.values, self.lookup, self.rows = [], {}, {}
+        self.spellings = [] if key is not None else None  # per code: Counter of spellings
+        remap = np.empty(len(uniques) + 1, dtype="int64")
+        remap[-1] = -1  # the missing-value sentinel
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        for i, value in enumerate(uniques):
+            remap[i] = self.code(value, add=True)
+            if key is not None:
+                self.spellings[remap[i]][value.strip()] += int(counts[i])
+        if key is not None:
+            self.values = [display_spelling(spelled) for spelled in self.spellings]
+        self.codes = remap[codes].astype("int32")
+        order = np.argsort(self.codes, kind="stable")
+        counts = np.bincount(self.codes[self.codes >= 0], minlength=len(self.values))
+        start = int((self.codes < 0).sum())
+        self.rows = {}
+        for code, n in enumerate(counts):
+            self.rows[code] = order[start:start + n]
+            start += n
+        self._options = None
+
+    def code(self, value, add=False):
+        if value is None or value != value:
+            return -1
+        value = str(value)
+        lookup = value if self.key is None else self.key(value)
+        code = self.lookup.get(lookup)
+        if code is None and add:
+            code = self.lookup[lookup] = len(self.values)
+            self.values.append(value)
+            self.rows[code] = _NONE
+            if self.spellings is not None:
+                self.spellings.append(Counter())
+        return -1 if code is None else code
+
+    def _respell(self, old, new):
+        """Move spelling counts from the `old` to the `new` values of changed rows."""
+        codes = set()
+        for values, sign in ((old, -1), (new, 1)):
+            for value in values:
+                code = self.code(value)
+                if code >= 0:
+                    self.spellings[code][str(value).strip()] += sign
+                    codes.add(code)
+        for code in codes:
+            name = display_spelling(self.spellings[code])
+            if name is not None and self.values[code] != name:
+                self.values[code] = name
+                self._options = None
+
+    def set(self, positions, series, previous):
+        """Give rows at `positions` the values in `series` (were `previous`), updating the row-id lists."""
+        new = np.array([self.code(v, add=True) for v in series], dtype="int32")
+        if self.spellings is not None:
+            self._respell(previous, series)
+        old = self.codes[positions]
+        changed = old != new
+        if not changed.any():
+            return
+        positions, old, new = positions[changed], old[changed], new[changed]
+        self.codes = self.codes.copy()  # readers may hold the previous array
+        self.codes[positions] = new
+        for code in np.unique(old[old >= 0]):
+            self.rows[code] = np.setdiff1d(self.rows[code], positions[old == code], assume_unique=True)
+        for code in np.unique(new[new >= 0]):
+            self.rows[code] = np.union1d(self.rows[code], positions[new == code])
+        self._options = None
+
+    def append(self, series, first):
+        new = np.array([self.code(v, add=True) for v in series], dtype="int32")
+        if self.spellings is not None:
+            self._respell((), series)
+        self.codes = np.concatenate([self.codes, new])
+        positions = np.arange(first, first + len(new))
+        for code in np.unique(new[new >= 0]):
+            self.rows[code] = np.concatenate([self.rows[code], positions[new == code]])
+        self._options = None
+
+    def options(self):
+        """Sorted values present in at least one row (cached until the column changes)."""
+        if self._options is None:
+            self._options = sorted(v for code, v in enumerate(self.values) if len(self.rows[code]))
+        return self._options
+
+
+class ReportQuery:
+    """Encoded task columns and row-id indexes, kept in step with a TaskStore."""
+
+    def __init__(self, store=None):
+        self._lock = threading.Lock()
+        self._columns = {}
+        self._dates = {}
+        self._df = None
+        self.version = None
+        self.store = store if store is not None else get_task_store()
+        self.store.subscribe(self._on_change)
+
+    def _on_change(self, version, df, before, after):
+        with self._lock:
+            n = len(self._df) if self._df is not None else None
+            if before is None or n is None:
+                self._rebuild(df)
+            elif len(df) == n and len(after) and after.index.equals(before.index):
+                # updated in place: after's index holds the rows' positions
+                self._patch(df, after.index.to_numpy())
+            elif before.empty and len(df) == n + len(after):
+                self._append(df, n)
+            else:
+                self._rebuild(df)
+            self._df = df
+            self.version = version
+
+    def _rebuild(self, df):
+        df = df if df is not None else pd.DataFrame(columns=list(CATEGORICAL + DATES))
+        self._columns = {col: _Column(df[col], KEYS.get(col)) for col in CATEGORICAL if col in df.columns}
+        self._dates = {col: _stamps(df[col]) for col in DATES if col in df.columns}
+
+    def _patch(self, df, positions):
+        rows, previous = df.iloc[positions], self._df.iloc[positions]
+        for col, column in self._columns.items():
+            column.set(positions, rows[col], previous[col])
+        for col in self._dates:
+            stamps = self._dates[col].copy()
+            stamps[positions] = _stamps(rows[col])
+            self._dates[col] = stamps
+
+    def _append(self, df, first):
+        rows = df.iloc[first:]
+        for col, column in self._columns.items():
+            column.append(rows[col], first)
+        for col in self._dates:
+            self._dates[col] = np.concatenate([self._dates[col], _stamps(rows[col])])
+
+    def rebuild(self):
+        """Re-encode every column from the store's current table."""
+        version, df = self.store.view()
+        with self._lock:
+            self._rebuild(df)
+            self._df = df
+            self.version = version
+
+    def options(self, column):
+        """Sorted distinct values of a categorical column, for select boxes."""
+        self.store.view()  # picks up saves made outside the store
+        with self._lock:
+            return list(self._columns[column].options()) if column in self._columns else []
+
+    def _positions(self, filters, due, created, overdue, today):
+        """Row positions matching every filter (caller holds the lock)."""
+        wanted = []
+        for col, value in filters.items():
+            values = _values(value)
+            if values is None:
+                continue
+            column = self._columns.get(col)
+            codes = [c for c in (column.code(v) for v in values) if c >= 0] if column else []
+            if not codes:
+                return _NONE
+            wanted.append((sum(len(column.rows[c]) for c in codes), column, codes))
+        if wanted:
+            # start from the smallest candidate set, check the rest against codes
+            wanted.sort(key=lambda item: item[0])
+            _, column, codes = wanted[0]
+            rows = column.rows[codes[0]] if len(codes) == 1 else np.sort(
+                np.concatenate([column.rows[c] for c in codes]))
+            for _, column, codes in wanted[1:]:
+                rows = rows[np.isin(column.codes[rows], codes)]
+        else:
+            rows = np.arange(len(self._df))
+        for col, span in (("due_date", due), ("created_date", created)):
+            lo, hi = _bounds(span)
+            if (lo is None and hi is None) or col not in self._dates:
+                continue
+            stamps = self._dates[col][rows]
+            keep = stamps != _NAT
+            if lo is not None:
+                keep &= stamps >= lo
+            if hi is not None:
+                keep &= stamps <= hi
+            rows = rows[keep]
+        if overdue is not None and "due_date" in self._dates:
+            late = self._overdue(rows, today)
+            rows = rows[late if overdue else ~late]
+        return rows
+
+    def _overdue(self, rows, today):
+        cutoff = pd.Timestamp(today or date.today()).normalize().value
+        due = self._dates["due_date"][rows]
+        status = self._columns.get("status")
+        done = status.code(DONE) if status else -1
+        is_open = status.codes[rows] != done if status else np.ones(len(rows), dtype=bool)
+        return (due != _NAT) & (due < cutoff) & is_open
+
+    def select(self, assigned_to=None, status=None, priority=None, team=None,
+               due=None, created=None, overdue=None, today=None):
+        """
+        Tasks matching every given filter, as (version, rows). assigned_to/status/priority/team
+        take a value or a list of values; due/created take (start, end) with either end None;
+        overdue=True keeps open tasks due before today, False the rest.
+        """
+        self.store.view()
+        filters = {"assigned_to": assigned_to, "status": status, "priority": priority, "team": team}
+        with self._lock:
+            if self._df is None:
+                return self.version, pd.DataFrame()
+            rows = self._positions(filters, due, created, overdue, today)
+            return self.version, self._df.iloc[rows]
+
+    def summary(self, by, today=None, **filters):
+        """
+        Per value of `by` among the tasks matching `filters` (as for select()): tasks,
+        completed, overdue and completion %, largest groups first.
+        """
+        if by not in CATEGORICAL:
+            raise KeyError(f"Cannot group tasks by {by!r}")
+        columns = ["tasks", "completed", "overdue", "completion_pct"]
+        due, created, overdue = filters.pop("due", None), filters.pop("created", None), filters.pop("overdue", None)
+        self.store.view()
+        with self._lock:
+            column = self._columns.get(by)
+            if column is None or self._df is None:
+                return pd.DataFrame(columns=columns)
+            rows = self._positions(filters, due, created, overdue, today)
+            size = len(column.values) + 1  # the last slot collects missing values
+            codes = column.codes[rows]
+            codes = np.where(codes < 0, size - 1, codes)
+            status = self._columns.get("status")
+            done = status.codes[rows] == status.code(DONE) if status else np.zeros(len(rows), dtype=bool)
+            late = self._overdue(rows, today) if "due_date" in self._dates else np.zeros(len(rows), dtype=bool)
+            labels = column.values + ["(none)"]
+        out = pd.DataFrame({
+            "tasks": np.bincount(codes, minlength=size),
+            "completed": np.bincount(codes, weights=done, minlength=size).astype("int64"),
+            "overdue": np.bincount(codes, weights=late, minlength=size).astype("int64"),
+        }, index=pd.Index(labels, name=by))
+        out = out[out["tasks"] > 0]
+        out["completion_pct"] = (out["completed"] / out["tasks"] * 100).round(1)
+        return out.sort_values("tasks", ascending=False)
+
+
+_QUERY = None
+_QUERY_LOCK = threading.Lock()
+
+
+def get_report_query():
+    """Return the process-wide ReportQuery, creating it on first use."""
+    global _QUERY
+    with _QUERY_LOCK:
+        if _QUERY is None:
+            _QUERY = ReportQuery()
+        return _QUERY
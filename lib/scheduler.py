@@ -0,0 +1,285 @@
+# lib/scheduler.py
+"""
+Background precomputation of the dashboards' derived data.
+
+A job is a compute function plus a version function (the version of the data
+its result depends on). One worker thread recomputes a job whenever its
+version moved on: it is woken by a TaskStore listener right after a write
+(waiting DEBOUNCE seconds so a burst of writes costs one recomputation, and
+resting between runs of a slow job) and otherwise checks every INTERVAL seconds, which also catches saves made by
+other processes and the date rolling over. Pages read the latest Snapshot
+right away, with the time it was computed; only the first read of a job
+computes inline.
+
+The standard jobs are the analytics KPIs and charts, the default flow view,
+the report summaries (overall and per team) and the overdue task list; chart
+images are rendered by the worker into the chart cache. The deadline engine
+(lib.deadlines) is run the same way, every minute and after writes.
+
+TASKPILOT_SCHEDULER=0 turns the worker off: a read then recomputes inline
+whenever the version changed, and no deadline notifications are sent.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import date
+from typing import Any, NamedTuple
+import pandas as pd
+from lib import charts, perf
+from lib.data_manager import task_counts
+from lib.deadlines import get_deadline_engine
+from lib.flow import FREQUENCIES, get_flow
+from lib.report_query import CATEGORICAL, get_report_query
+from lib.task_store import get_task_store
+
+ENABLED = os.environ.get("TASKPILOT_SCHEDULER", "1") != "0"
+# seconds between version checks when nothing was written
+INTERVAL = 30.0
+# after a write, seconds to wait for more writes before recomputing
+DEBOUNCE = 0.5
+# a job is not rerun until REST x its last run time has passed, so during a stream of
+# writes the worker takes at most about half a core (the GIL) from page reruns
+REST = 1.0
+# the flow view precomputed for the analytics page (its default selection)
+FLOW_PERIOD = "Weekly"
+FLOW_WINDOW = 4
+OVERDUE_COLUMNS = ["task_id", "title", "assigned_to", "team", "priority", "status", "due_date"]
+
+log = logging.getLogger(__name__)
+
+
+class Snapshot(NamedTuple):
+    value: Any
+    version: Any
+    computed_at: float
+
+    @property
+    def age(self):
+        return time.time() - self.computed_at
+
+
+def ago(seconds):
+    """'just now', '42 seconds ago', '3 minutes ago', ..."""
+    seconds = int(seconds)
+    if seconds < 2:
+        return "just now"
+    for unit, size in (("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            n = seconds // size
+            return f"{n} {unit}{'s' if n != 1 else ''} ago"
+    return f"{seconds} seconds ago"
+
+
+class Scheduler:
+    """Named jobs recomputed in a worker thread when their data version changes."""
+
+    def __init__(self, interval=INTERVAL, debounce=DEBOUNCE, rest=REST, background=ENABLED):
+        self.interval = interval
+        self.debounce = debounce
+        self.rest = rest
+        self.background = background
+        self._lock = threading.Lock()
+        self._jobs = {}       # name -> (compute, version, job lock)
+        self._results = {}    # name -> Snapshot
+        self._ready = {}      # name -> monotonic time the worker may rerun it
+        self._wake = threading.Event()
+        self._thread = None
+
+    def register(self, name, compute, version):
+        """Add a job: compute() -> value, version() -> the data version the value reflects."""
+        with self._lock:
+            self._jobs[name] = (compute, version, threading.Lock())
+        self._wake.set()
+
+    def get(self, name):
+        """The job's latest Snapshot; computed inline only when there is none yet (or no worker)."""
+        with self._lock:
+            snap = self._results.get(name)
+            version = self._jobs[name][1]
+        if snap is None or (not self.background and snap.version != version()):
+            snap = self.run(name)
+        return snap
+
+    def stale(self, name):
+        """True while the job's snapshot is behind the data (a recomputation is pending)."""
+        with self._lock:
+            snap = self._results.get(name)
+            version = self._jobs[name][1]
+        return snap is None or snap.version != version()
+
+    def run(self, name):
+        """Recompute the job now (unless another thread just did it for the current version)."""
+        compute, version, job_lock = self._jobs[name]
+        with job_lock:
+            current = version()  # read first: a write during compute leaves the result stale
+            with self._lock:
+                snap = self._results.get(name)
+            if snap is not None and snap.version == current:
+                return snap
+            start = time.monotonic()
+            with perf.span("scheduler.job", job=name):
+                value = compute()
+            end = time.monotonic()
+            snap = Snapshot(value, current, time.time())
+            with self._lock:
+                self._results[name] = snap
+                self._ready[name] = end + self.rest * (end - start)
+            return snap
+
+    def trigger(self):
+        """Wake the worker (called after writes)."""
+        self._wake.set()
+
+    def start(self):
+        if not self.background or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="taskpilot-scheduler", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        timeout = self.interval
+        while True:
+            if self._wake.wait(timeout):
+                time.sleep(self.debounce)  # let a burst of writes settle
+            self._wake.clear()
+            timeout = self.interval
+            with self._lock:
+                names = list(self._jobs)
+            for name in names:
+                try:
+                    if not self.stale(name):
+                        continue
+                    with self._lock:
+                        wait = self._ready.get(name, 0.0) - time.monotonic()
+                    if wait > 0:
+                        timeout = min(timeout, wait)  # still resting: come back when it may run
+                        continue
+                    self.run(name)
+                except Exception:
+                    log.exception("scheduler job %s failed", name)
+                    perf.count("scheduler_errors", job=name)
+
+
+# --- standard jobs ---
+
+def _tasks_version():
+    return get_task_store().view()[0]
+
+
+def _dated_version():
+    # results that compare due dates with today
+    return _tasks_version(), date.today()
+
+
+def _analytics():
+    """KPIs, counts and the three analytics charts (rendered into the chart cache)."""
+    # projected counts: only the status, priority and assigned_to columns are read
+    version = _tasks_version()
+    status = task_counts("status")
+    priority = task_counts("priority").reindex(["High", "Medium", "Low"]).fillna(0)
+    by_status = status.reindex(["Pending", "In Progress", "Complete", "Blocked"]).fillna(0)
+    completed = task_counts("assigned_to", status="Complete")
+    rate = (completed / task_counts("assigned_to")).fillna(0).sort_values(ascending=False)
+    rate = (rate * 100).round(2)
+    images = {}
+    if not status.empty:
+        images["priority"] = charts.render(
+            "bar", version, size=(6, 4),
+            labels=tuple(priority.index), values=tuple(int(v) for v in priority.values),
+            title="Task Count by Priority", ylabel="Number of Tasks",
+        )
+        images["status"] = charts.render(
+            "pie", version, size=(5, 5),
+            labels=tuple(by_status.index), values=tuple(int(v) for v in by_status.values),
+            title="Overall Task Status Distribution",
+        )
+    if not rate.empty:
+        images["rates"] = charts.render(
+            "barh", version, size=(6, 4),
+            labels=tuple(rate.index), values=tuple(float(v) for v in rate.values),
+            title="User Completion Rates", xlabel="Completion Rate (%)",
+        )
+    return {"status": status, "images": images}
+
+
+def flow_charts(version, trend, budget=None):
+    """PNGs of the throughput and lead-time trend lines (cached per data version)."""
+    labels = tuple(ts.strftime("%Y-%m-%d") for ts in trend.index)
+
+    def series(*columns):
+        return tuple(
+            (col, tuple(None if pd.isna(v) else round(float(v), 3) for v in trend[col]))
+            for col in columns
+        )
+
+    return (
+        charts.render("line", version, size=(8, 3.5), budget=budget, labels=labels,
+                      series=series("throughput", "throughput_rolling"),
+                      title="Throughput", ylabel="Tasks completed"),
+        charts.render("line", version, size=(8, 3.5), budget=budget, labels=labels,
+                      series=series("lead_time_days", "lead_time_rolling"),
+                      title="Lead time", ylabel="Days"),
+    )
+
+
+def _flow():
+    """The analytics page's default flow view: all tasks, FLOW_PERIOD, FLOW_WINDOW."""
+    flow = get_flow()
+    version = _dated_version()
+    trend = flow.series(FREQUENCIES[FLOW_PERIOD], window=FLOW_WINDOW)
+    return {
+        "trend": trend,
+        "overdue": flow.overdue(),
+        "breakdown": flow.breakdown("team"),
+        "images": flow_charts(version, trend) if not trend.empty else (),
+    }
+
+
+def _reports():
+    """Report summaries by every column, for all tasks and for each team alone."""
+    query = get_report_query()
+    summaries = {"": {by: query.summary(by) for by in CATEGORICAL}}
+    for team in query.options("team"):
+        summaries[team] = {by: query.summary(by, team=[team]) for by in CATEGORICAL}
+    return summaries
+
+
+def _overdue():
+    """Open tasks due before today, most overdue first."""
+    _, rows = get_report_query().select(overdue=True)
+    if rows.empty:
+        return rows
+    return rows.reindex(columns=OVERDUE_COLUMNS).sort_values("due_date", kind="stable")
+
+
+def latest(name):
+    """(value, caption) of a standard job: its latest snapshot and how old it is."""
+    scheduler = get_scheduler()
+    snap = scheduler.get(name)
+    caption = f"Computed {ago(snap.age)}"
+    if scheduler.stale(name):
+        caption += " — updating with the latest changes"
+    return snap.value, caption
+
+
+_SCHEDULER = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide Scheduler with the standard jobs, creating it on first use."""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            scheduler = Scheduler()
+            scheduler.register("analytics", _analytics, _tasks_version)
+            scheduler.register("flow", _flow, _dated_version)
+            scheduler.register("reports", _reports, _tasks_version)
+            scheduler.register("overdue", _overdue, _dated_version)
+            deadlines = get_deadline_engine()
+            scheduler.register("deadlines", deadlines.run, deadlines.version)
+            get_task_store().subscribe(lambda version, df, before, after: scheduler.trigger())
+            scheduler.start()
+            _SCHEDULER = scheduler
+        return _SCHEDULER
@@ -0,0 +1,68 @@
+# lib/sequences.py
+"""
+Persistent id sequences (task_id, log_id, msg_id, ...).
+
+The last id handed out per sequence lives in a small JSON file next to the
+data, updated under an inter-process file lock, so allocating an id costs a
+tiny read/write regardless of table size and two sessions or server processes
+never receive the same id. A sequence is seeded once from the table's current
+maximum: ahead of time by ensure() (lib.data_manager.prepare() does it at
+start-up, off the request path), or else the first time it is used.
+"""
+import json
+import os
+from lib.locking import file_lock
+
+
+class SequenceAllocator:
+    """Hands out increasing integer ids per sequence key, persisted in a JSON file."""
+
+    def __init__(self, path, lock_path, seed):
+        # seed(key) -> highest id already in use for that key (0 if none)
+        self.path = path
+        self.lock_path = lock_path
+        self.seed = seed
+
+    def _read(self):
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, state):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def reserve(self, key, count=1):
+        """Reserve `count` consecutive ids for `key`; returns them as a range."""
+        if count < 1:
+            raise ValueError("count must be >= 1")
+        with file_lock(self.lock_path):
+            state = self._read()
+            last = state.get(key)
+            if last is None:
+                last = int(self.seed(key))
+            state[key] = last + count
+            self._write(state)
+        return range(last + 1, last + count + 1)
+
+    def ensure(self, key):
+        """Seed `key` from its table now unless it already has a value; returns the last id."""
+        if (last := self.current(key)) is not None:
+            return last
+        with file_lock(self.lock_path):
+            state = self._read()
+            if key not in state:
+                state[key] = int(self.seed(key))
+                self._write(state)
+            return state[key]
+
+    def next(self, key):
+        """Reserve and return a single id."""
+        return self.reserve(key, 1)[0]
+
+    def current(self, key):
+        """Last id handed out for `key` (None if the sequence was never used)."""
+        return self._read().get(key)
@@ -0,0 +1,234 @@
+# lib/task_store.py
+"""
+Tasks table with a task_id -> row index and vectorized bulk operations.
+
+There is one TaskStore per server process (get_task_store()), sharing the
+frame cached by lib.data_manager, so every session reads the same copy of the
+data and sees other sessions' updates as soon as they are saved. The frame is
+never modified in place: a mutation builds a new frame (copying only the
+columns it changes), saves it with an optimistic version check and publishes
+it as the shared table, and, on success, records it in the audit log with a
+single append. Readers holding an older frame keep a consistent snapshot.
+
+Derived structures (aggregates, indexes) can subscribe() to the store and are
+told which rows changed on every write, or to rebuild after a reload.
+"""
+import threading
+import pandas as pd
+from lib import columnar
+from lib.data_manager import (
+    TASK_COLUMNS, snapshot, table_version, save_table, append_rows, next_id, reserve_ids,
+)
+
+STATUSES = ["Pending", "In Progress", "Complete", "Blocked"]
+AUDIT_CATEGORY = "Task Management"
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_task_store():
+    """Return the process-wide TaskStore, creating it on first use."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = TaskStore()
+        return _STORE
+
+
+class TaskStore:
+    """
+    The tasks table plus a task_id index; mutations persist immediately.
+    `df` is shared and read-only: copy it before modifying it locally.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._listeners = []
+        self.version = None
+        self.reload()
+
+    def _set(self, version, df):
+        if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0:
+            df = df.reset_index(drop=True)
+        self._df = df
+        self._index = pd.Index(df["task_id"])
+        self.version = version
+
+    def reload(self):
+        """Adopt the current shared tasks frame."""
+        with self._lock:
+            version, df = snapshot("tasks")
+            if version != self.version:
+                self._set(version, df)
+                self._notify(None, None)
+
+    def _sync(self):
+        # pick up saves made through other paths (or other processes) since we last looked
+        if table_version("tasks") != self.version:
+            self.reload()
+
+    def subscribe(self, listener):
+        """
+        Register listener(version, df, before, after), called under the store lock after
+        every change. `before`/`after` hold the changed rows as they were / are now (empty
+        for creates / deletes); both are None when the table was reloaded wholesale and
+        derived state should be rebuilt from `df`. The listener is called once right away.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            listener(self.version, self._df, None, None)
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self, before, after):
+        for listener in list(self._listeners):
+            listener(self.version, self._df, before, after)
+
+    @property
+    def df(self):
+        """The current tasks frame (shared; do not modify)."""
+        with self._lock:
+            self._sync()
+            return self._df
+
+    def view(self):
+        """Return (version, frame): a consistent read-only view of the tasks."""
+        with self._lock:
+            self._sync()
+            return self.version, self._df
+
+    # --- lookups ---
+
+    def positions(self, ids):
+        """Row positions of the given task ids in `df` (unknown ids are dropped)."""
+        with self._lock:
+            self._sync()
+            return self._locate(ids)
+
+    def _locate(self, ids):
+        # positions in the frame held now, without syncing: a change() must stay on the df it was given
+        pos = self._index.get_indexer(pd.Index(list(ids)))
+        return pos[pos >= 0]
+
+    def get(self, task_id):
+        """Return one task as a Series, or None."""
+        with self._lock:
+            pos = self.positions([task_id])
+            return self._df.iloc[pos[0]] if len(pos) else None
+
+    def rows(self, ids):
+        """Return the tasks with the given ids as a DataFrame."""
+        with self._lock:
+            return self._df.iloc[self.positions(ids)]
+
+    # --- mutations ---
+
+    def _apply(self, change, user, action, describe):
+        """
+        Run change(df) -> (new_df, before_rows, after_rows) against the shared frame, save
+        and publish new_df and log one audit row per affected task. change() must not
+        modify df in place. Returns the affected rows, or None if the save kept conflicting.
+        """
+        for _ in range(2):
+            with self._lock:
+                self._sync()
+                df, before, after = change(self._df)
+                affected = after if len(after) else before
+                if affected.empty:
+                    return affected
+                df = df.reset_index(drop=True)
+                version = save_table("tasks", df, expected_version=self.version, adopt=True,
+                                     changes=("task_id", before, after))
+                if version is not None:
+                    self._set(version, df)
+                    self._notify(before, after)
+            if version is not None:
+                _log_actions(user, action, [describe(row) for _, row in affected.iterrows()])
+                return affected
+            # saved from another process first: start again from their data
+            self.reload()
+        return None
+
+    def update_status(self, ids, status, user, action="Status Updated"):
+        """Set status on all given tasks in one pass (completion_date follows the status)."""
+        def change(df):
+            pos = self._locate(ids)
+            now = pd.Timestamp.now()
+            done = now if status == "Complete" else pd.NaT
+            new = _with_values(df, pos, {"status": status, "completion_date": done})
+            return new, df.iloc[pos], new.iloc[pos]
+        return self._apply(change, user, action, lambda r: f"Task {int(r['task_id'])} -> {status}")
+
+    def reassign(self, ids, assignee, user, action="Reassigned"):
+        """Assign all given tasks to `assignee` in one pass."""
+        def change(df):
+            pos = self._locate(ids)
+            new = _with_values(df, pos, {"assigned_to": assignee})
+            return new, df.iloc[pos], new.iloc[pos]
+        return self._apply(change, user, action, lambda r: f"Task {int(r['task_id'])} -> {assignee}")
+
+    def delete(self, ids, user, action="Task Deleted"):
+        """Remove all given tasks in one pass."""
+        def change(df):
+            pos = self._locate(ids)
+            removed = df.iloc[pos]
+            return df.drop(index=df.index[pos]), removed, removed.iloc[0:0]
+        return self._apply(change, user, action, lambda r: f"Task {int(r['task_id'])}: {r['title']}")
+
+    def create(self, task, user, action="Task Created"):
+        """Add a task (dict of columns; task_id/status/dates are filled in). Returns the new id."""
+        new_task = {col: task.get(col, pd.NA) for col in TASK_COLUMNS}
+        new_task["task_id"] = next_id("tasks", "task_id")
+        new_task["assigned_by"] = task.get("assigned_by", user)
+        new_task["status"] = task.get("status", "Pending")
+        new_task["created_date"] = pd.Timestamp.now()
+        new_task["completion_date"] = pd.NaT
+        new_task["due_date"] = pd.to_datetime(task.get("due_date"))
+        row = pd.DataFrame([new_task])
+
+        def change(df):
+            return columnar.concat([df, row]), row.iloc[0:0], row
+        if self._apply(change, user, action, lambda r: f"Task {int(r['task_id'])}: {r['title']}") is None:
+            return None
+        return new_task["task_id"]
+
+
+def _with_values(df, pos, values):
+    """
+    Return a new frame equal to df with `values` ({column: scalar}) set at row positions
+    `pos`. Only the changed columns are copied; the rest are shared with df. A categorical
+    column gains the value as a category if it is new.
+    """
+    out = df.copy(deep=False)
+    for col, value in values.items():
+        column = df[col]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            column = columnar.with_categories(column, [value])
+        column = column.copy()
+        column.iloc[pos] = value
+        out[col] = column
+    return out
+
+
+def _log_actions(user, action, details):
+    """Append one audit row per detail string, in a single write."""
+    if not details:
+        return
+    ids = reserve_ids("audit", "log_id", len(details))
+    now = pd.Timestamp.now()
+    append_rows("audit", [
+        {
+            "log_id": log_id,
+            "timestamp": now,
+            "user": user,
+            "action": action,
+            "details": text,
+            "category": AUDIT_CATEGORY,
+        }
+        for log_id, text in zip(ids, details)
+    ])
@@ -0,0 +1,141 @@
+# lib/user_directory.py
+"""
+Indexed view of the users table: username -> record and team -> members.
+
+Pages used to filter the users frame (users["username"] == ...) for every
+login, role or roster lookup; the directory builds both indexes once per
+version of the users table and rebuilds them when the table changes, so a
+lookup is a dict access however many users there are.
+
+Team names are compared case-insensitively ("Core" and "core" are one team);
+each team is shown under its most common spelling, and the task queries
+(lib.backends.filter_frame, TaskAggregates.counts) match a team the same
+way, whatever spelling the tasks were stored with. Roles are matched to the
+app's role names the same way, and anything unrecognised is an Employee.
+"""
+import threading
+from collections import Counter
+from lib.backends import team_key
+from lib.data_manager import snapshot, table_version
+
+ROLES = ("Admin", "Manager", "Employee")
+DEFAULT_ROLE = "Employee"
+# built-in account accepted only while the users table is empty
+FALLBACK_LOGIN = ("admin", "admin")
+
+
+def _role(value):
+    key = team_key(value)
+    for role in ROLES:
+        if role.casefold() == key:
+            return role
+    return DEFAULT_ROLE
+
+
+def _text(value):
+    return "" if value is None or value != value else str(value)
+
+
+class UserDirectory:
+    """Users by name and by team, rebuilt whenever the users table changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self._users = {}    # username -> record dict
+        self._teams = {}    # team key -> [usernames], in table order
+        self._names = {}    # team key -> display spelling
+        self.sync()
+
+    def sync(self):
+        """Pick up changes to the users table (a version check when nothing changed)."""
+        if table_version("users") == self.version:
+            return
+        with self._lock:
+            version, df = snapshot("users")
+            if version == self.version:
+                return
+            users, teams, spellings = {}, {}, {}
+            if df is not None and "username" in df.columns:
+                columns = list(df.columns)
+                for values in df.itertuples(index=False, name=None):
+                    record = {col: _text(value) for col, value in zip(columns, values)}
+                    name = record["username"]
+                    if not name or name in users:
+                        continue  # the first row for a username wins, as lookups used to
+                    record["role"] = _role(record.get("role"))
+                    key = team_key(record.get("team"))
+                    users[name] = record
+                    if key:
+                        teams.setdefault(key, []).append(name)
+                        spellings.setdefault(key, Counter())[record["team"].strip()] += 1
+            # most common spelling; Counter keeps first-seen order for ties
+            names = {key: counts.most_common(1)[0][0] for key, counts in spellings.items()}
+            for record in users.values():
+                key = team_key(record.get("team"))
+                record["team"] = names.get(key, "")
+            self._users, self._teams, self._names = users, teams, names
+            self.version = version
+
+    def __len__(self):
+        self.sync()
+        return len(self._users)
+
+    def get(self, username):
+        """The user's record (a dict of the users columns), or None."""
+        self.sync()
+        record = self._users.get(username)
+        return dict(record) if record is not None else None
+
+    def role(self, username):
+        self.sync()
+        record = self._users.get(username)
+        return record["role"] if record is not None else DEFAULT_ROLE
+
+    def team(self, username):
+        """The user's team under its display spelling, or None."""
+        self.sync()
+        record = self._users.get(username)
+        return (record["team"] or None) if record is not None else None
+
+    def display_name(self, username):
+        self.sync()
+        record = self._users.get(username)
+        return record.get("display_name", "") if record is not None else ""
+
+    def members(self, team):
+        """Usernames in a team (matched case-insensitively), in table order."""
+        self.sync()
+        return list(self._teams.get(team_key(team), ()))
+
+    def teams(self):
+        """Display names of all teams, sorted."""
+        self.sync()
+        return sorted(self._names.values(), key=str.casefold)
+
+    def usernames(self):
+        self.sync()
+        return list(self._users)
+
+    def authenticate(self, username, password):
+        """True if the password matches the user's; admin/admin while there are no users."""
+        if not username or not password:
+            return False
+        self.sync()
+        if not self._users:
+            return (username, password) == FALLBACK_LOGIN
+        record = self._users.get(username)
+        return record is not None and password == record.get("password", "")
+
+
+_DIRECTORY = None
+_DIRECTORY_LOCK = threading.Lock()
+
+
+def get_user_directory():
+    """Return the process-wide UserDirectory, creating it on first use."""
+    global _DIRECTORY
+    with _DIRECTORY_LOCK:
+        if _DIRECTORY is None:
+            _DIRECTORY = UserDirectory()
+        return _DIRECTORY
@@ -0,0 +1,162 @@
+# lib/user_settings.py
+"""
+Per-user settings (theme, display name, notifications), kept in memory.
+
+Settings live in data/user_settings.jsonl, one {"username", "settings"}
+record per line; the last record for a user wins. The file is parsed once
+and re-read only when another process changed it. A save updates the
+in-memory copy at once and queues a single-record append on a
+GroupCommitWriter, so a burst of saves from many sessions costs one append
+per debounce interval, with each user's latest settings written once. When
+superseded records outnumber live ones the file is compacted (rewritten with
+one line per user).
+
+Users without saved settings get DEFAULTS, with the theme taken from the
+app-wide data/settings.json written by older versions. Its display name and
+notification choice are not inherited: they belonged to whoever saved last
+(the file names no user), and nobody is opted in to email by default.
+"""
+import atexit
+import json
+import os
+import threading
+import pandas as pd
+from lib.data_manager import USER_SETTINGS_FILE, SETTINGS_FILE, LOCK_DIR, COMMIT_INTERVAL
+from lib.locking import file_lock
+from lib.writer import GroupCommitWriter
+
+DEFAULTS = {"theme": "Dark", "display_name": "", "email_notifications": False}
+# settings of the legacy settings.json that become everyone's defaults
+LEGACY_SHARED = ("theme",)
+# seconds saves are held to be written together; follows TASKPILOT_COMMIT_INTERVAL=0 (sync)
+DEBOUNCE = 1.0 if COMMIT_INTERVAL > 0 else 0
+# compact once the file holds this many records and more than twice the live ones
+COMPACT_MIN = 1_000
+
+
+def _stat(path):
+    try:
+        info = path.stat()
+        return (info.st_mtime_ns, info.st_size)
+    except FileNotFoundError:
+        return None
+
+
+class UserSettingsStore:
+    """Settings per username: in-memory reads, debounced single-record writes."""
+
+    def __init__(self, path, defaults_path=None, interval=DEBOUNCE):
+        self.path = path
+        self.lock_path = LOCK_DIR / f"{path.name}.lock"
+        self._lock = threading.Lock()
+        self._settings = {}
+        self._records = 0
+        self._seen = None
+        self._defaults = dict(DEFAULTS)
+        if defaults_path is not None and defaults_path.exists():
+            try:
+                legacy = json.loads(defaults_path.read_text(encoding="utf-8"))
+                self._defaults.update({k: v for k, v in legacy.items() if k in LEGACY_SHARED})
+            except ValueError:
+                pass
+        self._writer = GroupCommitWriter(self._commit, interval=interval)
+
+    def _load(self):
+        # re-read when the file changed underneath us, unless our own saves are still queued
+        if self._writer.busy("settings") or _stat(self.path) == self._seen:
+            return
+        with self._lock:
+            settings, records = {}, 0
+            try:
+                with open(self.path, encoding="utf-8") as fh:
+                    for line in fh:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue  # a line still being written
+                        settings[record["username"]] = record["settings"]
+                        records += 1
+            except FileNotFoundError:
+                pass
+            self._settings, self._records = settings, records
+            self._seen = _stat(self.path)
+
+    def get(self, username):
+        """The user's settings, defaults filled in."""
+        self._load()
+        with self._lock:
+            return {**self._defaults, **self._settings.get(username, {})}
+
+    def saved(self, username):
+        """Only the settings the user saved (empty if none)."""
+        self._load()
+        with self._lock:
+            return dict(self._settings.get(username, {}))
+
+    def update(self, username, **changes):
+        """Change some of a user's settings; visible at once, written by the debounced writer."""
+        self._load()
+        with self._lock:
+            settings = {**self._settings.get(username, {}), **changes}
+            self._settings[username] = settings
+        self._writer.submit("settings", "append", pd.DataFrame([{"username": username, "settings": settings}]))
+        return {**self._defaults, **settings}
+
+    def reset(self, username):
+        """Drop the user's saved settings (back to the defaults)."""
+        self._load()
+        with self._lock:
+            self._settings[username] = {}
+        self._writer.submit("settings", "append", pd.DataFrame([{"username": username, "settings": {}}]))
+        return dict(self._defaults)
+
+    def flush(self, timeout=None):
+        return self._writer.flush(timeout)
+
+    def _commit(self, name, ops):
+        # appends only: keep each user's last record of the batch
+        for _, frame, _ in ops:
+            latest = frame.drop_duplicates("username", keep="last")
+            lines = "".join(
+                json.dumps({"username": user, "settings": settings}) + "\n"
+                for user, settings in zip(latest["username"], latest["settings"])
+            )
+            with file_lock(self.lock_path):
+                # another process wrote since we read: don't compact (its records aren't
+                # in memory) and leave the file to be re-read
+                foreign = _stat(self.path) != self._seen
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.write(lines)
+                with self._lock:
+                    self._records += len(latest)
+                    if not foreign:
+                        if self._records > max(COMPACT_MIN, 2 * len(self._settings)):
+                            self._compact()
+                        self._seen = _stat(self.path)
+
+    def _compact(self):
+        """Rewrite the file with one line per user (caller holds both locks)."""
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        live = {user: settings for user, settings in self._settings.items() if settings}
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for user, settings in live.items():
+                fh.write(json.dumps({"username": user, "settings": settings}) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        self._records = len(live)
+
+
+_SETTINGS = None
+_SETTINGS_LOCK = threading.Lock()
+
+
+def get_user_settings():
+    """Return the process-wide UserSettingsStore, creating it on first use."""
+    global _SETTINGS
+    with _SETTINGS_LOCK:
+        if _SETTINGS is None:
+            _SETTINGS = UserSettingsStore(USER_SETTINGS_FILE, SETTINGS_FILE)
+            atexit.register(_SETTINGS.flush)
+        return _SETTINGS
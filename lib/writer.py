@@ -0,0 +1,185 @@
+# lib/writer.py
+"""
+Background group-commit writer used by lib.data_manager.
+
+Saves from every session are queued per table and committed by a single
+writer thread once per commit interval. A full-table write supersedes any
+earlier queued operation on that table, and consecutive appends are merged,
+so a burst of saves costs one write per table.
+
+A commit that fails (disk full, permissions, a locked database) is not
+dropped: its ops go back to the front of the table's queue and are retried
+with exponential backoff, the table stays busy, and flush() reports the
+failure instead of claiming the data reached storage.
+"""
+import logging
+import threading
+import time
+import pandas as pd
+from lib import perf
+
+log = logging.getLogger(__name__)
+
+# seconds before the first retry of a failed commit, doubled per failure up to RETRY_MAX
+RETRY_BASE = 0.5
+RETRY_MAX = 30.0
+
+def _coalesce(ops):
+    """
+    Collapse queued ops: a write supersedes everything before it, consecutive appends are
+    merged, and row-level saves ("rows") are kept in order after the appends queued before them.
+    """
+    out = []
+    appends, fsync = [], False
+
+    def merge_appends():
+        if appends:
+            merged = appends[0] if len(appends) == 1 else pd.concat(appends, ignore_index=True)
+            out.append(("append", merged, fsync))
+            appends.clear()
+
+    for kind, frame, sync in ops:
+        if kind == "write":
+            out, appends, fsync = [("write", frame, sync)], [], False
+        elif kind == "rows":
+            merge_appends()
+            fsync = False
+            out.append((kind, frame, sync))
+        else:
+            appends.append(frame)
+            fsync = fsync or sync
+    merge_appends()
+    return out
+
+
+class GroupCommitWriter:
+    """
+    Single writer thread draining a per-table queue.
+    `commit(name, ops)` is called with the coalesced [(kind, frame, fsync), ...] for a table.
+    With interval <= 0 submissions are committed synchronously by the caller.
+    """
+
+    def __init__(self, commit, interval=0.2):
+        self._commit = commit
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._active = set()
+        self._submitted = 0
+        self._committed = 0
+        self._urgent = False
+        self._stopping = False
+        self._thread = None
+        self._sync_lock = threading.Lock()
+        self._failed = {}     # name -> exception of its last failed commit (ops still queued)
+        self._retries = 0     # consecutive failed rounds
+        self._retry_at = 0.0  # monotonic time of the next attempt after a failure
+
+    def submit(self, name, kind, frame, fsync=False):
+        """Queue a "write" (replace the table), a "rows" save (a RowChanges) or an "append" for a table."""
+        if self.interval <= 0:
+            with self._sync_lock:
+                self._active.add(name)
+                try:
+                    self._commit(name, [(kind, frame, fsync)])
+                finally:
+                    self._active.discard(name)
+            return
+        with self._cond:
+            ops = self._pending.setdefault(name, [])
+            if kind == "write":
+                ops.clear()
+            ops.append((kind, frame, fsync))
+            self._submitted += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="taskpilot-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def busy(self, name):
+        """True while a table has queued or in-progress operations (storage lags memory)."""
+        with self._cond:
+            return name in self._pending or name in self._active
+
+    def failed(self, name=None):
+        """The error of the table's (any table's) last commit while its ops are being retried, else None."""
+        with self._cond:
+            if name is not None:
+                return self._failed.get(name)
+            return next(iter(self._failed.values()), None)
+
+    def flush(self, timeout=None):
+        """
+        Barrier: wait until everything submitted so far is committed. Returns False on
+        timeout, or as soon as a commit fails (its ops stay queued and are retried).
+        """
+        with self._cond:
+            target = self._submitted
+            if self._committed >= target:
+                return True
+            if self._failed:
+                return False
+            self._urgent = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: self._committed >= target or self._failed, timeout)
+            return self._committed >= target
+
+    def stop(self, timeout=None):
+        """Flush and stop the writer thread."""
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    return
+                # group-commit window: let other sessions' saves pile up; after a failure, back off
+                deadline = max(time.monotonic() + self.interval, self._retry_at)
+                while not ((self._urgent and not self._failed) or self._stopping):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, {}
+                self._active = set(batch)
+                target = self._submitted
+                self._urgent = False
+
+            failed = {}
+            for name, ops in batch.items():
+                ops = _coalesce(ops)
+                try:
+                    self._commit(name, ops)
+                except Exception as exc:
+                    log.error("commit of table %s failed: %s", name, exc)
+                    perf.count("commit_errors", table=name)
+                    failed[name] = (ops, exc)
+
+            with self._cond:
+                self._active = set()
+                for name in batch:
+                    if name not in failed:
+                        self._failed.pop(name, None)
+                for name, (ops, exc) in failed.items():
+                    # retry before anything queued meanwhile (a newer write still supersedes it)
+                    self._pending[name] = ops + self._pending.get(name, [])
+                    self._failed[name] = exc
+                if failed:
+                    self._retries += 1
+                    self._retry_at = time.monotonic() + min(RETRY_MAX, RETRY_BASE * 2 ** (self._retries - 1))
+                    if self._stopping:
+                        log.error("writer stopped with uncommitted changes to %s", ", ".join(failed))
+                        self._cond.notify_all()
+                        return
+                else:
+                    self._retries, self._retry_at = 0, 0.0
+                    if not self._failed:
+                        self._committed = target
+                self._cond.notify_all()
@@ -1,23 +1,28 @@
 # pages/analytics_page.py
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from lib.data_manager import get_dataframes
+from lib import charts
+from lib.aggregates import get_aggregates
+from lib.flow import FREQUENCIES, get_flow
+from lib.scheduler import FLOW_PERIOD, FLOW_WINDOW, flow_charts, latest
 
 def show_analytics():
-    users, tasks, files, audit, comm = get_dataframes()
+    # KPIs and charts are precomputed in the background after every change; no work in this rerun
     st.title("📊 Analytics Dashboard")
+    analytics, computed = latest("analytics")
+    st.caption(computed)
+    status_counts = analytics["status"]
+    images = analytics["images"]
 
-    if tasks is None or tasks.empty:
+    if status_counts.empty:
         st.info("No tasks available for analysis.")
         return
 
     # --- KPI overview ---
-    total = len(tasks)
-    completed = len(tasks[tasks["status"] == "Complete"])
-    pending = len(tasks[tasks["status"] == "Pending"])
-    in_progress = len(tasks[tasks["status"] == "In Progress"])
-    blocked = len(tasks[tasks["status"] == "Blocked"])
+    total = int(status_counts.sum())
+    completed = int(status_counts.get("Complete", 0))
+    pending = int(status_counts.get("Pending", 0))
+    in_progress = int(status_counts.get("In Progress", 0))
 
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("Total Tasks", total)
@@ -29,65 +34,80 @@ def show_analytics():
 
     # --- Tasks by Priority ---
     st.subheader("📈 Tasks by Priority")
-
-    by_priority = tasks.groupby("priority").size().reindex(["High", "Medium", "Low"]).fillna(0)
-    fig1, ax1 = plt.subplots(figsize=(6, 4))
-    bars = ax1.bar(by_priority.index, by_priority.values)
-    ax1.set_title("Task Count by Priority", fontsize=12, weight="bold")
-    ax1.set_ylabel("Number of Tasks")
-    ax1.bar_label(bars, fmt="%d", label_type="edge", padding=3)
-    st.pyplot(fig1)
+    st.image(images["priority"])
 
     st.markdown("---")
 
     # --- Task Status Distribution ---
     st.subheader("🥧 Task Status Distribution")
-
-    status_counts = (
-        tasks["status"]
-        .value_counts()
-        .reindex(["Pending", "In Progress", "Complete", "Blocked"])
-        .fillna(0)
-    )
-
-    fig2, ax2 = plt.subplots(figsize=(5, 5))
-    wedges, texts, autotexts = ax2.pie(
-        status_counts,
-        labels=status_counts.index,
-        autopct=lambda p: f"{p:.1f}%" if p > 0 else "",
-        startangle=90,
-        pctdistance=0.8,
-        labeldistance=1.1,
-        wedgeprops={"edgecolor": "white"},
-        textprops={"fontsize": 10},
-    )
-    ax2.set_title("Overall Task Status Distribution", fontsize=12, weight="bold")
-    ax2.axis("equal")  # Equal aspect ratio ensures a perfect circle
-    st.pyplot(fig2)
+    st.image(images["status"])
 
     st.markdown("---")
 
     # --- Completion rate by assignee ---
     st.subheader("📋 Completion Rate by Assignee")
-
-    comp = tasks[tasks["status"] == "Complete"].groupby("assigned_to").size()
-    total = tasks.groupby("assigned_to").size()
-    rate = (comp / total).fillna(0).sort_values(ascending=False)
-
-    if not rate.empty:
-        rate_df = pd.DataFrame(
-            {"User": rate.index, "Completion Rate (%)": (rate * 100).round(2)}
-        )
-
-        fig3, ax3 = plt.subplots(figsize=(6, 4))
-        bars2 = ax3.barh(rate_df["User"], rate_df["Completion Rate (%)"], color="skyblue")
-        ax3.bar_label(bars2, fmt="%.1f%%", padding=3)
-        ax3.set_xlabel("Completion Rate (%)")
-        ax3.set_title("User Completion Rates", fontsize=12, weight="bold")
-        ax3.invert_yaxis()
-        st.pyplot(fig3)
+    if "rates" in images:
+        st.image(images["rates"])
     else:
         st.info("No completed tasks yet to calculate completion rates.")
 
+    st.markdown("---")
+    show_flow()
+
     st.markdown("---")
     st.caption("📅 Analytics data auto-generated from your task records.")
+
+
+def show_flow():
+    """Throughput, lead time and overdue trends (bucketed per day, kept up to date by the store)."""
+    st.subheader("⏱️ Flow over time")
+    flow = get_flow()
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        scope = st.selectbox("Scope", ["All tasks", "Team", "Assignee"], key="flow_scope")
+    options = []
+    if scope != "All tasks":
+        column = "team" if scope == "Team" else "assigned_to"
+        options = get_aggregates().counts(column).index.tolist()
+    with c2:
+        choice = st.selectbox(scope if options else "—", options or ["—"], key="flow_choice",
+                              disabled=not options)
+    with c3:
+        period = st.selectbox("Period", list(FREQUENCIES), index=list(FREQUENCIES).index(FLOW_PERIOD),
+                              key="flow_period")
+    window = st.slider("Rolling window (periods)", 1, 26, FLOW_WINDOW, key="flow_window")
+
+    if scope == "All tasks" and period == FLOW_PERIOD and window == FLOW_WINDOW:
+        # the default view is precomputed with the rest of the page
+        snapshot, computed = latest("flow")
+        st.caption(computed)
+        trend, (overdue, open_total, overdue_rate) = snapshot["trend"], snapshot["overdue"]
+        images, breakdown = snapshot["images"], snapshot["breakdown"]
+    else:
+        team = choice if scope == "Team" and options else None
+        assignee = choice if scope == "Assignee" and options else None
+        trend = flow.series(FREQUENCIES[period], team=team, assigned_to=assignee, window=window)
+        overdue, open_total, overdue_rate = flow.overdue(team=team, assigned_to=assignee)
+        # charts are cached per data version: unchanged data is never re-rendered
+        budget = charts.RenderBudget()
+        images = flow_charts(get_aggregates().version, trend, budget) if not trend.empty else ()
+        breakdown = flow.breakdown("team") if scope == "All tasks" else None
+        st.caption(budget.report())
+
+    if trend.empty:
+        st.info("No task history yet.")
+        return
+    recent = trend.tail(window)
+    lead = recent["lead_time_rolling"].iloc[-1]
+    c1, c2, c3 = st.columns(3)
+    c1.metric(f"Throughput ({period.lower()}, last {window})", f"{recent['throughput'].mean():.1f}")
+    c2.metric("Lead time (days)", "—" if pd.isna(lead) else f"{lead:.1f}")
+    c3.metric("Overdue now", f"{overdue} / {open_total}", f"{overdue_rate:.0%}", delta_color="off")
+
+    for image in images:
+        st.image(image)
+
+    if breakdown is not None:
+        st.markdown("**By team**")
+        st.dataframe(breakdown)
@@ -1,11 +1,67 @@
 
 import streamlit as st
-from lib.data_manager import get_dataframes
+import pandas as pd
+from lib.audit_log import get_audit_log
+
+PAGE_SIZE = 50
 
 def show_audit():
-    users, tasks, files, audit, comm = get_dataframes()
+    log = get_audit_log()
     st.title('📝 Audit Logs')
-    if audit is None or audit.empty:
+    if len(log) == 0:
         st.info('No audit logs available.')
         return
-    st.dataframe(audit.sort_values('timestamp', ascending=False).head(200))
+
+    oldest, newest = log.time_bounds()
+    c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+    with c1:
+        # defaults to the last 30 days: only the partitions covering the range are read
+        default_start = max(oldest, newest - pd.Timedelta(days=30)) if oldest is not None else None
+        picked = st.date_input(
+            'Date range',
+            value=(default_start.date(), newest.date()) if oldest is not None else (),
+            key='audit_range',
+        )
+    start, end = (picked[0], picked[1]) if isinstance(picked, (tuple, list)) and len(picked) == 2 else (None, None)
+    with c2:
+        user = st.selectbox('User', ['All'] + log.options('user', start, end), key='audit_user')
+    with c3:
+        action = st.selectbox('Action', ['All'] + log.options('action', start, end), key='audit_action')
+    with c4:
+        category = st.selectbox('Category', ['All'] + log.options('category', start, end), key='audit_category')
+
+    filters = dict(
+        start=start, end=end,
+        user=None if user == 'All' else user,
+        action=None if action == 'All' else action,
+        category=None if category == 'All' else category,
+    )
+
+    # back to the first page whenever the filters change
+    if st.session_state.get('audit_filters') != filters:
+        st.session_state['audit_filters'] = filters
+        st.session_state['audit_page'] = 0
+    page = st.session_state.get('audit_page', 0)
+
+    rows, total = log.page(page, PAGE_SIZE, **filters)
+    pages = max(1, -(-total // PAGE_SIZE))
+    if page >= pages:
+        page = st.session_state['audit_page'] = pages - 1
+        rows, total = log.page(page, PAGE_SIZE, **filters)
+
+    if total == 0:
+        st.info('No audit entries match these filters.')
+    else:
+        st.dataframe(rows)
+        first = page * PAGE_SIZE + 1
+        st.caption(f'Entries {first}–{first + len(rows) - 1} of {total} (newest first) · page {page + 1} of {pages}')
+
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if st.button('← Newer', disabled=page == 0, key='audit_prev'):
+            st.session_state['audit_page'] = page - 1
+            st.rerun()
+    with next_col:
+        if st.button('Older →', disabled=page + 1 >= pages, key='audit_next'):
+            st.session_state['audit_page'] = page + 1
+            st.rerun()
@@ -1,34 +1,48 @@
 
 import streamlit as st
-from lib.data_manager import get_dataframes, quick_save
-from datetime import datetime
-import pandas as pd
+from lib.messages import get_message_store
+
+FEED_SIZE = 50
+# seconds between feed refreshes; only the feed reruns, not the page
+POLL_SECONDS = 5
+
+def _live(func):
+    # partial refresh where Streamlit supports fragments; otherwise the feed updates on the next rerun
+    fragment = getattr(st, 'fragment', None)
+    return fragment(run_every=POLL_SECONDS)(func) if fragment else func
+
+@_live
+def _feed(username):
+    # counted from the last full run of the page, so the caption stays up across polls
+    store = get_message_store()
+    last_seen = st.session_state.get('comm_last_seen')
+    if last_seen is not None:
+        new = store.unread(username, last_seen)
+        if new:
+            st.caption(f'{new} new message(s) since you last looked')
+    messages = store.feed(username, limit=FEED_SIZE)
+    if messages.empty:
+        st.info('No messages yet.')
+    else:
+        st.dataframe(messages)
 
 def show_comm():
-    users, tasks, files, audit, comm = get_dataframes()
+    store = get_message_store()
+    username = st.session_state.get('username', 'guest')
     st.title('💬 Communication Hub')
-    if comm is None:
-        comm = pd.DataFrame(columns=['msg_id','timestamp','user','to','message'])
     st.subheader('Send a team message')
-    with st.form('msg_form'):
+    with st.form('msg_form', clear_on_submit=True):
         to = st.text_input('To (username or All)', value='All')
         msg = st.text_area('Message')
         send = st.form_submit_button('Send')
         if send and msg:
-            row = {
-                'msg_id': (comm['msg_id'].max()+1 if not comm.empty else 1),
-                'timestamp': datetime.now(),
-                'user': st.session_state.get('username','guest'),
-                'to': to,
-                'message': msg
-            }
-            comm = pd.concat([comm, pd.DataFrame([row])], ignore_index=True)
-            quick_save(comm=comm)
-            st.success('Message sent')
-            st.experimental_rerun()
+            if store.send(username, to, msg) is not None:
+                st.success('Message sent')
+            else:
+                st.error('Could not send the message')
     st.markdown('---')
-    st.subheader('Recent messages')
-    if not comm.empty:
-        st.dataframe(comm.sort_values('timestamp', ascending=False).head(50))
-    else:
-        st.info('No messages yet.')
+    st.subheader('Your messages')
+    st.caption('Messages to you or to All, and the ones you sent; new messages appear automatically.')
+    _feed(username)
+    # the user opened or used the page: what it showed now counts as seen (polls don't)
+    st.session_state['comm_last_seen'] = store.latest_id(username)
@@ -1,26 +1,55 @@
-
 import streamlit as st
 import pandas as pd
-from lib.data_manager import get_dataframes, quick_save
+from lib.data_manager import read_table, append_rows
+from lib.blob_store import get_blob_store
 
 def show_files():
-    users, tasks, files, audit, comm = get_dataframes()
+    files = read_table("files")
+    blobs = get_blob_store()
     st.title('📁 File Tracking')
     if files is None or files.empty:
         st.info('No tracked files yet.')
     else:
         st.dataframe(files.head(50))
     st.markdown('---')
-    st.subheader('Upload & Track File (stores metadata only)')
+    st.subheader('Upload & Track File')
     uploaded = st.file_uploader('Choose a file', accept_multiple_files=False)
     if uploaded is not None:
-        meta = {
-            'filename': uploaded.name,
-            'size': uploaded.size,
-            'uploaded_by': st.session_state.get('username','guest'),
-            'timestamp': pd.Timestamp.now()
-        }
-        new = pd.DataFrame([meta])
-        files = pd.concat([files, new], ignore_index=True) if files is not None and not files.empty else new
-        quick_save(files=files)
-        st.success('File meta saved.')
+        # the uploader keeps returning the same file on every rerun: record it once
+        upload_id = getattr(uploaded, 'file_id', None) or (uploaded.name, uploaded.size)
+        recorded = st.session_state.setdefault('files_recorded', {})
+        if upload_id not in recorded:
+            digest, size, stored_size, new = blobs.put(uploaded)
+            meta = {
+                'filename': uploaded.name,
+                'size': size,
+                'uploaded_by': st.session_state.get('username','guest'),
+                'timestamp': pd.Timestamp.now(),
+                'sha256': digest,
+                'stored_size': stored_size,
+            }
+            if append_rows('files', meta):
+                recorded[upload_id] = new
+            else:
+                st.error('Could not record the file, please try again.')
+        if upload_id in recorded:
+            if recorded[upload_id]:
+                st.success('File saved.')
+            else:
+                st.success('File saved (identical content was already stored, no new copy made).')
+
+    if files is not None and 'sha256' in files.columns:
+        stored = files[files['sha256'].notna()]
+        if not stored.empty:
+            st.markdown('---')
+            st.subheader('Download a stored file')
+            labels = {
+                f"{row.filename} ({row.uploaded_by}, {row.timestamp})": (row.filename, row.sha256)
+                for row in stored.iloc[::-1].head(200).itertuples()
+            }
+            choice = st.selectbox('File', list(labels), key='files_download_choice')
+            name, digest = labels[choice]
+            if blobs.exists(digest):
+                st.download_button('Download', data=lambda: blobs.read(digest), file_name=name, key='files_download')
+            else:
+                st.warning('The stored content for this file is missing.')
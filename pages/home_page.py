@@ -1,7 +1,29 @@
 # pages/home_page.py
 import streamlit as st
 import pandas as pd
-from lib.data_manager import get_dataframes
+from lib.data_manager import query_tasks, task_counts
+from lib.audit_log import get_audit_log
+from lib.task_store import STATUSES, get_task_store
+from lib.user_directory import get_user_directory, team_key
+from lib.scheduler import latest
+
+# overdue tasks listed on the dashboard
+OVERDUE_ROWS = 10
+
+def show_overdue(scope=None, team=None, assigned_to=None):
+    """Open tasks past due (from the background snapshot), optionally for one team or assignee."""
+    overdue, computed = latest("overdue")
+    if team is not None and not overdue.empty:
+        overdue = overdue[overdue["team"].map(team_key) == team_key(team)]
+    if assigned_to is not None and not overdue.empty:
+        overdue = overdue[overdue["assigned_to"] == assigned_to]
+    st.markdown("---")
+    st.subheader(f"Overdue{f' — {scope}' if scope else ''} ({len(overdue):,})")
+    if overdue.empty:
+        st.success("Nothing overdue.")
+    else:
+        st.dataframe(overdue.head(OVERDUE_ROWS), hide_index=True)
+    st.caption(computed)
 
 def show_home():
     """
@@ -10,58 +32,51 @@ def show_home():
      - Manager: team KPIs, tasks by member, quick create for team
      - Employee: personal tasks summary + quick status update
     """
-    users, tasks, files, audit, comm = get_dataframes()
-
-    # Prefer session copies if pages updated state elsewhere
-    tasks_df = st.session_state.get("tasks_df", tasks.copy() if tasks is not None else pd.DataFrame())
-    users_df = st.session_state.get("users_df", users.copy() if users is not None else pd.DataFrame())
+    directory = get_user_directory()
 
     role = st.session_state.get("role", "Employee")
     username = st.session_state.get("username", "guest")
 
     st.header("Overview")
 
-    # Shared KPIs
-    total_tasks = 0 if tasks_df.empty else len(tasks_df)
-    pending = 0 if tasks_df.empty else len(tasks_df[tasks_df['status']=='Pending'])
-    complete = 0 if tasks_df.empty else len(tasks_df[tasks_df['status']=='Complete'])
-
     # Admin dashboard
     if role == "Admin":
+        # Shared KPIs (reads only the status column)
+        counts = task_counts("status")
+        total_tasks = int(counts.sum())
+        pending = int(counts.get('Pending', 0))
+        complete = int(counts.get('Complete', 0))
+        recent = get_audit_log().tail(10)
+
         c1, c2, c3 = st.columns(3)
         c1.metric("Total Tasks", total_tasks)
         c2.metric("Pending", pending)
         c3.metric("Completed", complete)
+        show_overdue()
 
         st.markdown("---")
         st.subheader("Recent Activity (audit)")
-        if audit is None or audit.empty:
+        if recent.empty:
             st.info("No audit logs yet.")
         else:
-            st.dataframe(audit.sort_values("timestamp", ascending=False).head(10)[["timestamp","user","action","details"]])
+            st.dataframe(recent[["timestamp","user","action","details"]])
 
     # Manager dashboard
     elif role == "Manager":
         st.subheader(f"Team overview — Manager: {username}")
 
-        # detect manager's team from users_df
-        team = None
-        if not users_df.empty and 'username' in users_df.columns and 'team' in users_df.columns:
-            row = users_df[users_df['username'] == username]
-            if not row.empty:
-                team = row.iloc[0].get('team', None)
-
+        team = directory.team(username)
         if not team:
             st.warning("No team set for you in users.csv. Set the 'team' column for your user.")
             team_members = []
         else:
-            team_members = users_df[users_df['team'] == team]['username'].tolist()
+            team_members = directory.members(team)
 
-        team_tasks = tasks_df[tasks_df['team'] == team] if team else tasks_df.iloc[0:0]
+        team_counts = task_counts("status", team=team) if team else pd.Series(dtype="int64")
 
-        t_total = len(team_tasks)
-        t_pending = len(team_tasks[team_tasks['status']=='Pending'])
-        t_complete = len(team_tasks[team_tasks['status']=='Complete'])
+        t_total = int(team_counts.sum())
+        t_pending = int(team_counts.get('Pending', 0))
+        t_complete = int(team_counts.get('Complete', 0))
 
         c1, c2, c3 = st.columns(3)
         c1.metric(f"Team ({team}) Tasks", t_total)
@@ -71,10 +86,12 @@ def show_home():
         st.markdown("---")
         st.subheader("Tasks by member")
         if team_members:
-            counts = team_tasks.groupby('assigned_to').size().reindex(team_members).fillna(0).astype(int)
+            counts = task_counts("assigned_to", team=team).reindex(team_members).fillna(0).astype(int)
             st.table(counts.rename("task_count").to_frame())
         else:
             st.info("No team members detected.")
+        if team:
+            show_overdue(f"team {team}", team=team)
 
         st.markdown("---")
         st.subheader("Quick: Create task for team member")
@@ -89,39 +106,35 @@ def show_home():
                 if not title or not desc or not assignee or assignee == "None":
                     st.error("Title, description and assignee required.")
                 else:
-                    # create new task via session state (update tasks_df)
-                    new_id = _get_next_task_id(tasks_df)
-                    new_task = {
-                        'task_id': new_id,
+                    new_id = get_task_store().create({
                         'title': title,
                         'description': desc,
                         'assigned_to': assignee,
-                        'assigned_by': username,
-                        'due_date': pd.to_datetime(due),
-                        'status': 'Pending',
+                        'due_date': due,
                         'priority': priority,
                         'team': team,
-                        'created_date': pd.Timestamp.now(),
-                        'completion_date': pd.NaT
-                    }
-                    st.session_state['tasks_df'] = pd.concat([tasks_df, pd.DataFrame([new_task])], ignore_index=True)
-                    # persist via lib.data_manager.quick_save if desired (not called automatically here)
-                    st.success(f"Created task {new_id} for {assignee}.")
+                    }, username)
+                    if new_id is None:
+                        st.error("Tasks kept changing in another session — please retry.")
+                    else:
+                        st.success(f"Created task {new_id} for {assignee}.")
 
     # Employee dashboard
     else:
         st.subheader(f"Welcome, {username} — Your Tasks")
 
-        my_tasks = tasks_df[tasks_df['assigned_to'] == username] if not tasks_df.empty else tasks_df
+        my_tasks = query_tasks(assigned_to=username)
 
-        my_total = len(my_tasks)
-        my_pending = len(my_tasks[my_tasks['status'] == 'Pending'])
-        my_complete = len(my_tasks[my_tasks['status'] == 'Complete'])
+        my_counts = task_counts("status", assigned_to=username)
+        my_total = int(my_counts.sum())
+        my_pending = int(my_counts.get('Pending', 0))
+        my_complete = int(my_counts.get('Complete', 0))
 
         c1, c2, c3 = st.columns(3)
         c1.metric("Your Tasks", my_total)
         c2.metric("Pending", my_pending)
         c3.metric("Completed", my_complete)
+        show_overdue("yours", assigned_to=username)
 
         st.markdown("---")
         st.subheader("Your open tasks")
@@ -137,25 +150,12 @@ def show_home():
                 task_row = rows[rows['task_id'] == tid].iloc[0]
                 st.markdown(f"**{task_row['title']}**")
                 st.write(task_row['description'])
-                new_status = st.selectbox("Update status", ["Pending","In Progress","Complete","Blocked"], index=["Pending","In Progress","Complete","Blocked"].index(task_row['status'] if task_row['status'] in ["Pending","In Progress","Complete","Blocked"] else "Pending"))
+                new_status = st.selectbox("Update status", STATUSES, index=STATUSES.index(task_row['status'] if task_row['status'] in STATUSES else "Pending"))
                 if st.button("Apply status"):
-                    idx = st.session_state.get('tasks_df', tasks_df).index[st.session_state.get('tasks_df', tasks_df)['task_id'] == tid]
-                    if not idx.empty:
-                        st.session_state['tasks_df'].loc[idx[0], 'status'] = new_status
-                        if new_status == "Complete":
-                            st.session_state['tasks_df'].loc[idx[0], 'completion_date'] = pd.Timestamp.now()
-                        else:
-                            st.session_state['tasks_df'].loc[idx[0], 'completion_date'] = pd.NaT
+                    updated = get_task_store().update_status([tid], new_status, username)
+                    if updated is None:
+                        st.error("Tasks kept changing in another session — please retry.")
+                    elif not updated.empty:
                         st.success("Status updated.")
                     else:
                         st.error("Could not find task index to update.")
-
-def _get_next_task_id(tasks_df):
-    """Helper: derive next integer task id from provided DataFrame."""
-    try:
-        if tasks_df is None or tasks_df.empty or 'task_id' not in tasks_df.columns:
-            return 1
-        vals = pd.to_numeric(tasks_df['task_id'], errors='coerce').dropna().astype(int)
-        return int(vals.max()) + 1 if not vals.empty else 1
-    except Exception:
-        return 1
@@ -1,6 +1,6 @@
 # pages/login_page.py
 import streamlit as st
-from lib.data_manager import get_dataframes
+from lib.user_directory import get_user_directory
 import time
 
 def show_login():
@@ -12,7 +12,7 @@ def show_login():
     if st.session_state.get("logged_in", False):
         return
 
-    users, *_ = get_dataframes()
+    directory = get_user_directory()
 
     st.markdown("<h1 style='color:white;'>Welcome to <span style='color:#2b6ef7;'>Atomm</span></h1>", unsafe_allow_html=True)
     col1, col2 = st.columns([1, 2])
@@ -26,20 +26,12 @@ def show_login():
         password = st.text_input("Password", type="password")
 
         if st.button("Login"):
-            if authenticate(username, password, users):
+            if authenticate(username, password):
                 # set session state values
                 st.session_state["logged_in"] = True
                 st.session_state["username"] = username
-
-                # set role from users.csv if present, otherwise default to Employee
-                try:
-                    if users is not None and not users.empty and "role" in users.columns:
-                        row = users[users["username"] == username]
-                        st.session_state["role"] = row.iloc[0]["role"] if not row.empty else "Employee"
-                    else:
-                        st.session_state["role"] = "Employee"
-                except Exception:
-                    st.session_state["role"] = "Employee"
+                # role from users.csv (case-insensitive), Employee if missing or unknown
+                st.session_state["role"] = directory.role(username)
 
                 st.success("✅ Login successful!")
                 # allow Streamlit to re-run and render the main UI in the same request:
@@ -49,20 +41,6 @@ def show_login():
                 st.error("Invalid credentials")
 
 
-def authenticate(username, password, users_df):
-    """Authenticate user from CSV; fallback admin/admin if empty."""
-    if not username or not password:
-        return False
-
-    if users_df is None or users_df.empty:
-        return username == "admin" and password == "admin"
-
-    if "username" not in users_df.columns:
-        return username == "admin" and password == "admin"
-
-    row = users_df[users_df["username"] == username]
-    if row.empty:
-        return False
-
-    stored_pw = str(row.iloc[0].get("password", ""))
-    return password == stored_pw
+def authenticate(username, password):
+    """Authenticate user from the user directory; fallback admin/admin if there are no users."""
+    return get_user_directory().authenticate(username, password)
@@ -0,0 +1,95 @@
+# pages/perf_page.py
+import streamlit as st
+import pandas as pd
+from lib import charts, perf
+
+def _labels(labels):
+    return ", ".join(f"{k}={v}" for k, v in labels.items())
+
+def show_perf():
+    st.title("⏱️ Performance")
+    if st.session_state.get("role") != "Admin":
+        st.error("Only admins can view performance metrics.")
+        return
+    st.caption("Timings and counters collected by this server process since it started (or since the last reset).")
+
+    c1, c2, c3 = st.columns([1, 1, 2])
+    with c1:
+        enabled = st.toggle("Collect metrics", value=perf.ENABLED, key="perf_enabled")
+        if enabled != perf.ENABLED:
+            perf.enable(enabled)
+    with c2:
+        if st.button("Reset", key="perf_reset"):
+            perf.reset()
+    snap = perf.snapshot()
+    with c3:
+        d1, d2 = st.columns(2)
+        d1.download_button("JSON lines", data=perf.to_jsonl(snap), file_name="taskpilot-perf.jsonl",
+                           mime="application/x-ndjson", key="perf_jsonl")
+        d2.download_button("Prometheus", data=perf.to_prometheus(snap), file_name="taskpilot-perf.prom",
+                           mime="text/plain", key="perf_prom")
+    if perf.PROM_FILE:
+        st.caption(f"Prometheus metrics are also written to {perf.PROM_FILE} every {perf.PROM_INTERVAL:.0f} s.")
+
+    if not snap["spans"]:
+        st.info("No timings recorded yet.")
+        return
+
+    spans = pd.DataFrame([
+        {
+            "span": s["name"],
+            "labels": _labels(s["labels"]),
+            "calls": s["count"],
+            "total s": round(s["sum"], 3),
+            "mean ms": round(s["mean"] * 1000, 2),
+            "p50 ms": round(s["p50"] * 1000, 2),
+            "p95 ms": round(s["p95"] * 1000, 2),
+            "max ms": round(s["max"] * 1000, 2),
+        }
+        for s in snap["spans"]
+    ])
+
+    st.subheader("Pages (p95)")
+    pages = spans[spans["span"].str.startswith("page.")]
+    if pages.empty:
+        st.info("No page runs recorded yet.")
+    else:
+        st.bar_chart(pages.set_index(pages["span"].str.removeprefix("page."))[["p95 ms", "mean ms"]],
+                     stack=False)
+
+    imports = spans[spans["span"].isin(["app.import", "page.import"])]
+    if not imports.empty:
+        st.subheader("Imports")
+        st.caption("Paid once per server process: the app on its first run, each page when it is first opened.")
+        st.dataframe(imports[["span", "labels", "total s"]], hide_index=True)
+
+    st.subheader("Spans")
+    st.dataframe(spans, hide_index=True)
+
+    st.subheader("Latency distribution")
+    names = [f"{s['name']} ({_labels(s['labels'])})" if s["labels"] else s["name"] for s in snap["spans"]]
+    choice = st.selectbox("Span", range(len(names)), format_func=names.__getitem__, key="perf_span")
+    picked = snap["spans"][choice]
+    buckets = pd.Series(
+        picked["buckets"],
+        index=[f"≤ {b * 1000:g} ms" if b != float("inf") else "slower" for b in perf.BUCKETS],
+        name="calls",
+    )
+    # from the fastest to the slowest non-empty bucket
+    used = buckets[buckets > 0].index
+    st.bar_chart(buckets.loc[used[0]:used[-1]] if len(used) else buckets, sort=False)
+
+    st.subheader("Counters")
+    if snap["counters"]:
+        st.dataframe(pd.DataFrame([
+            {"counter": c["name"], "labels": _labels(c["labels"]), "value": c["value"]}
+            for c in snap["counters"]
+        ]), hide_index=True)
+    else:
+        st.info("No counters recorded yet.")
+
+    stats = charts.stats()
+    st.caption(
+        f"Chart cache: {stats['hits']} hits, {stats['misses']} renders, "
+        f"{stats['over_budget']} page runs over the render budget."
+    )
@@ -1,44 +1,145 @@
 import streamlit as st
 import pandas as pd
-from lib.data_manager import get_dataframes
+from lib.audit_log import get_audit_log
+from lib.data_manager import read_range, table_version
+from lib.report_query import get_report_query
+from lib.scheduler import latest
+from lib import charts, exporters
+
+# rows rendered in the table; filtering and exports cover every match
+DISPLAY_ROWS = 1000
+OVERDUE_CHOICES = {"Any": None, "Overdue only": True, "Not overdue": False}
+GROUP_BY = {"Assignee": "assigned_to", "Team": "team", "Status": "status", "Priority": "priority"}
+
+def _date_range(picked):
+    """(start, end) from a range date_input, or None while it is empty or half-picked."""
+    if isinstance(picked, (tuple, list)) and len(picked) == 2:
+        return picked[0], picked[1]
+    return None
+
+def _estimate(key, filters, df, fmt):
+    """(rows, bytes) estimate for exporting df, kept per session until the filters or data change."""
+    cached = st.session_state.get(key)
+    if cached is None or cached[0] != (filters, fmt):
+        cached = ((filters, fmt), exporters.estimate(df, fmt))
+        st.session_state[key] = cached
+    return cached[1]
+
+def _precomputed_scope(criteria):
+    """"" for no filters, the team for a single-team filter, else None (not precomputed)."""
+    others = {k: v for k, v in criteria.items() if k != "team"}
+    if any(v is not None for v in others.values()):
+        return None
+    teams = criteria["team"] or []
+    return teams[0] if len(teams) == 1 else ("" if not teams else None)
 
 def show_reports():
     """Generate and view summarized task reports."""
     st.title("📑 Reports")
     st.markdown("Overview and exports of your task data.")
 
-    users, tasks, files, audit, comm = get_dataframes()
-
-    if tasks is None or tasks.empty:
+    query = get_report_query()
+    statuses = query.options("status")
+    if not statuses:
         st.info("No task data available to generate reports.")
         return
 
-    # --- Filter options ---
-    col1, col2 = st.columns(2)
-    selected_user = col1.selectbox("Filter by Assignee", ["All"] + sorted(tasks['assigned_to'].unique().tolist()))
-    selected_status = col2.selectbox("Filter by Status", ["All"] + sorted(tasks['status'].unique().tolist()))
-
-    filtered = tasks.copy()
-    if selected_user != "All":
-        filtered = filtered[filtered["assigned_to"] == selected_user]
-    if selected_status != "All":
-        filtered = filtered[filtered["status"] == selected_status]
+    # --- Filter options (distinct values are cached by the query engine) ---
+    col1, col2, col3, col4 = st.columns(4)
+    selected_users = col1.multiselect("Assignee", query.options("assigned_to"), key="report_assignee")
+    selected_statuses = col2.multiselect("Status", statuses, key="report_status")
+    selected_priorities = col3.multiselect("Priority", query.options("priority"), key="report_priority")
+    selected_teams = col4.multiselect("Team", query.options("team"), key="report_team")
+    col1, col2, col3 = st.columns(3)
+    due = _date_range(col1.date_input("Due between", value=(), key="report_due"))
+    created = _date_range(col2.date_input("Created between", value=(), key="report_created"))
+    overdue = OVERDUE_CHOICES[col3.selectbox("Overdue", list(OVERDUE_CHOICES), key="report_overdue")]
 
-    st.markdown(f"### Showing {len(filtered)} Tasks")
+    criteria = dict(
+        assigned_to=selected_users or None,
+        status=selected_statuses or None,
+        priority=selected_priorities or None,
+        team=selected_teams or None,
+        due=due,
+        created=created,
+        overdue=overdue,
+    )
+    version, filtered = query.select(**criteria)
 
-    st.dataframe(filtered, use_container_width=True)
+    st.markdown(f"### Showing {len(filtered):,} Tasks")
+    if len(filtered) > DISPLAY_ROWS:
+        st.caption(f"First {DISPLAY_ROWS:,} shown; the export below has all of them.")
+    st.dataframe(filtered.head(DISPLAY_ROWS), width="stretch")
 
     # --- Simple summary report ---
     st.markdown("---")
     st.subheader("📊 Summary by Priority")
-    summary = filtered.groupby("priority").size().reindex(["High", "Medium", "Low"]).fillna(0)
-    st.bar_chart(summary)
+    # all tasks or a single team: precomputed in the background; other filters are computed here
+    summaries, computed = None, None
+    scope = _precomputed_scope(criteria)
+    if scope is not None:
+        precomputed, computed = latest("reports")
+        summaries = precomputed.get(scope)
+    if summaries is None:
+        summaries, computed = {by: query.summary(by, **criteria) for by in GROUP_BY.values()}, None
+    by_priority = summaries["priority"]["tasks"].reindex(["High", "Medium", "Low"]).fillna(0)
+    st.image(charts.render(
+        "bar", version, size=(6, 3),
+        labels=tuple(by_priority.index), values=tuple(int(v) for v in by_priority.values),
+        title="Tasks by Priority", ylabel="Number of Tasks",
+    ))
+
+    group_by = st.selectbox("Group by", list(GROUP_BY), key="report_group_by")
+    st.dataframe(summaries[GROUP_BY[group_by]], width="stretch")
+    if computed:
+        st.caption(computed)
 
-    # --- Export to CSV ---
-    csv_data = filtered.to_csv(index=False).encode("utf-8")
+    # --- Export ---
+    st.markdown("---")
+    st.subheader("⬇️ Export")
+    fmt = st.selectbox("Format", exporters.formats(), key="report_format")
+    filters = (version, repr(sorted(criteria.items())))
+    rows, size = _estimate("report_estimate", filters, filtered, fmt)
+    st.caption(f"{rows:,} rows, about {exporters.human_size(size)}")
+    allowed, note = exporters.download_limit(size)
+    if note:
+        st.warning(note)
+    # the file is written batch by batch only when the button is clicked
     st.download_button(
-        label="⬇️ Download Report as CSV",
-        data=csv_data,
-        file_name="task_report.csv",
-        mime="text/csv"
+        label=f"⬇️ Download Report as {fmt}",
+        data=lambda: exporters.download(filtered, fmt),
+        file_name=exporters.file_name("task_report", fmt),
+        mime=exporters.mime(fmt),
+        disabled=not allowed,
+        key="report_download",
     )
+
+    # --- Activity log for a period ---
+    st.markdown("---")
+    st.subheader("📝 Activity Log Export")
+    today = pd.Timestamp.today().date()
+    period = st.date_input("Period", value=(today - pd.Timedelta(days=30), today), key="report_audit_range")
+    if isinstance(period, (tuple, list)) and len(period) == 2:
+        # counted from the cached audit partitions (whole months from the manifest); the rows
+        # are read only when the download is clicked
+        key = (table_version("audit"), tuple(period), fmt)
+        cached = st.session_state.get("report_audit_estimate")
+        if cached is None or cached[0] != key:
+            sample, total = get_audit_log().page(0, exporters.SAMPLE_ROWS, period[0], period[1])
+            _, size = exporters.estimate(sample, fmt)
+            cached = (key, (total, int(size * total / len(sample)) if len(sample) else 0))
+            st.session_state["report_audit_estimate"] = cached
+        rows, size = cached[1]
+        st.caption(f"{rows:,} audit entries between {period[0]} and {period[1]}, about {exporters.human_size(size)} as {fmt}")
+        allowed, note = exporters.download_limit(size)
+        if note:
+            st.warning(note)
+        if rows:
+            st.download_button(
+                label=f"⬇️ Download Activity Log as {fmt}",
+                data=lambda: exporters.download(read_range("audit", period[0], period[1]), fmt),
+                file_name=exporters.file_name(f"activity_{period[0]}_{period[1]}", fmt),
+                mime=exporters.mime(fmt),
+                disabled=not allowed,
+                key="report_audit_download",
+            )
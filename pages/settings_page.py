@@ -1,56 +1,37 @@
 # pages/settings_page.py
 import streamlit as st
-from pathlib import Path
-import json
-from lib.data_manager import get_dataframes, quick_save
-import pandas as pd
+from lib.user_directory import get_user_directory
+from lib.user_settings import get_user_settings
 
-DATA_DIR = Path(__file__).parents[1] / "data"
-SETTINGS_FILE = DATA_DIR / "settings.json"
-
-def _load_settings():
-    if SETTINGS_FILE.exists():
-        try:
-            return json.loads(SETTINGS_FILE.read_text(encoding="utf-8"))
-        except Exception:
-            pass
-    return {"theme": "Dark", "display_name": "", "email_notifications": False}
-
-def _save_settings(settings: dict):
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    SETTINGS_FILE.write_text(json.dumps(settings, indent=2), encoding="utf-8")
+THEMES = ["Dark", "Light", "Auto"]
 
 def show_settings():
-    """Settings page with persistence + display name sync"""
+    """Per-user settings page (kept in memory, saved in the background)"""
     st.title("⚙️ Settings")
     st.markdown("Customize your TaskPilot experience here!")
 
-    # load persisted settings
-    saved = _load_settings()
+    store = get_user_settings()
+    current_user = st.session_state.get("username", "")
+    saved = store.get(current_user)
 
-    # Prefill from saved settings or current session
     theme = st.selectbox(
-        "Select Theme", 
-        ["Dark", "Light", "Auto"], 
-        index=["Dark", "Light", "Auto"].index(saved.get("theme", "Dark"))
+        "Select Theme",
+        THEMES,
+        index=THEMES.index(saved["theme"]) if saved["theme"] in THEMES else 0
     )
 
-    # prefill display name: prefer user.csv -> then session -> then saved file
-    current_user = st.session_state.get("username", "")
-    users, *_ = get_dataframes()
-
-    user_display = ""
-    if users is not None and not users.empty and "username" in users.columns:
-        row = users[users["username"] == current_user]
-        if not row.empty:
-            user_display = row.iloc[0].get("display_name", "") or ""
-    if not user_display:
-        user_display = st.session_state.get("display_name", "") or saved.get("display_name", "")
+    # prefill display name: saved setting -> display_name column in users.csv -> session
+    user_display = (
+        saved["display_name"]
+        or get_user_directory().display_name(current_user)
+        or st.session_state.get("display_name", "")
+    )
 
     display_name = st.text_input("Change Display Name", value=user_display)
     email_notifications = st.checkbox(
-        "Enable Email Notifications", 
-        value=bool(saved.get("email_notifications", False))
+        "Enable Email Notifications",
+        value=bool(saved["email_notifications"]),
+        help="A digest of your tasks that are due soon or overdue, sent every few minutes when there is news."
     )
 
     st.markdown("---")
@@ -59,30 +40,21 @@ def show_settings():
     # SAVE BUTTON
     with col1:
         if st.button("Save Settings"):
-            new_settings = {
-                "theme": theme,
-                "display_name": display_name,
-                "email_notifications": email_notifications,
-            }
-            _save_settings(new_settings)
-            st.session_state["app_settings"] = new_settings
+            # one record for this user; users.csv is left alone
+            saved = store.update(
+                current_user,
+                theme=theme,
+                display_name=display_name,
+                email_notifications=email_notifications,
+            )
+            st.session_state["app_settings"] = saved
             st.session_state["display_name"] = display_name
-
-            # Update user table too
-            if current_user and users is not None and not users.empty:
-                mask = users["username"] == current_user
-                if mask.any():
-                    users.loc[mask, "display_name"] = display_name
-                    quick_save(users=users)
-                    st.info(f"Updated display name for {current_user} in users.csv ✅")
-
             st.success("Settings saved successfully!")
 
     # RESET BUTTON
     with col2:
         if st.button("Reset to defaults"):
-            defaults = {"theme": "Dark", "display_name": "", "email_notifications": False}
-            _save_settings(defaults)
+            defaults = store.reset(current_user)
             st.session_state["app_settings"] = defaults
             st.session_state["display_name"] = ""
             st.success("Reset to defaults.")
@@ -90,4 +62,4 @@ def show_settings():
 
     st.markdown("----")
     st.subheader("Current saved settings")
-    st.json(_load_settings())
+    st.json(saved)
@@ -1,8 +1,9 @@
 # pages/tasks_page.py
 import streamlit as st
-import pandas as pd
-from datetime import datetime
-from lib.data_manager import get_dataframes, get_next_id, quick_save
+from lib.data_manager import query_tasks
+from lib.task_store import STATUSES, get_task_store
+from lib.user_directory import get_user_directory
+from lib import exporters, perf
 
 def show_tasks():
     """
@@ -11,38 +12,25 @@ def show_tasks():
      - Manager: sees team tasks, can reassign, quick-create, bulk-complete
      - Admin: full dataset view with edit/create/delete
     """
-    users, tasks, files, audit, comm = get_dataframes()
-
-    # Load session copies first (so changes persist while app runs)
-    if 'tasks_df' not in st.session_state:
-        st.session_state['tasks_df'] = tasks.copy() if tasks is not None else pd.DataFrame()
-    if 'users_df' not in st.session_state:
-        st.session_state['users_df'] = users.copy() if users is not None else pd.DataFrame()
-    if 'audit_df' not in st.session_state:
-        st.session_state['audit_df'] = audit.copy() if audit is not None else pd.DataFrame()
-
-    tasks_df = st.session_state['tasks_df']
-    users_df = st.session_state['users_df']
-    audit_df = st.session_state['audit_df']
+    # shared, read-only data: every session sees the same data and each other's saves
+    directory = get_user_directory()
+    store = get_task_store()
 
     role = st.session_state.get('role', 'Employee')
     username = st.session_state.get('username', 'guest')
 
     st.title("Tasks")
 
-    # Role based dataframe
-    if role == "Employee":
-        df = tasks_df[tasks_df['assigned_to'] == username].copy() if not tasks_df.empty else tasks_df
-    elif role == "Manager":
-        # get manager team
-        team = None
-        if not users_df.empty and 'team' in users_df.columns:
-            row = users_df[users_df['username'] == username]
-            if not row.empty:
-                team = row.iloc[0].get('team', None)
-        df = tasks_df[tasks_df['team'] == team].copy() if team else tasks_df.iloc[0:0]
-    else:  # Admin
-        df = tasks_df.copy()
+    # Role based dataframe (filtered by the storage backend)
+    team = None
+    with perf.span("tasks.role_filter", role=role):
+        if role == "Employee":
+            df = query_tasks(assigned_to=username)
+        elif role == "Manager":
+            team = directory.team(username)
+            df = query_tasks(team=team) if team else store.df.iloc[0:0]
+        else:  # Admin
+            df = query_tasks()
 
     # Basic table view
     st.subheader("Task List")
@@ -65,66 +53,65 @@ def show_tasks():
                 tid = int(sel)
                 task = my_tasks[my_tasks['task_id'] == tid].iloc[0]
                 st.write(task['title'])
-                new_status = st.selectbox("Status", ["Pending","In Progress","Complete","Blocked"], index=["Pending","In Progress","Complete","Blocked"].index(task['status'] if task['status'] in ["Pending","In Progress","Complete","Blocked"] else "Pending"))
+                new_status = st.selectbox("Status", STATUSES, index=STATUSES.index(task['status'] if task['status'] in STATUSES else "Pending"))
                 if st.button("Save status"):
-                    idx = st.session_state['tasks_df'][st.session_state['tasks_df']['task_id'] == tid].index
-                    if not idx.empty:
-                        st.session_state['tasks_df'].loc[idx[0], 'status'] = new_status
-                        if new_status == "Complete":
-                            st.session_state['tasks_df'].loc[idx[0], 'completion_date'] = pd.to_datetime(datetime.now())
-                        else:
-                            st.session_state['tasks_df'].loc[idx[0], 'completion_date'] = pd.NaT
-                        # log
-                        _log_action(audit_df, username, "Status Updated", f"Task {tid} -> {new_status}")
-                        quick_save(tasks=st.session_state['tasks_df'], audit=st.session_state['audit_df'])
-                        st.success("Saved.")
-                    else:
+                    updated = store.update_status([tid], new_status, username)
+                    if updated is None:
+                        _conflict()
+                    elif updated.empty:
                         st.error("Task index not found.")
+                    else:
+                        st.success("Saved.")
 
     # Manager tools
     elif role == "Manager":
         st.subheader("Manager Controls")
         st.markdown("**Bulk actions**")
         checked = st.multiselect("Select Task IDs", options=df['task_id'].astype(int).tolist())
+        members = directory.members(team) if team else []
         col1, col2, col3 = st.columns(3)
         with col1:
             if st.button("Mark selected Complete") and checked:
-                updated = 0
-                for tid in checked:
-                    idx = st.session_state['tasks_df'][st.session_state['tasks_df']['task_id'] == tid].index
-                    if not idx.empty:
-                        st.session_state['tasks_df'].loc[idx[0], 'status'] = "Complete"
-                        st.session_state['tasks_df'].loc[idx[0], 'completion_date'] = pd.to_datetime(datetime.now())
-                        updated += 1
-                if updated:
-                    _log_action(audit_df, username, "Bulk Complete", f"Marked {updated} tasks complete: {checked}")
-                    quick_save(tasks=st.session_state['tasks_df'], audit=st.session_state['audit_df'])
-                    st.success(f"{updated} tasks updated.")
+                updated = store.update_status(checked, "Complete", username, action="Bulk Complete")
+                if updated is None:
+                    _conflict()
+                elif not updated.empty:
+                    st.success(f"{len(updated)} tasks updated.")
         with col2:
-            if st.button("Reassign selected") and checked:
-                members = users_df[users_df['team'] == users_df[users_df['username'] == username]['team'].iloc[0]]['username'].tolist() if not users_df.empty else []
-                new_assignee = st.selectbox("New assignee", options=members, key="mgr_reassign")
-                if new_assignee:
-                    for tid in checked:
-                        idx = st.session_state['tasks_df'][st.session_state['tasks_df']['task_id'] == tid].index
-                        if not idx.empty:
-                            st.session_state['tasks_df'].loc[idx[0], 'assigned_to'] = new_assignee
-                    _log_action(audit_df, username, "Bulk Reassign", f"Reassigned {checked} -> {new_assignee}")
-                    quick_save(tasks=st.session_state['tasks_df'], audit=st.session_state['audit_df'])
-                    st.success("Reassigned.")
+            new_assignee = st.selectbox("New assignee", options=members, key="mgr_reassign")
+            if st.button("Reassign selected") and checked and new_assignee:
+                updated = store.reassign(checked, new_assignee, username, action="Bulk Reassign")
+                if updated is None:
+                    _conflict()
+                elif not updated.empty:
+                    st.success(f"{len(updated)} tasks reassigned.")
         with col3:
-            if st.button("Export selected to CSV") and checked:
-                out = st.session_state['tasks_df'][st.session_state['tasks_df']['task_id'].isin(checked)]
-                st.download_button("Download CSV", out.to_csv(index=False), file_name="selected_tasks.csv")
+            fmt = st.selectbox("Export format", exporters.formats(), key="mgr_export_format")
+            allowed = True
+            if checked:
+                # sized from a sample of the rows, kept per session until the selection or data change
+                key = (store.version, tuple(checked), fmt)
+                cached = st.session_state.get("mgr_export_estimate")
+                if cached is None or cached[0] != key:
+                    cached = (key, exporters.estimate(store.rows(checked), fmt))
+                    st.session_state["mgr_export_estimate"] = cached
+                rows, size = cached[1]
+                st.caption(f"{rows:,} rows, about {exporters.human_size(size)}")
+                allowed, note = exporters.download_limit(size)
+                if note:
+                    st.warning(note)
+            # built only when clicked, batch by batch
+            st.download_button(
+                "Export selected",
+                data=lambda: exporters.download(store.rows(checked), fmt),
+                file_name=exporters.file_name("selected_tasks", fmt),
+                mime=exporters.mime(fmt),
+                disabled=not checked or not allowed,
+                key="mgr_export",
+            )
 
         st.markdown("---")
         st.subheader("Create task for team member")
-        members = []
-        if not users_df.empty and 'team' in users_df.columns:
-            row = users_df[users_df['username'] == username]
-            if not row.empty:
-                team = row.iloc[0].get('team', None)
-                members = users_df[users_df['team'] == team]['username'].tolist()
         with st.form("mgr_create"):
             title = st.text_input("Title")
             desc = st.text_area("Description")
@@ -136,24 +123,18 @@ def show_tasks():
                 if not title or not desc or assignee == "None":
                     st.error("Please fill required fields.")
                 else:
-                    new_id = get_next_id(st.session_state['tasks_df'], 'task_id')
-                    new_task = {
-                        'task_id': new_id,
+                    new_id = store.create({
                         'title': title,
                         'description': desc,
                         'assigned_to': assignee,
-                        'assigned_by': username,
-                        'due_date': pd.to_datetime(due),
-                        'status': 'Pending',
+                        'due_date': due,
                         'priority': priority,
                         'team': team,
-                        'created_date': pd.to_datetime(datetime.now()),
-                        'completion_date': pd.NaT
-                    }
-                    st.session_state['tasks_df'] = pd.concat([st.session_state['tasks_df'], pd.DataFrame([new_task])], ignore_index=True)
-                    _log_action(audit_df, username, "Task Created (Mgr)", f"Task {new_id} -> {assignee}")
-                    quick_save(tasks=st.session_state['tasks_df'], audit=st.session_state['audit_df'])
-                    st.success(f"Task {new_id} created.")
+                    }, username, action="Task Created (Mgr)")
+                    if new_id is None:
+                        _conflict()
+                    else:
+                        st.success(f"Task {new_id} created.")
 
     # Admin tools
     else:
@@ -162,41 +143,32 @@ def show_tasks():
             with st.form("admin_create"):
                 title = st.text_input("Title")
                 desc = st.text_area("Description")
-                assignee = st.selectbox("Assign to", options=users_df['username'].tolist() if not users_df.empty else ["admin"])
+                assignee = st.selectbox("Assign to", options=directory.usernames() or ["admin"])
                 priority = st.selectbox("Priority", ["High","Medium","Low"], index=1)
                 due = st.date_input("Due date")
                 submitted = st.form_submit_button("Create")
                 if submitted:
-                    new_id = get_next_id(st.session_state['tasks_df'], 'task_id')
-                    new_task = {
-                        'task_id': new_id,
+                    new_id = store.create({
                         'title': title,
                         'description': desc,
                         'assigned_to': assignee,
-                        'assigned_by': username,
-                        'due_date': pd.to_datetime(due),
-                        'status': 'Pending',
+                        'due_date': due,
                         'priority': priority,
-                        'team': users_df[users_df['username'] == assignee]['team'].iloc[0] if not users_df.empty and 'team' in users_df.columns and not users_df[users_df['username'] == assignee].empty else '',
-                        'created_date': pd.to_datetime(datetime.now()),
-                        'completion_date': pd.NaT
-                    }
-                    st.session_state['tasks_df'] = pd.concat([st.session_state['tasks_df'], pd.DataFrame([new_task])], ignore_index=True)
-                    _log_action(audit_df, username, "Task Created (Admin)", f"Task {new_id}: {title}")
-                    quick_save(tasks=st.session_state['tasks_df'], audit=st.session_state['audit_df'])
-                    st.success("Created.")
+                        'team': directory.team(assignee) or '',
+                    }, username, action="Task Created (Admin)")
+                    if new_id is None:
+                        _conflict()
+                    else:
+                        st.success("Created.")
+
+        with st.expander("Delete tasks (admin)"):
+            doomed = st.multiselect("Task IDs to delete", options=df['task_id'].astype(int).tolist(), key="admin_delete")
+            if st.button("Delete selected") and doomed:
+                removed = store.delete(doomed, username)
+                if removed is None:
+                    _conflict()
+                else:
+                    st.success(f"Deleted {len(removed)} tasks.")
 
-def _log_action(audit_df, user, action, details):
-    """Append to audit_df in session state (creates audit_df if missing)."""
-    if 'audit_df' not in st.session_state:
-        st.session_state['audit_df'] = audit_df.copy() if audit_df is not None else pd.DataFrame(columns=['log_id','timestamp','user','action','details','category'])
-    new_id = get_next_id(st.session_state['audit_df'], 'log_id') if not st.session_state['audit_df'].empty else 1
-    new_log = {
-        'log_id': new_id,
-        'timestamp': pd.Timestamp.now(),
-        'user': user,
-        'action': action,
-        'details': details,
-        'category': 'Task Management'
-    }
-    st.session_state['audit_df'] = pd.concat([st.session_state['audit_df'], pd.DataFrame([new_log])], ignore_index=True)
+def _conflict():
+    st.error("Tasks kept changing in another session — reloaded the latest data, please retry.")
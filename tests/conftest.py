@@ -0,0 +1,75 @@
+# tests/conftest.py
+"""
+Every test session runs against a scratch copy of data/, set up before lib is
+imported (lib.data_manager reads TASKPILOT_DATA_DIR at import), with
+synchronous commits and without the background scheduler.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = Path(tempfile.mkdtemp(prefix="taskpilot-tests-"))
+shutil.copytree(ROOT / "data", DATA, dirs_exist_ok=True,
+                ignore=shutil.ignore_patterns(".locks", ".columnar", "taskpilot.db*", "sequences.json",
+                                              "user_settings.jsonl", "deadline_events.jsonl", "outbox.jsonl"))
+os.environ["TASKPILOT_DATA_DIR"] = str(DATA)
+os.environ["TASKPILOT_COMMIT_INTERVAL"] = "0"
+os.environ["TASKPILOT_SCHEDULER"] = "0"
+sys.path.insert(0, str(ROOT))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATA, ignore_errors=True)
+
+
+TEAMS = ["Core", "core", "Ops ", "ops", None]
+ASSIGNEES = ["admin", "manager", "employee", "x"]
+PRIORITIES = ["High", "Medium", "Low"]
+
+
+@pytest.fixture
+def store():
+    """A fresh TaskStore; the tasks table is put back as it was afterwards."""
+    from lib import data_manager as dm
+    from lib.task_store import TaskStore
+    original = dm.load_table("tasks")
+    yield TaskStore()
+    dm.save_table("tasks", original)
+    dm.flush()
+
+
+@pytest.fixture
+def random_writes():
+    """apply(store, seed, n): n random creates, status changes, reassignments and deletes."""
+    from lib.task_store import STATUSES
+
+    def apply(store, seed, n):
+        rng = random.Random(seed)
+        now = pd.Timestamp.now().normalize()
+        for _ in range(n):
+            ids = store.df["task_id"].tolist()
+            op = rng.choice(["create", "create", "status", "reassign", "delete"]) if ids else "create"
+            picked = rng.sample(ids, min(len(ids), rng.randint(1, 4))) if ids else []
+            if op == "create":
+                due = rng.choice([None, now + pd.Timedelta(days=rng.randint(-20, 20))])
+                store.create({
+                    "title": f"task {rng.random():.6f}",
+                    "assigned_to": rng.choice(ASSIGNEES),
+                    "priority": rng.choice(PRIORITIES),
+                    "team": rng.choice(TEAMS),
+                    "due_date": due,
+                    "status": rng.choice(STATUSES),
+                }, "tester")
+            elif op == "status":
+                store.update_status(picked + [10 ** 9], rng.choice(STATUSES), "tester")
+            elif op == "reassign":
+                store.reassign(picked, rng.choice(ASSIGNEES), "tester")
+            else:
+                store.delete(picked[:1], "tester")
+    return apply
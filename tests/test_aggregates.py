@@ -0,0 +1,31 @@
+# tests/test_aggregates.py
+import pytest
+from lib.aggregates import TaskAggregates, GROUP_KEYS
+from lib.backends import team_key
+
+
+def _groups(aggregates):
+    groups = aggregates.groups()
+    return sorted(map(tuple, groups.astype(object).where(groups.notna(), None).to_numpy().tolist()),
+                  key=repr)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_incremental_counts_match_a_rebuild(store, random_writes, seed):
+    aggregates = TaskAggregates(store)
+    random_writes(store, seed, n=40)
+    fresh = TaskAggregates(store)
+    assert aggregates.version == fresh.version == store.version
+    assert _groups(aggregates) == _groups(fresh)
+
+    df = store.df.astype(object)
+    for by in GROUP_KEYS:
+        expected = df[by].dropna().value_counts()
+        assert aggregates.counts(by).to_dict() == expected.to_dict()
+    for team in ("core", " OPS"):
+        same = df[df["team"].map(team_key, na_action="ignore") == team_key(team)]
+        expected = same["status"].value_counts()
+        assert aggregates.counts("status", team=team).to_dict() == expected.to_dict()
+    mine = df[(df["assigned_to"] == "admin") & (df["priority"] == "High")]
+    assert aggregates.counts("status", assigned_to="admin", priority="High").to_dict() == \
+        mine["status"].value_counts().to_dict()
@@ -0,0 +1,51 @@
+# tests/test_audit_log.py
+import random
+import pandas as pd
+from lib import data_manager as dm
+from lib.audit_log import AuditLog
+
+
+def _rows(rng, first, n):
+    # unique timestamps spread over early 2024, appended out of order
+    stamps = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.sample(range(0, 120 * 86_400), n), unit="s")
+    return [{
+        "log_id": first + i,
+        "timestamp": stamp,
+        "user": rng.choice(["pager-a", "pager-b"]),
+        "action": rng.choice(["Login", "Task Created"]),
+        "details": f"row {first + i}",
+        "category": "Test",
+    } for i, stamp in enumerate(stamps)]
+
+
+def _expected(page, size, start=None, end=None, **filters):
+    df = dm.read_range("audit", start, end)
+    for col, value in filters.items():
+        df = df[df[col] == value]
+    # newest first; rows logged at the same moment come last-appended first
+    ids = df.sort_values("timestamp", kind="stable")["log_id"].tolist()[::-1]
+    return ids[page * size:(page + 1) * size], len(df)
+
+
+def _check(audit, page, size, start=None, end=None, **filters):
+    rows, total = audit.page(page, size, start, end, **filters)
+    ids, expected_total = _expected(page, size, start, end, **filters)
+    assert total == expected_total
+    assert (rows["log_id"].tolist() if len(rows) else []) == ids
+
+
+def test_pages_match_a_sorted_scan():
+    rng = random.Random(7)
+    audit = AuditLog()
+    assert dm.append_rows("audit", _rows(rng, 900_000, 80))
+    _check(audit, 0, 25, "2024-01-01", "2024-12-31")
+    # rows appended after a partition was loaded are picked up too
+    assert dm.append_rows("audit", _rows(rng, 900_100, 40))
+    dm.flush()
+    for page in range(6):
+        _check(audit, page, 25, "2024-01-01", "2024-12-31")
+        _check(audit, page, 20, user="pager-a")
+        _check(audit, page, 10, "2024-02-01", "2024-03-15", action="Login")
+    _check(audit, 0, 50)
+    _check(audit, 0, 50, "2024-02-10", "2024-02-10")
+    assert len(audit) == len(dm.read_range("audit"))
@@ -0,0 +1,38 @@
+# tests/test_blob_store.py
+import hashlib
+import io
+import pytest
+from lib.blob_store import BlobStore
+
+
+class _Stream(io.BytesIO):
+    """An upload that can only be read once, front to back."""
+
+    def seekable(self):
+        return False
+
+
+def _files(directory):
+    return sorted(p for p in directory.rglob("*") if p.is_file())
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_same_content_is_stored_once(tmp_path, compress):
+    blobs = BlobStore(tmp_path, compress=compress, chunk_size=1024)
+    text = b"taskpilot " * 2_000
+    noise = hashlib.sha256(b"seed").digest() * 300
+
+    digest, size, stored, new = blobs.put(io.BytesIO(text))
+    assert (digest, size, new) == (hashlib.sha256(text).hexdigest(), len(text), True)
+    assert (stored < size) == compress
+    assert blobs.put(io.BytesIO(text)) == (digest, size, stored, False)
+    assert blobs.put(_Stream(text)) == (digest, size, stored, False)
+    assert len(_files(tmp_path)) == 1
+
+    other, _, _, new = blobs.put(_Stream(noise))
+    assert new and other != digest
+    assert len(_files(tmp_path)) == 2
+    assert blobs.read(digest) == text and blobs.read(other) == noise
+    assert blobs.exists(digest) and not blobs.exists("0" * 64)
+    with pytest.raises(FileNotFoundError):
+        blobs.read("0" * 64)
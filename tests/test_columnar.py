@@ -0,0 +1,67 @@
+# tests/test_columnar.py
+import pandas as pd
+import pytest
+from lib import columnar
+from lib import data_manager as dm
+
+pytestmark = pytest.mark.skipif(not columnar.available(), reason="needs pyarrow")
+
+TASKS = pd.DataFrame({
+    "task_id": [1, 2, 3, 4],
+    "title": ["a", "b", "c", "d"],
+    "status": ["Pending", "Complete", "Pending", "Blocked"],
+    "priority": ["High", "Low", "Low", "High"],
+    "team": ["Core", "core", "Ops", None],
+})
+
+
+def test_projection_reads_only_the_requested_columns(tmp_path):
+    path = tmp_path / "tasks.arrow"
+    assert columnar.write_snapshot(path, "tasks", TASKS, [1, 2])
+    df = columnar.read_snapshot(path, [1, 2], ["status", "team"])
+    assert list(df.columns) == ["status", "team"]
+    assert isinstance(df["status"].dtype, pd.CategoricalDtype)
+    assert df["status"].tolist() == TASKS["status"].tolist()
+    assert columnar.read_snapshot(path, [1, 3], ["status"]) is None  # stale
+    assert columnar.read_snapshot(path, [1, 2], ["status", "nope"]) is None
+
+
+def test_concat_keeps_categoricals():
+    df = columnar.categorize("tasks", TASKS.copy())
+    new = pd.DataFrame({"task_id": [5], "status": ["In Progress"], "team": ["Ops"]})
+    out = columnar.concat([df, new])
+    assert isinstance(out["status"].dtype, pd.CategoricalDtype)
+    assert out["status"].tolist() == TASKS["status"].tolist() + ["In Progress"]
+    assert out["team"].tolist()[-1] == "Ops"
+
+
+@pytest.fixture
+def snapshots(monkeypatch, tmp_path):
+    monkeypatch.setattr(dm, "COLUMNAR", True)
+    monkeypatch.setattr(dm, "SNAPSHOT_DIR", tmp_path)
+    dm.invalidate_cache()
+    yield
+    dm.invalidate_cache()
+
+
+def test_task_counts_match_a_full_scan(snapshots):
+    full = dm.load_table("tasks")
+    assert isinstance(full["status"].dtype, pd.CategoricalDtype)
+    dm.invalidate_cache("tasks")
+    counts = dm.task_counts("status")
+    assert dm._CACHE.get("tasks") is None  # answered from the snapshot projection
+    expected = full["status"].astype(object).value_counts()
+    assert counts.to_dict() == expected.to_dict()
+    team = full["team"].dropna().iloc[0]
+    by_team = dm.task_counts("assigned_to", team=team.upper())
+    same = full[full["team"].astype(object).str.strip().str.casefold() == team.strip().casefold()]
+    assert by_team.to_dict() == same["assigned_to"].value_counts().to_dict()
+
+
+def test_store_updates_keep_categoricals():
+    from lib.task_store import _with_values
+    df = columnar.categorize("tasks", TASKS.copy())
+    out = _with_values(df, [0, 2], {"status": "In Progress"})
+    assert isinstance(out["status"].dtype, pd.CategoricalDtype)
+    assert out["status"].tolist() == ["In Progress", "Complete", "In Progress", "Blocked"]
+    assert df["status"].tolist() == TASKS["status"].tolist()  # the shared frame is untouched
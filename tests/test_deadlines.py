@@ -0,0 +1,101 @@
+# tests/test_deadlines.py
+import smtplib
+import pandas as pd
+import pytest
+from lib import deadlines
+from lib.deadlines import DeadlineEngine
+
+NOW = pd.Timestamp("2026-03-10 12:00")
+
+
+class Store:
+    """Just enough of a TaskStore: a fixed frame and its listeners."""
+
+    def __init__(self, df):
+        self.df = df
+
+    def subscribe(self, listener):
+        listener(1, self.df, None, None)
+
+    def view(self):
+        return 1, self.df
+
+
+class Outbox:
+    def __init__(self, fail=None):
+        self.sent, self.fail = [], fail
+
+    def send(self, message):
+        if self.fail is not None:
+            raise self.fail
+        self.sent.append(message)
+
+
+class Settings:
+    def get(self, username):
+        return {"email_notifications": username != "quiet"}
+
+
+class Directory:
+    def get(self, username):
+        return {"username": username}
+
+
+@pytest.fixture(autouse=True)
+def users(monkeypatch, tmp_path):
+    monkeypatch.setattr(deadlines, "get_user_settings", Settings)
+    monkeypatch.setattr(deadlines, "get_user_directory", Directory)
+    monkeypatch.setattr(deadlines, "LOCK_DIR", tmp_path / ".locks")
+
+
+def tasks():
+    return pd.DataFrame({
+        "task_id": [1, 2, 3, 4],
+        "title": ["late", "tomorrow", "done", "far"],
+        "assigned_to": ["ann", "ann", "bob", "quiet"],
+        "status": ["Pending", "In Progress", "Complete", "Pending"],
+        "due_date": pd.to_datetime(["2026-03-01", "2026-03-11", "2026-03-01", "2026-03-01"]),
+    })
+
+
+def engine(tmp_path, outbox):
+    return DeadlineEngine(Store(tasks()), outbox, tmp_path / "ledger.jsonl", digest_every=0)
+
+
+def test_events_fire_once_across_restarts(tmp_path):
+    outbox = Outbox()
+    first = engine(tmp_path, outbox)
+    assert first.poll(NOW) == 3  # overdue 1 and 4, due soon 2; 3 is complete
+    assert first.deliver(force=True) == 1  # "quiet" opted out, handled all the same
+    [message] = outbox.sent
+    assert message["username"] == "ann"
+    assert sorted((e["task_id"], e["kind"]) for e in message["events"]) == [(1, "overdue"), (2, "due_soon")]
+
+    restarted = engine(tmp_path, outbox)
+    assert restarted.poll(NOW) == 0
+    assert restarted.deliver(force=True) == 0
+    assert len(outbox.sent) == 1
+
+
+@pytest.mark.parametrize("error", [OSError("connection refused"),
+                                   smtplib.SMTPRecipientsRefused({"ann@localhost": (550, b"no")})])
+def test_failed_delivery_is_requeued(tmp_path, error):
+    outbox = Outbox(fail=error)
+    eng = engine(tmp_path, outbox)
+    eng.poll(NOW)
+    assert eng.deliver(force=True) == 0
+    assert sorted(e["task_id"] for e in eng.pending("ann")) == [1, 2]
+
+    outbox.fail = None
+    assert eng.deliver(force=True) == 1
+    assert eng.pending() == {}
+    assert engine(tmp_path, outbox).poll(NOW) == 0
+
+
+def test_unexpected_error_loses_nothing(tmp_path):
+    outbox = Outbox(fail=RuntimeError("bug"))
+    eng = engine(tmp_path, outbox)
+    eng.poll(NOW)
+    with pytest.raises(RuntimeError):
+        eng.deliver(force=True)
+    assert sorted(e["task_id"] for e in eng.pending("ann")) == [1, 2]
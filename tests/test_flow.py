@@ -0,0 +1,28 @@
+# tests/test_flow.py
+import pandas as pd
+import pytest
+from lib.backends import team_key
+from lib.flow import FlowStats
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_incremental_buckets_match_a_rebuild(store, random_writes, seed):
+    flow = FlowStats(store)
+    random_writes(store, seed, n=40)
+    fresh = FlowStats(store)
+
+    for freq in ("D", "W-MON"):
+        pd.testing.assert_frame_equal(flow.series(freq), fresh.series(freq))
+    for by in ("team", "assigned_to"):
+        pd.testing.assert_frame_equal(flow.breakdown(by).sort_index(), fresh.breakdown(by).sort_index())
+
+    df = store.df
+    today = pd.Timestamp.now().normalize()
+    due = pd.to_datetime(df["due_date"])
+    open_due = df[due.notna() & (df["status"] != "Complete")]
+    for team in (None, "core", "OPS "):
+        rows = open_due if team is None else open_due[
+            open_due["team"].map(team_key, na_action="ignore") == team_key(team)]
+        late = int((pd.to_datetime(rows["due_date"]) < today).sum())
+        assert flow.overdue(team=team) == fresh.overdue(team=team)
+        assert flow.overdue(team=team)[:2] == (late, len(rows))
@@ -0,0 +1,28 @@
+# tests/test_manager_home.py
+import os
+from streamlit.testing.v1 import AppTest
+from conftest import ROOT
+
+
+def login(username, password):
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.run()
+    at.text_input[0].input(username)
+    at.text_input[1].input(password)
+    at.button[0].click()
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_demo_manager_sees_team_tasks():
+    # users.csv spells the team "core", tasks.csv "Core": one team all the same
+    at = login("manager", "manager")
+    totals = {m.label: m.value for m in at.metric}
+    team_total = next(value for label, value in totals.items() if label.startswith("Team ("))
+    assert int(team_total) > 0
+
+    at.sidebar.radio[0].set_value("Tasks")
+    at.run()
+    assert not at.exception
+    assert len(at.dataframe) and not at.dataframe[0].value.empty
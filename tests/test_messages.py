@@ -0,0 +1,54 @@
+# tests/test_messages.py
+import random
+from lib import data_manager as dm
+from lib.messages import MessageStore
+
+USERS = ["ann", "Bob", "carl"]
+
+
+def _expected(username, since_id=None, limit=50, include_sent=True):
+    df = dm.read_table("comm")
+    to = df["to"].astype(str).str.strip().str.casefold()
+    mine = to.isin([username.strip().casefold(), "all"])
+    if include_sent:
+        mine |= df["user"].astype(str).str.strip().str.casefold() == username.strip().casefold()
+    df = df[mine].sort_values("msg_id")
+    if since_id is not None:
+        df = df[df["msg_id"] > since_id]
+    return df["msg_id"].tolist()[::-1][:limit]
+
+
+def test_feed_matches_a_scan_of_the_comm_table():
+    rng = random.Random(5)
+    messages = MessageStore()
+    sent = []
+    for i in range(60):
+        sender = rng.choice(USERS)
+        to = rng.choice(USERS + ["All", "BOB ", "all"])
+        sent.append(messages.send(sender, to, f"message {i}"))
+        if i % 20 == 19:
+            dm.flush()
+    assert None not in sent and sent == sorted(sent)
+
+    for user in USERS + ["nobody"]:
+        for since_id in (None, sent[10], sent[-1]):
+            for limit in (5, 50):
+                feed = messages.feed(user, since_id, limit)
+                assert feed["msg_id"].tolist() == _expected(user, since_id, limit)
+        received = messages.feed(user, limit=None, include_sent=False)
+        assert received["msg_id"].tolist() == _expected(user, limit=None, include_sent=False)
+        everything = _expected(user, limit=None)
+        assert messages.latest_id(user) == (everything[0] if everything else 0)
+        df = dm.read_table("comm")
+        own = df.loc[df["user"].str.casefold() == user.casefold(), "msg_id"]
+        unread = set(_expected(user, sent[30], limit=None, include_sent=False)) - set(own)
+        assert messages.unread(user, sent[30]) == len(unread)
+
+
+def test_a_rewritten_table_is_reindexed():
+    messages = MessageStore()
+    messages.send("ann", "carl", "to be removed")
+    df = dm.load_table("comm")
+    dm.save_table("comm", df[df["message"] != "to be removed"])
+    assert "to be removed" not in messages.feed("carl", limit=None)["message"].tolist()
+    assert messages.feed("carl", limit=None)["msg_id"].tolist() == _expected("carl", limit=None)
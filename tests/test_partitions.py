@@ -0,0 +1,104 @@
+# tests/test_partitions.py
+import numpy as np
+import pandas as pd
+import pytest
+from lib.partitions import UNDATED, PartitionedCsv
+
+
+def _rows(rng, n, first_id, start="2025-09-01", days=150):
+    stamps = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days * 86400, n), unit="s")
+    return pd.DataFrame({
+        "log_id": np.arange(first_id, first_id + n),
+        "timestamp": stamps.sort_values().strftime("%Y-%m-%d %H:%M:%S"),
+        "user": rng.choice(["admin", "manager", "alice"], n),
+        "action": rng.choice(["Login", "Status Updated", "Task Created"], n),
+    })
+
+
+def _between(df, start, end):
+    stamps = pd.to_datetime(df["timestamp"])
+    keep = pd.Series(True, index=df.index)
+    if start is not None:
+        keep &= stamps >= pd.Timestamp(start)
+    if end is not None:
+        keep &= stamps <= pd.Timestamp(end)
+    return df[keep]
+
+
+def _ids(df):
+    return sorted(df["log_id"].astype(int))
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "compressed"])
+def table(request, tmp_path):
+    return PartitionedCsv(tmp_path / "audit", "timestamp", compress=request.param,
+                          lock_dir=tmp_path / ".locks")
+
+
+def test_range_reads_match_a_full_scan(table):
+    rng = np.random.default_rng(7)
+    full = _rows(rng, 400, 1)
+    table.write(full.iloc[:250])
+    for chunk in np.array_split(np.arange(250, 400), 5):
+        table.append(full.iloc[chunk])
+
+    assert _ids(table.read()) == _ids(full)
+    for start, end in [("2025-10-15", "2025-11-20"), ("2025-12-01", None), (None, "2025-09-30"),
+                       ("2026-01-31 23:00", "2026-02-01 01:00"), ("2027-01-01", None)]:
+        got = table.read(start, end)
+        # partitions are read whole: trimming them must give the brute-force answer
+        assert _ids(_between(got, start, end)) == _ids(_between(full, start, end))
+        # and no partition outside the range is opened
+        months = pd.to_datetime(got["timestamp"]).dt.strftime("%Y-%m").unique()
+        wanted = pd.to_datetime(_between(full, start, end)["timestamp"]).dt.strftime("%Y-%m").unique()
+        assert sorted(months) == sorted(wanted)
+
+
+def test_manifest_counts_every_row(table):
+    rng = np.random.default_rng(11)
+    full = _rows(rng, 300, 1)
+    table.write(full.iloc[:100])
+    table.append(full.iloc[100:])
+    parts = table.manifest()["partitions"]
+    stamps = pd.to_datetime(full["timestamp"])
+    expected = stamps.dt.strftime("%Y-%m").value_counts().to_dict()
+    assert {key: info["rows"] for key, info in parts.items()} == expected
+    for key, info in parts.items():
+        in_month = stamps[stamps.dt.strftime("%Y-%m") == key]
+        assert pd.Timestamp(info["start"]) == in_month.min()
+        assert pd.Timestamp(info["end"]) == in_month.max()
+        assert len(table.read_partition(key)[0]) == info["rows"]
+
+
+def test_incremental_partition_reads(tmp_path):
+    table = PartitionedCsv(tmp_path / "audit", "timestamp", lock_dir=tmp_path / ".locks")
+    rng = np.random.default_rng(3)
+    first = _rows(rng, 50, 1, start="2026-03-01", days=10)
+    later = _rows(rng, 20, 51, start="2026-03-15", days=10)
+    table.write(first)
+    key = table.partitions()[-1][0]
+    seen, offset = table.read_partition(key)
+    table.append(later)
+    tail, _ = table.read_partition(key, offset)
+    assert _ids(seen) == _ids(first)
+    assert _ids(tail) == _ids(later)
+
+
+def test_undated_rows_only_in_unbounded_reads(tmp_path):
+    table = PartitionedCsv(tmp_path / "audit", "timestamp", lock_dir=tmp_path / ".locks")
+    rows = _rows(np.random.default_rng(5), 10, 1)
+    rows.loc[3, "timestamp"] = "not a date"
+    table.write(rows)
+    assert UNDATED in table.manifest()["partitions"]
+    assert 4 in _ids(table.read())
+    assert 4 not in _ids(table.read("2025-01-01", "2027-01-01"))
+
+
+def test_legacy_file_is_migrated(tmp_path):
+    legacy = tmp_path / "audit_log.csv"
+    rows = _rows(np.random.default_rng(9), 60, 1)
+    rows.to_csv(legacy, index=False)
+    table = PartitionedCsv(tmp_path / "audit", "timestamp", legacy=legacy, lock_dir=tmp_path / ".locks")
+    assert _ids(table.read()) == _ids(rows)
+    assert table.manifest()["migrated_from"] == legacy.name
+    assert legacy.exists()
@@ -0,0 +1,77 @@
+# tests/test_report_query.py
+import random
+import pandas as pd
+import pytest
+from conftest import ASSIGNEES, PRIORITIES, TEAMS
+from lib.backends import team_key
+from lib.report_query import ReportQuery
+from lib.task_store import STATUSES
+
+
+def _filters(rng):
+    now = pd.Timestamp.now().normalize()
+    filters = {}
+    if rng.random() < 0.5:
+        filters["status"] = rng.sample(STATUSES, rng.randint(1, 2))
+    if rng.random() < 0.4:
+        filters["assigned_to"] = rng.choice(ASSIGNEES)
+    if rng.random() < 0.3:
+        filters["priority"] = rng.choice(PRIORITIES)
+    if rng.random() < 0.4:
+        filters["team"] = rng.choice([t for t in TEAMS if t])
+    if rng.random() < 0.3:
+        filters["due"] = (now - pd.Timedelta(days=10), rng.choice([None, now]))
+    if rng.random() < 0.3:
+        filters["overdue"] = rng.random() < 0.5
+    return filters
+
+
+def _brute_force(df, filters):
+    keep = pd.Series(True, index=df.index)
+    for col in ("status", "assigned_to", "priority"):
+        if col in filters:
+            values = filters[col] if isinstance(filters[col], list) else [filters[col]]
+            keep &= df[col].isin(values)
+    if "team" in filters:
+        keep &= df["team"].map(team_key, na_action="ignore") == team_key(filters["team"])
+    due = pd.to_datetime(df["due_date"])
+    if "due" in filters:
+        start, end = filters["due"]
+        keep &= due >= start
+        if end is not None:
+            keep &= due < end + pd.Timedelta(days=1)
+    if "overdue" in filters:
+        late = (due < pd.Timestamp.now().normalize()) & (df["status"] != "Complete")
+        keep &= late if filters["overdue"] else ~late
+    return df[keep]
+
+
+def _ids(rows):
+    return sorted(rows["task_id"].tolist())
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_incremental_index_matches_a_rebuild(store, random_writes, seed):
+    query = ReportQuery(store)
+    random_writes(store, seed, n=40)
+    fresh = ReportQuery(store)
+    df = store.df.astype(object)
+    rng = random.Random(seed)
+    for _ in range(30):
+        filters = _filters(rng)
+        version, rows = query.select(**filters)
+        assert version == store.version
+        assert _ids(rows) == _ids(fresh.select(**filters)[1]) == _ids(_brute_force(df, filters))
+
+    for by in ("status", "priority", "assigned_to"):
+        summary = query.summary(by)
+        pd.testing.assert_frame_equal(summary.sort_index(), fresh.summary(by).sort_index())
+        expected = df[by].fillna("(none)").value_counts()
+        assert summary["tasks"].to_dict() == expected.to_dict()
+
+    teams = query.summary("team")
+    pd.testing.assert_frame_equal(teams.sort_index(), fresh.summary("team").sort_index())
+    expected = df["team"].map(team_key, na_action="ignore").fillna("(none)").value_counts()
+    by_key = teams["tasks"].rename(lambda name: team_key(name) if name != "(none)" else name)
+    assert by_key.to_dict() == expected.to_dict()
+    assert set(query.options("team")) == set(fresh.options("team"))
@@ -0,0 +1,54 @@
+# tests/test_sequences.py
+import subprocess
+import sys
+from pathlib import Path
+from lib.sequences import SequenceAllocator
+
+ROOT = Path(__file__).resolve().parents[1]
+
+WORKERS = 4
+ROUNDS = 25
+
+# each worker reserves ids in small batches and prints them
+WORKER = """
+import sys
+from pathlib import Path
+from lib.sequences import SequenceAllocator
+path = Path(sys.argv[1])
+seq = SequenceAllocator(path / "sequences.json", path / "sequences.lock", lambda key: 100)
+for i in range({rounds}):
+    print(*seq.reserve("tasks.task_id", 1 + i % 3))
+"""
+
+
+def test_ids_are_unique_across_processes(tmp_path):
+    script = WORKER.format(rounds=ROUNDS)
+    procs = [
+        subprocess.Popen([sys.executable, "-c", script, str(tmp_path)], cwd=ROOT,
+                         stdout=subprocess.PIPE, text=True)
+        for _ in range(WORKERS)
+    ]
+    ids = []
+    for proc in procs:
+        out, _ = proc.communicate(timeout=60)
+        assert proc.returncode == 0
+        ids += [int(x) for x in out.split()]
+    per_worker = sum(1 + i % 3 for i in range(ROUNDS))
+    assert len(ids) == WORKERS * per_worker
+    assert sorted(ids) == list(range(101, 101 + len(ids)))
+    seq = SequenceAllocator(tmp_path / "sequences.json", tmp_path / "sequences.lock", lambda key: 0)
+    assert seq.current("tasks.task_id") == 100 + len(ids)
+
+
+def test_seeded_once_from_the_table(tmp_path):
+    calls = []
+
+    def seed(key):
+        calls.append(key)
+        return 41
+
+    seq = SequenceAllocator(tmp_path / "sequences.json", tmp_path / "sequences.lock", seed)
+    assert seq.ensure("audit.log_id") == 41
+    assert seq.next("audit.log_id") == 42
+    assert list(seq.reserve("audit.log_id", 3)) == [43, 44, 45]
+    assert calls == ["audit.log_id"]
@@ -0,0 +1,63 @@
+# tests/test_task_store.py
+import pandas as pd
+from lib import data_manager as dm
+from lib import task_store
+from lib.task_store import TaskStore
+
+
+def test_bulk_writes_leave_earlier_frames_untouched(store, random_writes):
+    random_writes(store, seed=1, n=10)
+    old = store.df
+    kept = old.copy()
+    ids = old["task_id"].tolist()[:3]
+    store.update_status(ids, "Complete", "tester")
+    store.reassign(ids, "employee", "tester")
+    store.delete(ids[:1], "tester")
+    pd.testing.assert_frame_equal(old, kept)
+    now = store.rows(ids[1:])
+    assert (now["status"] == "Complete").all() and now["completion_date"].notna().all()
+    assert (now["assigned_to"] == "employee").all()
+    assert store.get(ids[0]) is None
+    store.update_status(ids[1:], "Pending", "tester")
+    assert store.rows(ids[1:])["completion_date"].isna().all()
+
+
+def test_unknown_ids_are_ignored(store):
+    version = store.version
+    assert store.update_status([10 ** 9], "Complete", "tester").empty
+    assert store.delete([10 ** 9], "tester").empty
+    assert store.version == version
+
+
+def test_create_gives_fresh_ids(store):
+    first = store.create({"title": "a", "team": "Core"}, "tester")
+    second = store.create({"title": "b", "team": "Ops"}, "tester")
+    assert first != second
+    assert store.get(second)["title"] == "b"
+    assert store.df["task_id"].is_unique
+
+
+def test_listeners_see_changed_rows(store):
+    seen = []
+    store.subscribe(lambda version, df, before, after: seen.append((before, after)))
+    task_id = store.create({"title": "a"}, "tester")
+    store.reassign([task_id], "manager", "tester")
+    store.delete([task_id], "tester")
+    assert seen[0] == (None, None)
+    created, reassigned, deleted = seen[1:]
+    assert created[0].empty and created[1]["task_id"].tolist() == [task_id]
+    assert reassigned[0]["assigned_to"].isna().all() and reassigned[1]["assigned_to"].tolist() == ["manager"]
+    assert deleted[0]["task_id"].tolist() == [task_id] and deleted[1].empty
+
+
+def test_conflicting_save_is_retried_on_their_data(store, monkeypatch):
+    ids = store.df["task_id"].tolist()
+    other = TaskStore()
+    task_id = other.create({"title": "theirs"}, "tester")
+    # don't notice the other save up front, so the first attempt conflicts
+    stale = iter([store.version])
+    monkeypatch.setattr(task_store, "table_version", lambda name: next(stale, dm.table_version(name)))
+    assert len(store.update_status(ids, "Blocked", "tester")) == len(ids)
+    saved = dm.read_table("tasks").set_index("task_id")["status"]
+    assert (saved[ids] == "Blocked").all()
+    assert saved[task_id] == "Pending"
@@ -0,0 +1,14 @@
+# tests/test_user_settings.py
+import json
+from lib.user_settings import UserSettingsStore
+
+
+def test_legacy_settings_do_not_opt_everyone_in(tmp_path):
+    legacy = tmp_path / "settings.json"
+    legacy.write_text(json.dumps({"theme": "Light", "display_name": "junaid", "email_notifications": True}))
+    store = UserSettingsStore(tmp_path / "user_settings.jsonl", legacy, interval=0)
+    assert store.get("admin") == {"theme": "Light", "display_name": "", "email_notifications": False}
+
+    store.update("employee", email_notifications=True)
+    assert store.get("employee")["email_notifications"] is True
+    assert store.get("manager")["email_notifications"] is False
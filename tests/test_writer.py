@@ -0,0 +1,92 @@
+# tests/test_writer.py
+import threading
+import time
+import pandas as pd
+import pytest
+from lib import data_manager as dm
+from lib import writer
+from lib.writer import GroupCommitWriter
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(writer, "RETRY_BASE", 0.01)
+    monkeypatch.setattr(writer, "RETRY_MAX", 0.05)
+
+
+def test_failed_commit_is_kept_and_retried(fast_retries):
+    committed, failing = [], threading.Event()
+    failing.set()
+
+    def commit(name, ops):
+        if failing.is_set():
+            raise OSError("disk full")
+        committed.extend((name, kind, len(frame)) for kind, frame, _ in ops)
+
+    w = GroupCommitWriter(commit, interval=0.01)
+    w.submit("tasks", "write", pd.DataFrame({"a": [1, 2]}))
+    assert w.flush(timeout=5) is False
+    assert isinstance(w.failed("tasks"), OSError)
+    assert w.busy("tasks")
+    assert committed == []
+
+    failing.clear()
+    deadline = time.monotonic() + 5
+    while w.failed("tasks") is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert w.flush(timeout=5) is True
+    assert committed == [("tasks", "write", 2)]
+    assert not w.busy("tasks")
+    w.stop(timeout=5)
+
+
+def test_newer_write_supersedes_a_failed_one(fast_retries):
+    committed, failing = [], threading.Event()
+    failing.set()
+
+    def commit(name, ops):
+        if failing.is_set():
+            raise OSError("read-only file system")
+        committed.extend(len(frame) for _, frame, _ in ops)
+
+    w = GroupCommitWriter(commit, interval=0.01)
+    w.submit("tasks", "write", pd.DataFrame({"a": [1]}))
+    assert w.flush(timeout=5) is False
+    w.submit("tasks", "write", pd.DataFrame({"a": [1, 2, 3]}))
+    failing.clear()
+    deadline = time.monotonic() + 5
+    while not w.flush(timeout=0.1) and time.monotonic() < deadline:
+        pass
+    assert committed == [3]
+    w.stop(timeout=5)
+
+
+def test_quick_save_failure_surfaces(monkeypatch, fast_retries):
+    dm.flush()
+    before = pd.read_csv(dm.TASKS_CSV)
+    backend = dm.get_backend()
+    monkeypatch.setattr(dm, "_WRITER", GroupCommitWriter(dm._commit, interval=0.01))
+
+    def unwritable(name, df):
+        raise PermissionError(f"cannot write {name}")
+    monkeypatch.setattr(backend, "write", unwritable)
+
+    tasks = dm.load_table("tasks")
+    tasks["title"] = "CHANGED"
+    assert dm.quick_save(tasks=tasks) is True  # queued
+    assert dm.flush(timeout=5) is False
+    # readers are back on what storage holds, and further saves are refused
+    assert (dm.read_table("tasks")["title"] != "CHANGED").all()
+    assert dm.quick_save(tasks=tasks) is False
+    pd.testing.assert_frame_equal(pd.read_csv(dm.TASKS_CSV), before)
+
+    # storage recovers: the queued save lands and readers see it
+    monkeypatch.delattr(backend, "write")
+    deadline = time.monotonic() + 5
+    while not dm.flush(timeout=0.1) and time.monotonic() < deadline:
+        pass
+    assert (pd.read_csv(dm.TASKS_CSV)["title"] == "CHANGED").all()
+    assert (dm.read_table("tasks")["title"] == "CHANGED").all()
+
+    dm.save_table("tasks", before)
+    assert dm.flush(timeout=5)